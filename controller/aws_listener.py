@@ -1,12 +1,25 @@
 
 from flask import Flask, request, jsonify, Request
 from model.trap_manager import TrapManager
+from model.trap_registry import TrapRegistry
+from model.ingest_queue import IngestQueue, QueueFull, wants_queued
+from model import metrics
 import sys
 import os
+import json
+import zlib
 sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/.."))
 
+# ה-/ingest הציבורי: רק המלכודות שה-listener תמך בהן מלכתחילה. ransomware (משנה את bait_files)
+# ו-iot_router לא נחשפים כאן גם כשהם פעילים בקונפיג; HONEY_TRAPS / HONEY_TRAP_<NAME> רק מצמצמים
+INGEST_TRAPS = ("http", "ftp", "ssh", "admin_panel", "phishing", "open_ports")
+
 app = Flask(__name__)
-trap_manager = TrapManager()
+trap_manager = TrapManager(only=[n for n in TrapRegistry().names() if n in INGEST_TRAPS])
+ingest_queue = IngestQueue(trap_manager)
+metrics.instrument_app(app)
+metrics.gauge("honeypot_ingest_queue_depth", "Events waiting in the ingest queue").set_function(
+    lambda: ingest_queue.metrics()["depth"])
 
 
 def _client_ip(req: Request) -> str:
@@ -36,6 +49,19 @@ def ingest():
 
     if not trap_type or input_data is None:
         return jsonify({"error": "trap_type and input are required"}), 400
+    if not isinstance(trap_type, str):
+        return jsonify({"error": "trap_type must be a string"}), 400
+    if not isinstance(ip, str):
+        return jsonify({"error": "ip must be a string"}), 400
+
+    if wants_queued(request.headers):
+        if trap_manager.get_trap(trap_type) is None:
+            return jsonify({"status": "error", "error": f"unknown trap_type '{trap_type}'"}), 400
+        try:
+            event_id = ingest_queue.submit(trap_type, input_data, ip)
+        except QueueFull as e:
+            return _queue_full(e)
+        return jsonify({"status": "accepted", "event_id": event_id}), 202
 
     try:
         trap_manager.run_trap(trap_type, input_data, ip)
@@ -44,6 +70,145 @@ def ingest():
         return jsonify({"status": "error"}), 500
 
 
+def _queue_full(e: QueueFull):
+    resp = jsonify({"status": "error", "error": str(e)})
+    resp.headers["Retry-After"] = str(e.retry_after)
+    return resp, 429
+
+
+# מגבלות ל-/ingest/batch
+INGEST_MAX_ITEMS = int(os.getenv("HONEY_INGEST_MAX_ITEMS", "1000"))
+INGEST_MAX_BYTES = int(os.getenv("HONEY_INGEST_MAX_BYTES", str(10 * 1024 * 1024)))
+
+
+class BatchError(ValueError):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _read_batch_body(req: Request) -> bytes:
+    """גוף הבקשה (אחרי gunzip אם צריך), עם תקרת גודל גם אחרי פריסה."""
+    if req.content_length is not None and req.content_length > INGEST_MAX_BYTES:
+        raise BatchError(f"body too large (max {INGEST_MAX_BYTES} bytes)", 413)
+    raw = req.stream.read(INGEST_MAX_BYTES + 1)
+    if len(raw) > INGEST_MAX_BYTES:
+        raise BatchError(f"body too large (max {INGEST_MAX_BYTES} bytes)", 413)
+    if (req.headers.get("Content-Encoding") or "").lower() == "gzip":
+        d = zlib.decompressobj(wbits=47)   # gzip או zlib
+        try:
+            raw = d.decompress(raw, INGEST_MAX_BYTES + 1)
+        except zlib.error:
+            raise BatchError("invalid gzip body")
+        if len(raw) > INGEST_MAX_BYTES or d.unconsumed_tail:
+            raise BatchError(f"decompressed body too large (max {INGEST_MAX_BYTES} bytes)", 413)
+    return raw
+
+
+def _parse_batch(body: bytes, content_type: str) -> list:
+    """JSON array / {"events": [...]} או NDJSON (אובייקט בכל שורה)."""
+    text = body.decode("utf-8", errors="replace").strip()
+    if not text:
+        return []
+    if "ndjson" not in content_type and text[0] in "[{":
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = None
+        if isinstance(data, list):
+            return data
+        if isinstance(data, dict) and isinstance(data.get("events"), list):
+            return data["events"]
+        if isinstance(data, dict):
+            return [data]
+    items = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            items.append(json.loads(line))
+        except ValueError:
+            items.append(None)   # יסומן כשגיאה בשורה הזו
+    return items
+
+
+def _validate_item(item, known: set):
+    if not isinstance(item, dict):
+        return "item must be a JSON object"
+    if not item.get("trap_type") or item.get("input") is None:
+        return "trap_type and input are required"
+    if not isinstance(item["trap_type"], str):
+        return "trap_type must be a string"
+    if item.get("ip") is not None and not isinstance(item["ip"], str):
+        return "ip must be a string"
+    if item["trap_type"] not in known:
+        return f"unknown trap_type '{item['trap_type']}'"
+    return None
+
+
+@app.route("/ingest/batch", methods=["POST"])
+def ingest_batch():
+    """
+    מקבל הרבה אירועים בבקשה אחת:
+      - JSON array (או {"events": [...]}) / NDJSON
+      - אופציונלי: Content-Encoding: gzip
+    מחזיר סטטוס לכל פריט לפי האינדקס שלו.
+    """
+    try:
+        items = _parse_batch(_read_batch_body(request), (request.content_type or "").lower())
+    except BatchError as e:
+        return jsonify({"error": str(e)}), e.status
+    if not items:
+        return jsonify({"error": "empty batch"}), 400
+    if len(items) > INGEST_MAX_ITEMS:
+        return jsonify({"error": f"too many events (max {INGEST_MAX_ITEMS})"}), 413
+
+    default_ip = _client_ip(request)
+    known = set(trap_manager.list_traps())
+    errors = [_validate_item(item, known) for item in items]
+
+    queued = wants_queued(request.headers)
+    results = []
+    accepted = 0
+    retry_after = None
+    for i, (item, err) in enumerate(zip(items, errors)):
+        if err:
+            results.append({"index": i, "status": "error", "error": err})
+            continue
+        if queued:
+            try:
+                event_id = ingest_queue.submit(item["trap_type"], item["input"], item.get("ip") or default_ip)
+                results.append({"index": i, "status": "accepted", "event_id": event_id})
+                accepted += 1
+            except QueueFull as e:
+                results.append({"index": i, "status": "rejected", "error": str(e)})
+                retry_after = e.retry_after
+            continue
+        try:
+            trap_manager.run_trap(item["trap_type"], item["input"], item.get("ip") or default_ip)
+            results.append({"index": i, "status": "ok"})
+            accepted += 1
+        except Exception:
+            results.append({"index": i, "status": "error", "error": "trap failed"})
+
+    resp = jsonify({
+        "accepted": accepted,
+        "failed": len(items) - accepted,
+        "results": results,
+    })
+    if retry_after is not None:
+        # חלק מהפריטים לא נכנסו לתור - הלקוח ישלח אותם שוב
+        resp.headers["Retry-After"] = str(retry_after)
+        return resp, 429 if accepted == 0 else 202
+    return resp, 202 if queued else 200
+
+
+@app.route("/queue/metrics", methods=["GET"])
+def queue_metrics():
+    return jsonify(ingest_queue.metrics()), 200
+
+
 @app.route("/health", methods=["GET"])
 def health():
     return jsonify({"status": "running"}), 200
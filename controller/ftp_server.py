@@ -1,78 +1,218 @@
+import atexit
 import logging
+import math
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional, Tuple
+
 from pyftpdlib.authorizers import DummyAuthorizer
 from pyftpdlib.handlers import FTPHandler
-from pyftpdlib.servers import FTPServer
-import os
+from pyftpdlib.servers import FTPServer, ThreadedFTPServer
 
-# Define the log file path
-LOG_FILE = 'logs/ftp_logs.txt'  # Updated log file path
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/.."))
 
-# Set up logging
-logging.basicConfig(
-    filename=LOG_FILE,
-    level=logging.INFO,
-    format='%(asctime)s %(levelname)s %(message)s'
-)
+from controller.port_listener import parse_ports
+from model import logger as log_sink
+from model import metrics
+from model.logger import LOG_DIR, SinkHandler
+from model.trap_manager import TrapManager
+
+# Define the log file path
+LOG_FILE = str(LOG_DIR / "ftp_logs.txt")  # server log (pyftpdlib); trap events go to ftp_honeypot.log
+
+MODES = ("async", "threaded", "prefork")
+
+FTP_HOST = os.getenv("HONEY_FTP_HOST", "0.0.0.0")
+FTP_PORT = int(os.getenv("HONEY_FTP_PORT", "2121"))
+FTP_ROOT = os.getenv("HONEY_FTP_ROOT", os.path.abspath("ftp_root"))
+# async: event loop אחד | threaded: thread לכל חיבור | prefork: N תהליכים על אותו socket
+FTP_MODE = os.getenv("HONEY_FTP_MODE", "async").strip().lower()
+FTP_WORKERS = int(os.getenv("HONEY_FTP_WORKERS", str(os.cpu_count() or 1)))
+FTP_MAX_CONS = int(os.getenv("HONEY_FTP_MAX_CONS", "512"))
+FTP_MAX_CONS_PER_IP = int(os.getenv("HONEY_FTP_MAX_CONS_PER_IP", "10"))
+FTP_PASSIVE_PORTS = os.getenv("HONEY_FTP_PASSIVE_PORTS", "60000-60009")
+FTP_MASQUERADE = os.getenv("HONEY_FTP_MASQUERADE_ADDRESS") or None
+FTP_IDLE_TIMEOUT = float(os.getenv("HONEY_FTP_IDLE_TIMEOUT", "300"))
+FTP_AUTH_FAILED_DELAY = float(os.getenv("HONEY_FTP_AUTH_FAILED_DELAY", "3"))
+FTP_EVENT_QUEUE_SIZE = int(os.getenv("HONEY_FTP_EVENT_QUEUE_SIZE", "10000"))
+
+_DROPPED = metrics.counter("honeypot_ftp_log_dropped_total", "FTP log records dropped because the queue was full")
+
+# רשומות עם trap_input הופכות לאירוע FTPTrap; כל השאר הולך ללוג השרת
+event_log = logging.getLogger("honeypot.ftp")
+
+
+class DropQueueHandler(QueueHandler):
+    """QueueHandler שלא חוסם את ה-I/O loop: כשהתור מלא הרשומה נזרקת ונספרת."""
+
+    def __init__(self, q: "queue.Queue[Any]"):
+        super().__init__(q)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            _DROPPED.inc()
+
+
+class TrapEventHandler(logging.Handler):
+    """צד ה-listener: מעביר רשומה עם trap_input ל-FTPTrap דרך TrapManager.run_trap."""
+
+    def __init__(self, manager: Any):
+        super().__init__()
+        self.manager = manager
+        self.addFilter(lambda r: hasattr(r, "trap_input"))
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.manager.run_trap("ftp", record.trap_input, record.trap_ip)
+        except Exception:
+            self.handleError(record)
+
+
+class EventLogging:
+    """
+    כל הלוגים של שרת ה-FTP עוברים דרך תור חסום ל-thread אחד (QueueListener):
+    אירועי מלכודת -> TrapManager.run_trap("ftp") (אותו פורמט ואותם listeners כמו /simulate),
+    והודעות השרת של pyftpdlib -> ftp_logs.txt דרך ה-sink המשותף.
+    ה-handler על ה-root logger רק מכניס לתור, כך שגל של ניסיונות login לא ממתין לדיסק.
+    """
+
+    def __init__(self, manager: Any, queue_size: int = FTP_EVENT_QUEUE_SIZE, log_file: str = LOG_FILE):
+        self.queue_size = max(1, int(queue_size))
+        self.handler = DropQueueHandler(queue.Queue(maxsize=self.queue_size))
+        server_log = SinkHandler(log_file)
+        server_log.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(message)s'))
+        server_log.addFilter(lambda r: not hasattr(r, "trap_input"))
+        self.targets = (TrapEventHandler(manager), server_log)
+        self.listener: Optional[QueueListener] = None
+
+    def start(self) -> "EventLogging":
+        root = logging.getLogger()
+        if self.handler not in root.handlers:
+            root.addHandler(self.handler)
+        if root.level == logging.NOTSET or root.level > logging.INFO:
+            root.setLevel(logging.INFO)
+        self.listener = QueueListener(self.handler.queue, *self.targets, respect_handler_level=True)
+        self.listener.start()
+        return self
+
+    def stop(self) -> None:
+        """מרוקן את התור (כל מה שכבר נכנס נכתב) ומנתק את ה-handler."""
+        logging.getLogger().removeHandler(self.handler)
+        if self.listener is not None:
+            try:
+                self.listener.stop()
+            except Exception:
+                pass
+            self.listener = None
+        log_sink.flush(5)
+
+    def pending(self) -> int:
+        return self.handler.queue.qsize()
+
+    def _after_fork(self) -> None:
+        # ב-child אין את ה-thread של ה-listener, והנעילות של התור הישן אולי נעולות
+        if self.listener is None:
+            return
+        self.handler.queue = queue.Queue(maxsize=self.queue_size)
+        self.listener = QueueListener(self.handler.queue, *self.targets, respect_handler_level=True)
+        self.listener.start()
+
+
+_events: Optional[EventLogging] = None
+
+
+def setup_logging(manager: Any = None, queue_size: int = FTP_EVENT_QUEUE_SIZE) -> EventLogging:
+    global _events
+    if _events is None:
+        _events = EventLogging(manager or TrapManager(), queue_size).start()
+        atexit.register(_events.stop)
+        metrics.gauge("honeypot_ftp_log_queue_depth", "FTP log records waiting for the writer thread").set_function(
+            lambda: _events.pending() if _events is not None else 0)
+    return _events
 
-class TrapFTPHandler(FTPHandler):
-    def on_login(self, username):
-        logging.info(f"Login: {username} from {self.remote_ip}")
-        logging.info(f"Connection from {self.remote_ip}:{self.remote_port} - User: {username}")
 
-    def on_disconnect(self):
-         logging.info(f"Disconnected {self.remote_ip}:{self.remote_port} - User: {self.username}")
+def _reset_after_fork() -> None:
+    if _events is not None:
+        _events._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
-    def on_login_failed(self, username, password):
-        logging.warning(f"Failed login: {username} from {self.remote_ip}")
 
-    def ftp_STOR(self, file, callback=None):
+class TrapFTPHandler(FTPHandler):
+    """
+    כל פקודה של התוקף נרשמת כאירוע FTPTrap ("LIST /", "RETR x" וכו');
+    USER + PASS נרשמים יחד כ-{username, password} בזמן ה-PASS.
+    """
+
+    def _event(self, input_data: Any) -> None:
+        event_log.info("ftp %s", self.remote_ip, extra={"trap_input": input_data, "trap_ip": self.remote_ip})
+
+    def pre_process_command(self, line, cmd, arg):
+        if cmd == "PASS":
+            if self.username and not self.authenticated:
+                self._event({"username": self.username, "password": arg or ""})
+        elif cmd != "USER":
+            self._event(line)
+        return super().pre_process_command(line, cmd, arg)
+
+    def ftp_STOR(self, file, mode="w"):
         logging.warning(f"Upload attempt from {self.remote_ip}, file: {file}")
         self.respond("550 Uploads are not allowed.")  # Respond with a 550 error
-        return '550 Uploads are not allowed.'
-
-    def ftp_LIST(self, path):
-        logging.info(f"LIST command from {self.remote_ip}, path: {path}")
-        super().ftp_LIST(path)
 
-    def ftp_RETR(self, file, callback=None):
-        logging.info(f"RETR command from {self.remote_ip}, file: {file}")
-        super().ftp_RETR(file, callback)
 
-    def ftp_MKD(self, dirname):
-        logging.info(f"MKD command from {self.remote_ip}, dirname: {dirname}")
-        super().ftp_MKD(dirname)
-
-    def ftp_RMD(self, dirname):
-        logging.info(f"RMD command from {self.remote_ip}, dirname: {dirname}")
-        super().ftp_RMD(dirname)
-
-    def ftp_DELE(self, filename):
-        logging.info(f"DELE command from {self.remote_ip}, filename: {filename}")
-        super().ftp_DELE(filename)
-
-    def ftp_RNFR(self, filename):
-        logging.info(f"RNFR command from {self.remote_ip}, filename: {filename}")
-        super().ftp_RNFR(filename)
-
-    def ftp_RNTO(self, filename):
-        logging.info(f"RNTO command from {self.remote_ip}, filename: {filename}")
-        super().ftp_RNTO(filename)
-
-def run_ftp_server():
-    ftp_root = os.path.abspath("ftp_root")
+def build_server(mode: str = FTP_MODE, host: str = FTP_HOST, port: int = FTP_PORT, ftp_root: str = FTP_ROOT,
+                 max_cons: int = FTP_MAX_CONS, max_cons_per_ip: int = FTP_MAX_CONS_PER_IP,
+                 passive_ports: str = FTP_PASSIVE_PORTS, workers: int = FTP_WORKERS) -> Tuple[Any, int]:
+    """
+    מחזיר (server, worker_processes) לפי mode. המגבלות של pyftpdlib נספרות בכל תהליך,
+    ולכן ב-prefork max_cons מתחלק בין ה-workers; max_cons_per_ip נשאר לכל worker.
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {MODES}")
+    if mode == "prefork" and os.name != "posix":
+        mode = "async"
     os.makedirs(ftp_root, exist_ok=True)
 
     authorizer = DummyAuthorizer()
     authorizer.add_user("user", "12345", ftp_root, perm="elradfmMT")  # Removed "w" permission
 
-    handler = TrapFTPHandler
-    handler.authorizer = authorizer
-    handler.passive_ports = range(60000, 60010)  # Configure passive ports
+    # subclass לכל שרת: ההגדרות הן class attributes של pyftpdlib
+    handler = type("TrapFTPHandler", (TrapFTPHandler,), {
+        "authorizer": authorizer,
+        "passive_ports": parse_ports(passive_ports) or None,
+        "masquerade_address": FTP_MASQUERADE,
+        "timeout": FTP_IDLE_TIMEOUT,
+        "auth_failed_timeout": FTP_AUTH_FAILED_DELAY,
+    })
+
+    workers = max(1, int(workers)) if mode == "prefork" else 1
+    server_cls = ThreadedFTPServer if mode == "threaded" else FTPServer
+    server = server_cls((host, port), handler)
+    server.max_cons = math.ceil(max_cons / workers) if max_cons else 0
+    server.max_cons_per_ip = max_cons_per_ip
+    return server, workers
 
-    server = FTPServer(("0.0.0.0", 2121), handler)
-    print("FTP server running on port 2121...")
-    server.serve_forever()
+
+def run_ftp_server():
+    server, workers = build_server()
+    setup_logging()
+    print(f"FTP server running on port {FTP_PORT} ({FTP_MODE}, {workers} process(es))...")
+    try:
+        if workers > 1:
+            server.serve_forever(worker_processes=workers)
+        else:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        pass    # prefork: ה-parent נקטע בתוך os.wait
     print("Server loop exited!")
 
 if __name__ == "__main__":
-    run_ftp_server()
\ No newline at end of file
+    run_ftp_server()
@@ -0,0 +1,140 @@
+
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/.."))
+
+from model.open_ports_trap import BANNERS
+from model.trap_manager import TrapManager
+
+
+def parse_ports(spec: str) -> List[int]:
+    """'21,22,80,8000-8100' -> [21, 22, 80, 8000, ..., 8100]"""
+    ports = set()
+    for part in (spec or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            lo, hi = part.split("-", 1)
+            ports.update(range(int(lo), int(hi) + 1))
+        else:
+            ports.add(int(part))
+    return sorted(p for p in ports if 0 <= p <= 65535)
+
+
+class PortListener:
+    """
+    מאזין TCP אמיתי לפורטים רבים על event loop אחד (בלי thread לכל socket):
+    - שולח את הבאנר מ-BANNERS בהתחברות (אם יש לפורט באנר)
+    - קורא את הבייטים הראשונים שהלקוח שולח (עם timeout)
+    - מעביר את החיבור ל-OpenPortsTrap דרך TrapManager (לוג + זיהוי nmap)
+    - max_connections חוסם חיבורים במקביל; מעבר לזה החיבור נסגר מיד
+    - run_trap רץ ב-pool של workers threads (כמו ב-ssh_listener), לא על ה-event loop;
+      חיבור נספר ב-active עד שהרישום שלו הסתיים, כך שהתור ל-pool חסום ב-max_connections
+    """
+
+    def __init__(self, ports: Iterable[int], manager: Optional[TrapManager] = None,
+                 host: str = "0.0.0.0", timeout: float = 5.0, max_connections: int = 10000,
+                 read_bytes: int = 1024, banners: Optional[Dict[int, str]] = None, workers: int = 8):
+        self.ports = list(ports)
+        self.manager = manager or TrapManager()
+        self.host = host
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.read_bytes = read_bytes
+        self.banners = BANNERS if banners is None else banners
+        self.active = 0
+        self.accepted = 0
+        self.rejected = 0
+        self._servers: List[asyncio.AbstractServer] = []
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="port-trap")
+
+    async def start(self) -> List[int]:
+        """פותח את כל הפורטים; פורט שלא ניתן לפתוח מדולג. מחזיר את הפורטים שנפתחו."""
+        for port in self.ports:
+            try:
+                server = await asyncio.start_server(self._handle, self.host, port, reuse_address=True)
+            except OSError as e:
+                print(f"Port listener: cannot bind {self.host}:{port}: {e}")
+                continue
+            self._servers.append(server)
+        return self.bound_ports()
+
+    def bound_ports(self) -> List[int]:
+        return [s.sockets[0].getsockname()[1] for s in self._servers if s.sockets]
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        print(f"Port listener running on {len(self._servers)} ports...")
+        await asyncio.gather(*(s.serve_forever() for s in self._servers))
+
+    async def stop(self) -> None:
+        for s in self._servers:
+            s.close()
+        await asyncio.gather(*(s.wait_closed() for s in self._servers), return_exceptions=True)
+        self._servers = []
+        # חיבורים שכבר נסגרו אבל הרישום שלהם עוד ב-pool
+        deadline = asyncio.get_running_loop().time() + self.timeout
+        while self.active and asyncio.get_running_loop().time() < deadline:
+            await asyncio.sleep(0.01)
+        self._pool.shutdown(wait=True)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = writer.get_extra_info("peername") or ("unknown", 0)
+        port = (writer.get_extra_info("sockname") or ("", 0))[1]
+        if self.active >= self.max_connections:
+            self.rejected += 1
+            writer.close()
+            return
+        self.active += 1
+        self.accepted += 1
+        data = b""
+        try:
+            banner = self.banners.get(port)
+            if banner:
+                writer.write(banner.encode("utf-8") + b"\r\n")
+                await asyncio.wait_for(writer.drain(), self.timeout)
+            data = await asyncio.wait_for(reader.read(self.read_bytes), self.timeout)
+        except (asyncio.TimeoutError, ConnectionError, OSError):
+            pass
+        finally:
+            try:
+                writer.close()
+            except Exception:
+                pass
+        try:
+            await self._record(port, peer[0], data)
+        finally:
+            self.active -= 1
+
+    async def _record(self, port: int, ip: str, data: bytes) -> None:
+        payload = data.decode("utf-8", errors="replace")
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._pool, self.manager.run_trap, "open_ports",
+                                       {"port": port, "payload": payload}, ip)
+        except Exception as e:
+            print(f"Port listener: failed to record connection from {ip}:{port}: {e}")
+
+
+def run_port_listener():
+    ports = parse_ports(os.getenv("HONEY_PORTS", "21,22,23,80,443,3306,8080"))
+    listener = PortListener(
+        ports,
+        host=os.getenv("HONEY_PORTS_HOST", "0.0.0.0"),
+        timeout=float(os.getenv("HONEY_PORTS_TIMEOUT", "5")),
+        max_connections=int(os.getenv("HONEY_PORTS_MAX_CONNECTIONS", "10000")),
+        workers=int(os.getenv("HONEY_PORTS_WORKERS", "8")),
+    )
+    try:
+        asyncio.run(listener.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    run_port_listener()
@@ -0,0 +1,234 @@
+
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+sys.path.append(os.path.abspath(os.path.dirname(__file__) + "/.."))
+
+try:
+    import asyncssh   # אופציונלי: pip install asyncssh
+except Exception:
+    asyncssh = None
+
+from model import metrics
+from model.logger import BASE_DIR
+from model.trap_manager import TrapManager
+
+
+HOST_KEY_PATH = Path(os.getenv("HONEY_SSH_HOST_KEY", str(BASE_DIR / "certs" / "ssh_host_ed25519_key")))
+SERVER_VERSION = os.getenv("HONEY_SSH_VERSION", "OpenSSH_8.9p1 Ubuntu-3ubuntu0.6")
+HOSTNAME = os.getenv("HONEY_SSH_HOSTNAME", "srv01")
+
+# תשובות מזויפות לפקודות נפוצות; כל השאר "command not found"
+FAKE_OUTPUT = {
+    "id": "uid=0(root) gid=0(root) groups=0(root)",
+    "uname": "Linux",
+    "uname -a": "Linux {host} 5.15.0-105-generic #115-Ubuntu SMP x86_64 x86_64 x86_64 GNU/Linux",
+    "pwd": "/root",
+    "ls": "",
+    "ls -la": "total 8\ndrwx------ 2 root root 4096 Jan  1 00:00 .\ndrwxr-xr-x 19 root root 4096 Jan  1 00:00 ..",
+    "hostname": "{host}",
+    "cat /etc/passwd": "root:x:0:0:root:/root:/bin/bash\ndaemon:x:1:1:daemon:/usr/sbin:/usr/sbin/nologin",
+}
+
+_CONNECTIONS = metrics.gauge("honeypot_ssh_connections_active", "Open SSH connections")
+_EVENTS = metrics.counter("honeypot_ssh_events_total", "SSH listener events by kind", ("kind",))
+
+
+def load_host_key(path: Path = HOST_KEY_PATH) -> Any:
+    """
+    מפתח השרת נטען פעם אחת בהפעלה; אם אין - נוצר (ed25519) ונשמר עם הרשאות 600,
+    כך שה-fingerprint נשאר קבוע בין הפעלות (סורקים לא מזהים honeypot לפי מפתח שמתחלף).
+    """
+    path = Path(path)
+    if path.exists():
+        return asyncssh.read_private_key(str(path))
+    key = asyncssh.generate_private_key("ssh-ed25519")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    fd = os.open(str(tmp), os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "wb") as f:
+        f.write(key.export_private_key())
+    os.replace(tmp, path)
+    return key
+
+
+def fake_output(command: str, username: str = "root") -> str:
+    cmd = " ".join(command.split())
+    if cmd == "whoami":
+        return username
+    out = FAKE_OUTPUT.get(cmd)
+    if out is None:
+        return f"-bash: {cmd.split()[0]}: command not found" if cmd else ""
+    return out.format(host=HOSTNAME)
+
+
+_Base = asyncssh.SSHServer if asyncssh is not None else object
+
+
+class _Connection(_Base):
+    """חיבור SSH אחד: מקבל כל סיסמה (אחרי שנרשמה) כדי לראות את הפקודות שאחריה."""
+
+    def __init__(self, listener: "SshListener"):
+        self.listener = listener
+        self.ip = "unknown"
+        self.counted = False
+
+    def connection_made(self, conn: Any) -> None:
+        self.ip = (conn.get_extra_info("peername") or ("unknown",))[0]
+        if self.listener.active >= self.listener.max_connections:
+            self.listener.rejected += 1
+            _EVENTS.labels("rejected").inc()
+            conn.close()
+            return
+        self.counted = True
+        self.listener.active += 1
+        self.listener.accepted += 1
+        _CONNECTIONS.inc()
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        if self.counted:
+            self.counted = False
+            self.listener.active -= 1
+            _CONNECTIONS.dec()
+
+    def begin_auth(self, username: str) -> bool:
+        return True
+
+    def password_auth_supported(self) -> bool:
+        return True
+
+    async def validate_password(self, username: str, password: str) -> bool:
+        _EVENTS.labels("login").inc()
+        await self.listener.record({"username": username, "password": password}, self.ip)
+        return True
+
+
+class SshListener:
+    """
+    שרת SSH אסינכרוני (asyncssh) על event loop אחד:
+    - מפתח שרת קבוע מהדיסק (load_host_key) שנטען פעם אחת
+    - כל ניסיון סיסמה וכל פקודה (shell או exec) עוברים ל-SshTrap דרך TrapManager,
+      ב-thread pool קטן כדי שכתיבת הלוג וה-listeners לא יעצרו את ה-loop
+    - login_timeout לאימות, idle_timeout בין פקודות ו-session_timeout לכל session
+    - max_connections חוסם חיבורים במקביל; מעבר לזה החיבור נסגר מיד
+    """
+
+    def __init__(self, manager: Optional[TrapManager] = None, host: str = "0.0.0.0", port: int = 2222,
+                 host_key: Any = None, login_timeout: float = 30.0, idle_timeout: float = 120.0,
+                 session_timeout: float = 600.0, max_connections: int = 5000, workers: int = 8):
+        if asyncssh is None:
+            raise RuntimeError("asyncssh is not installed (pip install asyncssh)")
+        self.manager = manager or TrapManager()
+        self.host = host
+        self.port = port
+        self.host_key = host_key if host_key is not None else load_host_key()
+        self.login_timeout = login_timeout
+        self.idle_timeout = idle_timeout
+        self.session_timeout = session_timeout
+        self.max_connections = max_connections
+        self.active = 0
+        self.accepted = 0
+        self.rejected = 0
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ssh-trap")
+        self._server: Any = None
+
+    async def start(self) -> int:
+        """פותח את הפורט ומחזיר אותו (שימושי עם port=0)."""
+        self._server = await asyncssh.create_server(
+            lambda: _Connection(self), self.host, self.port,
+            server_host_keys=[self.host_key],
+            server_version=SERVER_VERSION,
+            process_factory=self._session,
+            login_timeout=self.login_timeout,
+            keepalive_interval=30, keepalive_count_max=3,
+            reuse_address=True,
+        )
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        port = await self.start()
+        print(f"SSH listener running on {self.host}:{port}...")
+        await self._server.wait_closed()
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        self._pool.shutdown(wait=True)
+
+    async def record(self, input_data: Any, ip: str) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._pool, self.manager.run_trap, "ssh", input_data, ip)
+        except Exception as e:
+            print(f"SSH listener: failed to record {ip}: {e}")
+
+    async def _session(self, process: Any) -> None:
+        ip = (process.get_extra_info("peername") or ("unknown",))[0]
+        username = process.get_extra_info("username") or "root"
+        try:
+            await asyncio.wait_for(self._converse(process, ip, username), self.session_timeout)
+        except (asyncio.TimeoutError, asyncssh.Error, ConnectionError, OSError):
+            pass
+        finally:
+            process.exit(0)
+
+    async def _converse(self, process: Any, ip: str, username: str) -> None:
+        if process.command is not None:
+            # ssh host '<command>'
+            await self._run_command(process, process.command, ip, username)
+            return
+        process.stdout.write("Welcome to Ubuntu 22.04.4 LTS (GNU/Linux 5.15.0-105-generic x86_64)\r\n\r\n")
+        prompt = f"{username}@{HOSTNAME}:~# "
+        while True:
+            process.stdout.write(prompt)
+            try:
+                line = await asyncio.wait_for(process.stdin.readline(), self.idle_timeout)
+            except asyncssh.BreakReceived:
+                continue
+            except asyncssh.TerminalSizeChanged:
+                continue
+            if not line:
+                return              # EOF
+            command = line.strip()
+            if not command:
+                continue
+            if command in ("exit", "logout", "quit"):
+                await self.record(command, ip)
+                return
+            await self._run_command(process, command, ip, username)
+
+    async def _run_command(self, process: Any, command: str, ip: str, username: str) -> None:
+        _EVENTS.labels("command").inc()
+        await self.record(command, ip)
+        out = fake_output(command, username)
+        if out:
+            process.stdout.write(out.replace("\n", "\r\n") + "\r\n")
+
+
+def run_ssh_listener():
+    if asyncssh is None:
+        print("SSH listener requires asyncssh: pip install asyncssh")
+        sys.exit(1)
+    listener = SshListener(
+        host=os.getenv("HONEY_SSH_HOST", "0.0.0.0"),
+        port=int(os.getenv("HONEY_SSH_PORT", "2222")),
+        login_timeout=float(os.getenv("HONEY_SSH_LOGIN_TIMEOUT", "30")),
+        idle_timeout=float(os.getenv("HONEY_SSH_IDLE_TIMEOUT", "120")),
+        session_timeout=float(os.getenv("HONEY_SSH_SESSION_TIMEOUT", "600")),
+        max_connections=int(os.getenv("HONEY_SSH_MAX_CONNECTIONS", "5000")),
+        workers=int(os.getenv("HONEY_SSH_WORKERS", "8")),
+    )
+    try:
+        asyncio.run(listener.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    run_ssh_listener()
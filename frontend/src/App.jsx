@@ -7,6 +7,14 @@ import {
 } from "recharts";
 import { motion } from "framer-motion";
 
+// "YYYY-MM-DD HH:00" בשעון המקומי
+function hourLabel(d) {
+  return d.getFullYear() + "-" +
+    String(d.getMonth() + 1).padStart(2, "0") + "-" +
+    String(d.getDate()).padStart(2, "0") + " " +
+    String(d.getHours()).padStart(2, "0") + ":00";
+}
+
 export default function App() {
   const API = import.meta.env.VITE_API_BASE_URL;
 
@@ -57,6 +65,50 @@ export default function App() {
 
   // AbortController
   const reportAbortRef = useRef(null);
+  // latest מה-/api/events האחרון - הפולינג הבא מבקש רק delta
+  const latestRef = useRef(null);
+
+  async function fetchEventsPage(params, signal) {
+    const res = await fetch(`${API}/api/events?${new URLSearchParams(params)}`, { signal });
+    if (!res.ok) throw new Error(`Events HTTP ${res.status}`);
+    return res.json();
+  }
+
+  const toRow = (e) => [
+    e.time || "",
+    e.trap_type || "",
+    e.src_ip || "",
+    typeof e.input === "string" ? e.input : JSON.stringify(e.input ?? ""),
+  ]; // [time, trap, ip, input]
+
+  // סטטיסטיקות מצטברות מהשרת (/api/stats/*): הגרפים לא סופרים את כל האירועים בדפדפן
+  const [serverStats, setServerStats] = useState(null);
+  const selectedTrapRef = useRef("all");
+
+  async function loadStats() {
+    const getJSON = async (url) => {
+      const res = await fetch(url);
+      if (!res.ok) throw new Error(`Stats HTTP ${res.status}`);
+      return res.json();
+    };
+    try {
+      const trap = selectedTrapRef.current;
+      const tsParams = new URLSearchParams({ bucket: "hour" });
+      if (trap !== "all") tsParams.set("trap_type", trap);
+      const [top, ts] = await Promise.all([
+        getJSON(`${API}/api/stats/top?dimension=trap&limit=100`),
+        getJSON(`${API}/api/stats/timeseries?${tsParams}`),
+      ]);
+      setServerStats({
+        byTrap: top.items
+          .filter(it => trap === "all" || normalizeTrapLabel(it.key) === trap)
+          .map(it => ({ trap: it.key, count: it.count })),
+        byTime: ts.series.map(b => ({ time: hourLabel(new Date(b.time)), count: b.count })),
+      });
+    } catch {
+      setServerStats(null); // נופלים לחישוב מקומי
+    }
+  }
 
   // Report load 
   async function loadReport() {
@@ -69,30 +121,44 @@ export default function App() {
     try {
       setLoading(true);
       setError("");
-      const res = await fetch(`${API}/report`, {
-        headers: { Accept: "text/html" },
-        signal: controller.signal,
-      });
-      if (!res.ok) throw new Error(`Report HTTP ${res.status}`);
-      const htmlText = await res.text();
-
-      const parser = new DOMParser();
-      const doc = parser.parseFromString(htmlText, "text/html");
-      const rows = [];
-      const table = doc.querySelector("table");
-      const trs = table ? table.querySelectorAll("tr") : [];
-      trs.forEach((tr, i) => {
-        // Only select <td> cells (skip header)
-        const cells = Array.from(tr.querySelectorAll("td")).map(td => td.textContent.trim());
-        if (!cells.length) return;
-        rows.push(cells.slice(0, 4)); // [time, trap, ip, input]
-      });
-      setEvents(rows);
+
+      let fresh = [];
+      let full = latestRef.current === null;
+      if (!full) {
+        // delta מאז הפולינג הקודם
+        let after = latestRef.current;
+        for (;;) {
+          const data = await fetchEventsPage({ after, limit: 1000 }, controller.signal);
+          if (data.reset) { full = true; break; }
+          fresh.push(...data.events.map(toRow));
+          after = data.latest;
+          if (!data.has_more) break;
+        }
+        latestRef.current = after;
+      }
+      if (full) {
+        // טעינה ראשונה: עוברים על כל העמודים לפי cursor
+        fresh = [];
+        let cursor = null;
+        let latest = null;
+        do {
+          const params = { limit: 1000 };
+          if (cursor) params.cursor = cursor;
+          const data = await fetchEventsPage(params, controller.signal);
+          if (latest === null) latest = data.latest;
+          fresh.push(...data.events.map(toRow));
+          cursor = data.next_cursor;
+        } while (cursor);
+        latestRef.current = latest;
+        setEvents(fresh);
+      } else if (fresh.length) {
+        setEvents(prev => [...fresh, ...prev]);
+      }
       setLastUpdated(new Date());
+      loadStats();
     } catch (e) {
       if (e?.name !== "AbortError") {
         setError(" לא ניתן לטעון את הדוח (ננסה שוב).");
-        setEvents([]);
       }
     } finally {
       if (reportAbortRef.current === controller) {
@@ -109,11 +175,28 @@ export default function App() {
     return () => clearInterval(id);
   }, []);
 
+  // Live feed: כל אירוע ב-/api/stream מושך delta מיד (במקום לחכות לפולינג)
+  useEffect(() => {
+    if (typeof EventSource === "undefined") return;
+    const es = new EventSource(`${API}/api/stream`);
+    let t = null;
+    es.addEventListener("trap", () => {
+      if (t) return;
+      t = setTimeout(() => { t = null; loadReport(); }, 250);
+    });
+    return () => { es.close(); if (t) clearTimeout(t); };
+  }, []);
+
   // כשמשנים חיפוש/מסנן/מיון – חוזרים לעמוד 1
   useEffect(() => {
     setPage(1);
   }, [selectedTrap, debouncedQuery, sortDir]);
 
+  useEffect(() => {
+    selectedTrapRef.current = selectedTrap;
+    loadStats();
+  }, [selectedTrap]);
+
   // נירמול שמות טראפים
   const normalizeTrapLabel = (t = "") =>
     String(t)
@@ -172,8 +255,9 @@ export default function App() {
     return filteredEvents.slice(start, start + pageSize);
   }, [filteredEvents, page, pageSize]);
 
-  // Charts data
+  // Charts data (בלי חיפוש טקסט - מהמונים בשרת)
   const byTrap = useMemo(() => {
+    if (serverStats && !debouncedQuery) return serverStats.byTrap;
     const counts = {};
     const labels = new Set();
     for (const row of filteredEvents) {
@@ -187,23 +271,21 @@ export default function App() {
     return Array.from(labels)
       .map(norm => ({ trap: trapDisplay.get(norm) || norm, count: counts[norm] || 0 }))
       .sort((a, b) => b.count - a.count);
-  }, [filteredEvents, trapDisplay]);
+  }, [filteredEvents, trapDisplay, serverStats, debouncedQuery]);
 
   const byTime = useMemo(() => {
+    if (serverStats && !debouncedQuery) return serverStats.byTime;
     const buckets = {};
     for (const row of filteredEvents) {
       const ts = row[0];
       if (!ts) continue;
       const d = new Date(ts); if (isNaN(d)) continue;
-      const label = d.getFullYear() + "-" +
-        String(d.getMonth() + 1).padStart(2, "0") + "-" +
-        String(d.getDate()).padStart(2, "0") + " " +
-        String(d.getHours()).padStart(2, "0") + ":00";
+      const label = hourLabel(d);
       buckets[label] = (buckets[label] || 0) + 1;
     }
     return Object.entries(buckets).map(([time, count]) => ({ time, count }))
       .sort((a, b) => (a.time < b.time ? -1 : 1));
-  }, [filteredEvents]);
+  }, [filteredEvents, serverStats, debouncedQuery]);
 
   
   function normalizeTrap(t = "") {
@@ -265,22 +347,27 @@ export default function App() {
     return Array.from(map.values());
   }, [filteredEvents]);
 
-  // GeoIP resolve
+  // GeoIP resolve (קריאת batch אחת לכל ה-IPs)
   async function resolveGeoIP() {
     if (ipAgg.length === 0) return;
     const results = [];
-    for (const row of ipAgg) {
-      try {
-        const url = `${API}/geoip?ip=${encodeURIComponent(row.ip)}`;
-        const res = await fetch(url);
-        const data = await res.json();
-        if (res.ok) {
-          const loc = [data.city, data.region, data.country].filter(Boolean).join(", ");
-          const coords = (data.latitude && data.longitude) ? `${data.latitude}, ${data.longitude}` : "—";
-          results.push({ ip: row.ip, location: loc || "—", org: data.org || "—", coords });
+    try {
+      const res = await fetch(`${API}/geoip/batch`, {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({ ips: ipAgg.map(row => row.ip) }),
+      });
+      const data = await res.json();
+      if (res.ok) {
+        for (const row of ipAgg) {
+          const geo = data.results?.[row.ip];
+          if (!geo) continue;
+          const loc = [geo.city, geo.region, geo.country].filter(Boolean).join(", ");
+          const coords = (geo.latitude && geo.longitude) ? `${geo.latitude}, ${geo.longitude}` : "—";
+          results.push({ ip: row.ip, location: loc || "—", org: geo.org || "—", coords });
         }
-      } catch { /* ignore single fails */ }
-    }
+      }
+    } catch { /* ignore */ }
     setGeoFlag(true);
     setGeoRows(results);
   }
@@ -1,4 +1,5 @@
 from .trap import Trap
+from .logger import LOG_DIR, write_line
 import json
 
 class AdminPanelTrap(Trap):
@@ -11,7 +12,6 @@ class AdminPanelTrap(Trap):
     def simulate_interaction(self, input_data: dict, ip: str) -> dict:
         from datetime import datetime
         from .auth_manager import check_credentials
-        import os
 
         username = input_data.get("username", "")
         password = input_data.get("password", "")
@@ -26,12 +26,9 @@ class AdminPanelTrap(Trap):
             "username": username,
             "success": success
         }
-        log_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'logs')
-        os.makedirs(log_dir, exist_ok=True)
-        log_path = os.path.join(log_dir, 'admin_panel.log')
+        log_path = LOG_DIR / 'admin_panel.log'
         try:
-            with open(log_path, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(log_entry) + "\n")
+            write_line(log_path, json.dumps(log_entry) + "\n")
             print(f"Log entry written to {log_path}: {log_entry}")
         except Exception as e:
             print(f"Failed to write log entry: {e}")
@@ -0,0 +1,108 @@
+
+from __future__ import annotations
+import os
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+
+class Subscription:
+    """
+    מנוי לפיד האירועים:
+    - באפר חסום (maxsize); כשהוא מלא נזרק האירוע הישן ביותר (drop-oldest)
+    - dropped סופר כמה אירועים נזרקו לצרכן איטי
+    """
+
+    def __init__(self, bus: "EventBus", maxsize: int = 256):
+        self._bus = bus
+        self._buf: Deque[Dict[str, Any]] = deque(maxlen=max(1, int(maxsize)))
+        self._cond = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """האירוע הבא, או None אם עבר timeout / המנוי נסגר."""
+        with self._cond:
+            if not self._buf and not self.closed:
+                self._cond.wait(timeout)
+            if self._buf:
+                return self._buf.popleft()
+            return None
+
+    def close(self) -> None:
+        self._bus.unsubscribe(self)
+
+    def _push(self, event: Dict[str, Any]) -> None:
+        with self._cond:
+            if len(self._buf) == self._buf.maxlen:
+                self.dropped += 1
+            self._buf.append(event)
+            self._cond.notify()
+
+    def _close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+
+class EventBus:
+    """
+    pub/sub בתוך התהליך לתוצאות של TrapManager.run_trap.
+    - subscribe(): מנוי עם באפר משלו (ל-SSE וכו')
+    - add_listener(): callback סינכרוני שנקרא על כל אירוע (לצבירות פנימיות)
+    publish לעולם לא חוסם על צרכן איטי.
+    """
+
+    def __init__(self, max_subscribers: int = 100):
+        self.max_subscribers = max_subscribers
+        self._subs: List[Subscription] = []
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self, maxsize: int = 256) -> Subscription:
+        with self._lock:
+            if len(self._subs) >= self.max_subscribers:
+                raise RuntimeError("too many subscribers")
+            sub = Subscription(self, maxsize)
+            self._subs = self._subs + [sub]
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        with self._lock:
+            self._subs = [s for s in self._subs if s is not sub]
+        sub._close()
+
+    def add_listener(self, fn: Callable[[Dict[str, Any]], None]) -> None:
+        with self._lock:
+            self._listeners = self._listeners + [fn]
+
+    def remove_listener(self, fn: Callable[[Dict[str, Any]], None]) -> None:
+        with self._lock:
+            self._listeners = [f for f in self._listeners if f is not fn]
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        # העתקים של הרשימות מתחלפים תחת lock, כך שאפשר לעבור עליהם בלי lock
+        for fn in self._listeners:
+            try:
+                fn(event)
+            except Exception as e:
+                print(f"Event listener failed: {e}")
+        for sub in self._subs:
+            sub._push(event)
+
+    def subscriber_count(self) -> int:
+        return len(self._subs)
+
+
+# bus משותף לתהליך
+bus = EventBus(max_subscribers=int(os.getenv("HONEY_STREAM_MAX_SUBSCRIBERS", "100")))
+
+
+def publish(event: Dict[str, Any]) -> None:
+    bus.publish(event)
@@ -0,0 +1,402 @@
+
+from __future__ import annotations
+import os
+import json
+import mmap
+import time
+import atexit
+import struct
+import ipaddress
+import threading
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from .logger import LOG_DIR, _to_json_string
+
+
+STORE_DIR = Path(os.getenv("HONEY_STORE_DIR", str(LOG_DIR / "store")))
+STORE_ENABLED = os.getenv("HONEY_EVENT_STORE", "1").strip().lower() not in ("0", "false", "no", "off")
+
+# עמודות בכל segment (קובץ לכל עמודה, append-only):
+#   .ts     int64   מיקרו-שניות מאז epoch
+#   .trap   uint16  מזהה במילון trap_type
+#   .proto  uint16  מזהה במילון protocol
+#   .ip     16 בתים IPv6 (IPv4 נשמר כ-IPv4-mapped; אפסים = לא ידוע)
+#   .inp    uint32 אורך + בתים (utf-8)
+#   .dict.json  המילונים של ה-segment
+COLUMNS = ("ts", "trap", "proto", "ip", "inp")
+_LEN = struct.Struct("<I")
+_NO_IP = bytes(16)
+
+
+def pack_ip(ip: Optional[str]) -> bytes:
+    try:
+        addr = ipaddress.ip_address((ip or "").strip())
+    except ValueError:
+        return _NO_IP
+    if addr.version == 4:
+        return ipaddress.IPv6Address("::ffff:" + str(addr)).packed
+    return addr.packed
+
+
+def unpack_ip(raw: bytes) -> str:
+    if raw == _NO_IP:
+        return "unknown"
+    addr = ipaddress.IPv6Address(raw)
+    return str(addr.ipv4_mapped or addr)
+
+
+class EventStore:
+    """
+    כותב segments עמודתיים append-only:
+    - כל תהליך כותב ל-segment משלו (seg-<ms>-<pid>), כך שאין התנגשות בין תהליכים
+    - השורות נצברות בזיכרון ונכתבות באצוות (batch_rows / flush_interval)
+    - segment מתגלגל אחרי segment_rows שורות
+    """
+
+    def __init__(self, root: Path = STORE_DIR, segment_rows: int = 1_000_000,
+                 batch_rows: int = 256, flush_interval: float = 1.0):
+        self.root = Path(root)
+        self.segment_rows = segment_rows
+        self.batch_rows = batch_rows
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._files: Dict[str, Any] = {}
+        self._sizes: Dict[str, int] = {}
+        self._prefix: Optional[Path] = None
+        self._last_ms = 0
+        self._dicts: Dict[str, List[str]] = {"trap": [], "proto": []}
+        self._ids: Dict[str, Dict[str, int]] = {"trap": {}, "proto": {}}
+        self._dict_dirty = False
+        self._rows = 0
+        self._buf_ts = array("q")
+        self._buf_trap = array("H")
+        self._buf_proto = array("H")
+        self._buf_ip = bytearray()
+        self._buf_inp = bytearray()
+        self._timer: Optional[threading.Thread] = None
+        self._closed = False
+
+    def append(self, trap_type: str, protocol: str, ip: Optional[str], input_data: Any,
+               ts_us: Optional[int] = None) -> None:
+        data = _to_json_string(input_data).encode("utf-8", errors="replace")
+        with self._lock:
+            if self._closed:
+                return
+            self._buf_ts.append(ts_us if ts_us is not None else time.time_ns() // 1000)
+            self._buf_trap.append(self._id("trap", str(trap_type or "")))
+            self._buf_proto.append(self._id("proto", str(protocol or "")))
+            self._buf_ip += pack_ip(ip)
+            self._buf_inp += _LEN.pack(len(data)) + data
+            if len(self._buf_ts) >= self.batch_rows:
+                self._flush_locked()
+        self._ensure_timer()
+
+    def append_event(self, event: Dict[str, Any]) -> None:
+        """listener ל-event_bus: מעטפת אחידה של TrapManager."""
+        self.append(
+            event.get("trap_type") or event.get("trap") or "",
+            event.get("protocol") or "",
+            event.get("ip"),
+            event.get("input", ""),
+        )
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_locked()
+            self._closed = True
+            for f in self._files.values():
+                f.close()
+            self._files = {}
+
+    #  פנימי
+
+    def _id(self, kind: str, name: str) -> int:
+        ids = self._ids[kind]
+        i = ids.get(name)
+        if i is None:
+            i = ids[name] = len(self._dicts[kind])
+            self._dicts[kind].append(name)
+            self._dict_dirty = True
+        return i
+
+    def _open_segment(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        # שני segments באותה מילי-שנייה היו מקבלים אותו שם וממשיכים זה את זה
+        self._last_ms = max(int(time.time() * 1000), self._last_ms + 1)
+        self._prefix = self.root / f"seg-{self._last_ms:013d}-{os.getpid()}"
+        self._files = {c: open(f"{self._prefix}.{c}", "ab") for c in COLUMNS}
+        self._sizes = {c: 0 for c in COLUMNS}
+        self._rows = 0
+        self._dict_dirty = True
+
+    def _flush_locked(self) -> None:
+        n = len(self._buf_ts)
+        if not n:
+            return
+        if self._prefix is None or self._rows >= self.segment_rows:
+            self._roll()
+        if self._dict_dirty:
+            # המילון נכתב לפני השורות שמפנות אליו
+            tmp = f"{self._prefix}.dict.json.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._dicts, f)
+            os.replace(tmp, f"{self._prefix}.dict.json")
+            self._dict_dirty = False
+        chunks = {
+            "ts": self._buf_ts.tobytes(),
+            "trap": self._buf_trap.tobytes(),
+            "proto": self._buf_proto.tobytes(),
+            "ip": bytes(self._buf_ip),
+            "inp": bytes(self._buf_inp),
+        }
+        try:
+            for c in COLUMNS:
+                self._files[c].write(chunks[c])
+            for f in self._files.values():
+                f.flush()
+        except OSError as e:
+            print(f"Failed to write event store segment {self._prefix}: {e} ({n} events dropped)")
+            self._abandon_segment()
+        else:
+            for c in COLUMNS:
+                self._sizes[c] += len(chunks[c])
+            self._rows += n
+        self._buf_ts = array("q")
+        self._buf_trap = array("H")
+        self._buf_proto = array("H")
+        self._buf_ip = bytearray()
+        self._buf_inp = bytearray()
+
+    def _abandon_segment(self) -> None:
+        """
+        כתיבה שנכשלה באמצע משאירה עמודות באורכים שונים: חותכים כל עמודה חזרה לאורך
+        האחרון שנכתב במלואו, וה-flush הבא פותח segment חדש.
+        """
+        for f in self._files.values():
+            try:
+                f.close()    # close מנסה לכתוב את שארית הבאפר - נחתך מיד אחרי
+            except OSError:
+                pass
+        for c, size in self._sizes.items():
+            try:
+                os.truncate(f"{self._prefix}.{c}", size)
+            except OSError:
+                pass
+        self._files = {}
+        self._rows = self.segment_rows
+
+    def _roll(self) -> None:
+        for f in self._files.values():
+            f.close()
+        if self._prefix is not None:
+            # segment חדש מתחיל עם מילון משלו - ממפים מחדש את מה שבבאפר
+            old = self._dicts
+            self._dicts = {"trap": [], "proto": []}
+            self._ids = {"trap": {}, "proto": {}}
+            self._buf_trap = array("H", (self._id("trap", old["trap"][i]) for i in self._buf_trap))
+            self._buf_proto = array("H", (self._id("proto", old["proto"][i]) for i in self._buf_proto))
+        self._open_segment()
+
+    def _ensure_timer(self) -> None:
+        if self._timer is not None and self._timer.is_alive():
+            return
+        with self._lock:
+            if self._timer is None or not self._timer.is_alive():
+                self._timer = threading.Thread(target=self._tick, name="honeypot-event-store", daemon=True)
+                self._timer.start()
+
+    def _tick(self) -> None:
+        while not self._closed:
+            time.sleep(self.flush_interval)
+            self.flush()
+
+
+class StoreReader:
+    """
+    קורא segments עם mmap וסורק עמודות:
+    סינון זמן/מלכודת/IP נעשה על העמודות הקבועות, ורק שורות שעברו את הסינון
+    מפענחות את ה-input. אין פענוח JSON/CSV לשורה.
+    """
+
+    def __init__(self, root: Path = STORE_DIR):
+        self.root = Path(root)
+
+    def segments(self) -> List[Path]:
+        return sorted(Path(str(p)[: -len(".dict.json")]) for p in self.root.glob("seg-*.dict.json"))
+
+    def scan(self, since_us: Optional[int] = None, until_us: Optional[int] = None,
+             trap_types: Optional[Set[str]] = None, ip: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        want_ip = pack_ip(ip) if ip else None
+        for prefix in self.segments():
+            yield from self._scan_segment(prefix, since_us, until_us, trap_types, want_ip)
+
+    def count_by_trap(self, since_us: Optional[int] = None, until_us: Optional[int] = None) -> Dict[str, int]:
+        """צבירה על עמודות בלבד (בלי לגעת ב-input)."""
+        counts: Dict[str, int] = {}
+        for prefix in self.segments():
+            with _Segment(prefix) as seg:
+                for i in range(seg.rows):
+                    t = seg.ts[i]
+                    if (since_us is not None and t < since_us) or (until_us is not None and t > until_us):
+                        continue
+                    name = seg.traps[seg.trap[i]]
+                    counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    def _scan_segment(self, prefix: Path, since_us, until_us, trap_types, want_ip) -> Iterator[Dict[str, Any]]:
+        with _Segment(prefix) as seg:
+            if not seg.rows:
+                return
+            wanted_ids = None
+            if trap_types:
+                wanted_ids = {i for i, name in enumerate(seg.traps) if name in trap_types}
+                if not wanted_ids:
+                    return
+            # השורות מוחזרות אחת-אחת כשה-mmap עדיין פתוח (זיכרון קבוע גם ל-segment של מיליון שורות);
+            # כל שדה מועתק ל-str/int, ו-with סוגר את ה-mmap גם כשהצרכן עוצר באמצע (GeneratorExit)
+            pos = 0
+            inp = seg.inp
+            for i in range(seg.rows):
+                length = _LEN.unpack_from(inp, pos)[0]
+                start = pos + 4
+                pos = start + length
+                t = seg.ts[i]
+                if since_us is not None and t < since_us:
+                    continue
+                if until_us is not None and t > until_us:
+                    continue
+                if wanted_ids is not None and seg.trap[i] not in wanted_ids:
+                    continue
+                ip_raw = seg.ip[i * 16:(i + 1) * 16]
+                if want_ip is not None and ip_raw != want_ip:
+                    continue
+                yield {
+                    "ts_us": t,
+                    "trap_type": seg.traps[seg.trap[i]],
+                    "protocol": seg.protos[seg.proto[i]],
+                    "ip": unpack_ip(ip_raw),
+                    "input": inp[start:pos].decode("utf-8", errors="replace"),
+                }
+
+
+class _Segment:
+    """mmap לעמודות של segment אחד; rows = המינימום בין העמודות (כתיבה חלקית נחתכת)."""
+
+    def __init__(self, prefix: Path):
+        self.prefix = prefix
+        self._maps: List[mmap.mmap] = []
+        self._views: List[memoryview] = []
+        self.traps: List[str] = []
+        self.protos: List[str] = []
+
+    def __enter__(self) -> "_Segment":
+        self.ts = self._map("ts", "q")
+        self.trap = self._map("trap", "H")
+        self.proto = self._map("proto", "H")
+        self.ip = self._map("ip", None)
+        self.inp = self._map("inp", None)
+        # המילון נקרא אחרי ה-mmap: הכותב מעדכן אותו לפני השורות, כך שהוא מכסה כל שורה ממופה
+        with open(f"{self.prefix}.dict.json", "r", encoding="utf-8") as f:
+            d = json.load(f)
+        self.traps = d.get("trap", [])
+        self.protos = d.get("proto", [])
+        self.rows = min(len(self.ts), len(self.trap), len(self.proto), len(self.ip) // 16)
+        # לא לקרוא שורה שה-input שלה עוד לא נכתב עד הסוף
+        self.rows = min(self.rows, self._complete_inputs(self.rows))
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        for v in reversed(self._views):
+            v.release()
+        for m in self._maps:
+            m.close()
+
+    def _map(self, column: str, fmt: Optional[str]) -> Any:
+        """עמודה קבועה -> memoryview מסוג fmt; עמודת בתים -> ה-mmap עצמו (slice מחזיר bytes)."""
+        empty = memoryview(b"").cast(fmt) if fmt else b""
+        try:
+            with open(f"{self.prefix}.{column}", "rb") as f:
+                size = os.fstat(f.fileno()).st_size
+                if fmt:
+                    size -= size % struct.calcsize(fmt)
+                if size <= 0:
+                    return empty
+                m = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+        except FileNotFoundError:
+            return empty
+        self._maps.append(m)
+        if not fmt:
+            return m
+        v = memoryview(m)
+        self._views.append(v)
+        v = v.cast(fmt)
+        self._views.append(v)
+        return v
+
+    def _complete_inputs(self, rows: int) -> int:
+        pos, n, size = 0, 0, len(self.inp)
+        while n < rows and pos + 4 <= size:
+            pos += 4 + _LEN.unpack_from(self.inp, pos)[0]
+            if pos > size:
+                break
+            n += 1
+        return n
+
+
+#  store משותף לתהליך
+
+_store: Optional[EventStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> EventStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = EventStore()
+    return _store
+
+
+def attach(bus: Any) -> bool:
+    """רושם את ה-store כ-listener על ה-event_bus (פעם אחת). מחזיר False אם כבוי."""
+    if not STORE_ENABLED:
+        return False
+    if _on_event not in getattr(bus, "_listeners", []):
+        bus.add_listener(_on_event)
+    return True
+
+
+def _on_event(event: Dict[str, Any]) -> None:
+    # נפתר בכל קריאה כדי שאחרי fork ה-child יכתוב ל-segment משלו
+    get_store().append_event(event)
+
+
+def flush() -> None:
+    if _store is not None:
+        _store.flush()
+
+
+def close() -> None:
+    global _store
+    with _store_lock:
+        old, _store = _store, None
+    if old is not None:
+        old.close()
+
+
+def _reset_after_fork() -> None:
+    global _store, _store_lock
+    _store = None
+    _store_lock = threading.Lock()
+
+
+atexit.register(close)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
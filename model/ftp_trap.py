@@ -1,8 +1,8 @@
 from __future__ import annotations
 from datetime import datetime, UTC
-from pathlib import Path
 import time
 from .trap import Trap
+from .logger import write_line
 
 class FTPTrap(Trap):
     def __init__(self):
@@ -24,7 +24,8 @@ class FTPTrap(Trap):
             command = str(input_data)
 
         # Logging
-        self._append_log_line(self._format_log(command, ip))
+        # USER/PASS בשורה אחת, כדי שכל אירוע יישאר שורת CSV אחת
+        self._append_log_line(self._format_log(command.replace("\n", " "), ip))
 
         # Example FTP responses
         if command.upper().startswith("USER"):
@@ -59,7 +60,4 @@ class FTPTrap(Trap):
         return f'{ts},ftp,{ip},"{command}"\n'
 
     def _append_log_line(self, line: str) -> None:
-        logs_dir = Path(__file__).resolve().parents[1] / "logs"
-        logs_dir.mkdir(parents=True, exist_ok=True)
-        with (logs_dir / "ftp_honeypot.log").open("a", encoding="utf-8") as f:
-            f.write(line)
+        write_line("ftp_honeypot.log", line)
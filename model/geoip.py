@@ -0,0 +1,173 @@
+
+from __future__ import annotations
+import os
+import csv
+import bisect
+import ipaddress
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import maxminddb   # אופציונלי: תמיכה בקבצי .mmdb
+except Exception:
+    maxminddb = None
+
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+GEOIP_DB = Path(os.getenv("HONEY_GEOIP_DB", str(BASE_DIR / "data" / "geoip.csv")))
+GEOIP_CACHE_SIZE = int(os.getenv("HONEY_GEOIP_CACHE", "65536"))
+
+FIELDS = ("city", "region", "country", "latitude", "longitude", "org")
+
+
+class _RangeTable:
+    """טבלת טווחים ממוינת: starts/ends/records במערכים מקבילים, חיפוש בינארי."""
+
+    def __init__(self):
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        self.records: List[Dict] = []
+
+    def build(self, rows: List[Tuple[int, int, Dict]]) -> None:
+        rows.sort(key=lambda r: r[0])
+        self.starts = [r[0] for r in rows]
+        self.ends = [r[1] for r in rows]
+        self.records = [r[2] for r in rows]
+
+    def find(self, value: int) -> Optional[Dict]:
+        i = bisect.bisect_right(self.starts, value) - 1
+        if i >= 0 and value <= self.ends[i]:
+            return self.records[i]
+        return None
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+class GeoIPEngine:
+    """
+    GeoIP/ASN מקומי (בלי רשת):
+    - טוען קובץ CSV של טווחי CIDR (עמודת network) או start/end,
+      או קובץ .mmdb אם החבילה maxminddb מותקנת
+    - IPv4 ו-IPv6 בטבלאות נפרדות, lookup ב-O(log n)
+    - LRU cache לפני החיפוש
+    """
+
+    def __init__(self, path: Optional[Path] = None, cache_size: int = GEOIP_CACHE_SIZE):
+        self.path = Path(path) if path else GEOIP_DB
+        self._v4 = _RangeTable()
+        self._v6 = _RangeTable()
+        self._mmdb = None
+        self._lock = threading.Lock()
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+        self.load()
+
+    def load(self) -> int:
+        """טוען (מחדש) את בסיס הנתונים. מחזיר את מספר הטווחים."""
+        with self._lock:
+            v4: List[Tuple[int, int, Dict]] = []
+            v6: List[Tuple[int, int, Dict]] = []
+            mmdb = None
+            if self.path.suffix == ".mmdb":
+                if maxminddb is None:
+                    raise RuntimeError("maxminddb is required for .mmdb databases")
+                if self.path.exists():
+                    mmdb = maxminddb.open_database(str(self.path))
+            elif self.path.exists():
+                with open(self.path, "r", encoding="utf-8", newline="") as f:
+                    for row in csv.DictReader(f):
+                        parsed = _parse_row(row)
+                        if parsed is None:
+                            continue
+                        version, start, end, record = parsed
+                        (v4 if version == 4 else v6).append((start, end, record))
+            self._v4.build(v4)
+            self._v6.build(v6)
+            if self._mmdb is not None:
+                self._mmdb.close()
+            self._mmdb = mmdb
+            self.lookup.cache_clear()
+            return len(v4) + len(v6)
+
+    def lookup_many(self, ips: List[str]) -> Dict[str, Optional[Dict]]:
+        return {ip: self.lookup(ip) for ip in ips}
+
+    def size(self) -> int:
+        return len(self._v4) + len(self._v6)
+
+    def _lookup(self, ip: str) -> Optional[Dict]:
+        try:
+            addr = ipaddress.ip_address(ip.strip())
+        except ValueError:
+            return None
+        if self._mmdb is not None:
+            rec = self._mmdb.get(str(addr))
+            return _from_mmdb(str(addr), rec) if rec else None
+        table = self._v4 if addr.version == 4 else self._v6
+        record = table.find(int(addr))
+        if record is None:
+            return None
+        return {"ip": str(addr), **record}
+
+
+def _parse_row(row: Dict[str, str]) -> Optional[Tuple[int, int, int, Dict]]:
+    try:
+        if row.get("network"):
+            net = ipaddress.ip_network(row["network"].strip(), strict=False)
+            version, start, end = net.version, int(net.network_address), int(net.broadcast_address)
+        else:
+            first = _to_addr(row["start"])
+            last = _to_addr(row["end"])
+            version, start, end = first.version, int(first), int(last)
+    except (KeyError, ValueError):
+        return None
+    record = {k: (row.get(k) or None) for k in FIELDS}
+    for k in ("latitude", "longitude"):
+        if record[k] is not None:
+            try:
+                record[k] = float(record[k])
+            except ValueError:
+                record[k] = None
+    if not record["org"] and row.get("asn"):
+        record["org"] = row["asn"]
+    return version, start, end, record
+
+
+def _to_addr(value: str):
+    value = value.strip()
+    if value.isdigit():
+        return ipaddress.ip_address(int(value))
+    return ipaddress.ip_address(value)
+
+
+def _from_mmdb(ip: str, rec: Dict) -> Dict:
+    def name(key: str) -> Optional[str]:
+        names = (rec.get(key) or {}).get("names") or {}
+        return names.get("en")
+    subdivisions = rec.get("subdivisions") or [{}]
+    location = rec.get("location") or {}
+    return {
+        "ip": ip,
+        "city": name("city"),
+        "region": ((subdivisions[0].get("names") or {}).get("en")),
+        "country": name("country"),
+        "latitude": location.get("latitude"),
+        "longitude": location.get("longitude"),
+        "org": rec.get("autonomous_system_organization") or rec.get("organization"),
+    }
+
+
+_engine: Optional[GeoIPEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> GeoIPEngine:
+    """מנוע משותף לתהליך (נטען בפעם הראשונה)."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = GeoIPEngine()
+    return _engine
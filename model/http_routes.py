@@ -0,0 +1,281 @@
+from __future__ import annotations
+import os
+import re
+import json
+import time
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from string import Template
+from typing import Any, Dict, List, Optional, Tuple
+
+from .logger import BASE_DIR
+
+
+ROUTES_FILE = Path(os.getenv("HONEY_HTTP_ROUTES", str(BASE_DIR / "data" / "http_routes.json")))
+# כל כמה שניות לכל היותר בודקים את ה-mtime של קובץ ה-routes
+ROUTES_CHECK_SECONDS = float(os.getenv("HONEY_HTTP_ROUTES_CHECK", "1"))
+
+ANY_METHOD = "*"
+_PARAM = re.compile(r"^\{(?P<name>[A-Za-z_][A-Za-z0-9_]*)(?::(?P<regex>.+))?\}$")
+
+# כשאין קובץ routes: אותן שלוש תשובות שהיו מובנות ב-HTTPTrap
+DEFAULT_ROUTES: Dict[str, Any] = {
+    "not_found": {"status": 404, "body": "<h1>404</h1>"},
+    "routes": [
+        {"path": "/", "GET": "<h1>Welcome</h1><p>Internal Admin Portal</p>"},
+        {"path": "/login",
+         "GET": "<form method='POST'><input name='user'><input type='password' name='pass'><button>Sign in</button></form>",
+         "POST": "Invalid credentials"},
+        {"path": "/api/health", "GET": '{"status":"ok","version":"1.0.0"}'},
+    ],
+}
+
+
+class RouteError(ValueError):
+    pass
+
+
+@dataclass
+class Response:
+    """תשובה מקומפלת: status, headers ו-body כ-string.Template ($path, $method, $ip, $query ופרמטרים)."""
+
+    status: int = 200
+    body: Template = field(default_factory=lambda: Template(""))
+    headers: Tuple[Tuple[str, Template], ...] = ()
+    content_type: Optional[str] = None
+
+    @classmethod
+    def parse(cls, spec: Any) -> "Response":
+        if isinstance(spec, str):
+            return cls(body=Template(spec))
+        if not isinstance(spec, dict):
+            raise RouteError(f"response must be a string or an object, got {type(spec).__name__}")
+        return cls(
+            status=int(spec.get("status", 200)),
+            body=Template(str(spec.get("body", ""))),
+            headers=tuple((str(k), Template(str(v))) for k, v in (spec.get("headers") or {}).items()),
+            content_type=spec.get("content_type"),
+        )
+
+    def render(self, ctx: Dict[str, str]) -> Tuple[int, Dict[str, str], str]:
+        headers = {k: v.safe_substitute(ctx) for k, v in self.headers}
+        return self.status, headers, self.body.safe_substitute(ctx)
+
+
+@dataclass
+class Route:
+    pattern: str
+    methods: Dict[str, Response]
+
+    def response_for(self, method: str) -> Optional[Response]:
+        resp = self.methods.get(method)
+        if resp is None and method == "HEAD":
+            resp = self.methods.get("GET")
+        if resp is None:
+            resp = self.methods.get(ANY_METHOD)
+        return resp
+
+
+class _Node:
+    __slots__ = ("children", "params", "route", "wildcard")
+
+    def __init__(self):
+        self.children: Dict[str, _Node] = {}
+        self.params: List[Tuple[str, Optional[str], Optional["re.Pattern[str]"], _Node]] = []
+        self.route: Optional[Route] = None       # הנתיב מסתיים בצומת הזה
+        self.wildcard: Optional[Route] = None    # '*' - כל ההמשך (גם ריק)
+
+
+@dataclass
+class Resolved:
+    status: int
+    headers: Dict[str, str]
+    body: str
+    content_type: Optional[str]
+    route: Optional[str]
+    params: Dict[str, str]
+
+
+def split_path(path: str) -> List[str]:
+    return [s for s in path.split("/") if s]
+
+
+class RouteTable:
+    """
+    טבלת routes כ-trie לפי segments של הנתיב:
+    - segment מילולי ('wp-admin'), פרמטר ('{id}' או '{file:.*\\.php}' עם regex על segment אחד),
+      ו-'*' בסוף התבנית שתופס את כל ההמשך (זמין בתבנית כ-$rest)
+    - עדיפות: מילולי > פרמטר (לפי סדר הקובץ) > '*'
+    - match עובר segment אחד בכל רמה, כך שהזמן תלוי באורך הנתיב ולא בגודל הטבלה
+    """
+
+    def __init__(self, not_found: Any = None):
+        self.root = _Node()
+        self.not_found = Response.parse(not_found if not_found is not None else {"status": 404, "body": "<h1>404</h1>"})
+        self.size = 0
+
+    @classmethod
+    def from_spec(cls, spec: Dict[str, Any]) -> "RouteTable":
+        if not isinstance(spec, dict) or not isinstance(spec.get("routes"), list):
+            raise RouteError("route file must be an object with a 'routes' list")
+        table = cls(spec.get("not_found"))
+        for i, entry in enumerate(spec["routes"]):
+            if not isinstance(entry, dict) or "path" not in entry:
+                raise RouteError(f"route #{i} has no 'path'")
+            methods = {k.upper(): Response.parse(v) for k, v in entry.items() if k != "path"}
+            if not methods:
+                raise RouteError(f"route #{i} ({entry['path']}) has no responses")
+            paths = entry["path"] if isinstance(entry["path"], list) else [entry["path"]]
+            for p in paths:
+                table.add(str(p), methods)
+        return table
+
+    @classmethod
+    def from_file(cls, path: Path) -> "RouteTable":
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_spec(json.load(f))
+
+    def add(self, pattern: str, methods: Dict[str, Response]) -> None:
+        node = self.root
+        segs = split_path(pattern)
+        for i, seg in enumerate(segs):
+            if seg == "*":
+                if i != len(segs) - 1:
+                    raise RouteError(f"'*' must be the last segment: {pattern}")
+                node.wildcard = self._merge(node.wildcard, pattern, methods)
+                self.size += 1
+                return
+            m = _PARAM.match(seg)
+            if m is None:
+                node = node.children.setdefault(seg, _Node())
+                continue
+            name, regex = m.group("name"), m.group("regex")
+            for pname, pregex, _, child in node.params:
+                if pname == name and pregex == regex:
+                    node = child
+                    break
+            else:
+                try:
+                    compiled = re.compile(regex) if regex else None
+                except re.error as e:
+                    raise RouteError(f"bad regex in {pattern}: {e}") from None
+                child = _Node()
+                node.params.append((name, regex, compiled, child))
+                node = child
+        node.route = self._merge(node.route, pattern, methods)
+        self.size += 1
+
+    @staticmethod
+    def _merge(existing: Optional[Route], pattern: str, methods: Dict[str, Response]) -> Route:
+        if existing is None:
+            return Route(pattern, dict(methods))
+        existing.methods.update(methods)
+        return existing
+
+    def match(self, path: str) -> Optional[Tuple[Route, Dict[str, str]]]:
+        params: Dict[str, str] = {}
+        route = self._walk(self.root, split_path(path.split("?", 1)[0]), 0, params)
+        return (route, params) if route is not None else None
+
+    def _walk(self, node: _Node, segs: List[str], i: int, params: Dict[str, str]) -> Optional[Route]:
+        if i == len(segs):
+            if node.route is not None:
+                return node.route
+            if node.wildcard is not None:
+                params["rest"] = ""
+                return node.wildcard
+            return None
+        seg = segs[i]
+        child = node.children.get(seg)
+        if child is not None:
+            found = self._walk(child, segs, i + 1, params)
+            if found is not None:
+                return found
+        for name, _, regex, child in node.params:
+            if regex is None or regex.fullmatch(seg):
+                params[name] = seg
+                found = self._walk(child, segs, i + 1, params)
+                if found is not None:
+                    return found
+                params.pop(name, None)
+        if node.wildcard is not None:
+            params["rest"] = "/".join(segs[i:])
+            return node.wildcard
+        return None
+
+    def resolve(self, method: str, path: str, ip: str = "", body: str = "") -> Resolved:
+        """status/headers/body לבקשה; 404 כשאין נתיב, 405 (עם Allow) כשהנתיב קיים אבל לא ה-method."""
+        path_only, _, query = path.partition("?")
+        ctx = {"method": method, "path": path_only, "query": query, "ip": ip, "body": body}
+        found = self.match(path_only)
+        if found is None:
+            status, headers, text = self.not_found.render(ctx)
+            return Resolved(status, headers, text, self.not_found.content_type, None, {})
+        route, params = found
+        ctx.update(params)
+        resp = route.response_for(method)
+        if resp is None:
+            allow = sorted(m for m in route.methods if m != ANY_METHOD)
+            return Resolved(405, {"Allow": ", ".join(allow)}, "<h1>405 Method Not Allowed</h1>", None,
+                            route.pattern, params)
+        status, headers, text = resp.render(ctx)
+        if method == "HEAD":
+            text = ""
+        return Resolved(status, headers, text, resp.content_type, route.pattern, params)
+
+
+class RouteCache:
+    """
+    הטבלה המקומפלת נשמרת בזיכרון ונבנית מחדש רק כשה-mtime של הקובץ משתנה
+    (נבדק לכל היותר פעם ב-check_seconds). קובץ שבור בטעינה חוזרת לא מחליף את הטבלה הקיימת.
+    """
+
+    def __init__(self, path: Path, check_seconds: float = ROUTES_CHECK_SECONDS):
+        self.path = Path(path)
+        self.check_seconds = check_seconds
+        self._table: Optional[RouteTable] = None
+        self._mtime: Optional[int] = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+        self.reloads = 0
+
+    def get(self) -> RouteTable:
+        now = time.monotonic()
+        if self._table is not None and now - self._checked < self.check_seconds:
+            return self._table
+        with self._lock:
+            if self._table is not None and now - self._checked < self.check_seconds:
+                return self._table
+            self._checked = now
+            try:
+                mtime = self.path.stat().st_mtime_ns
+            except OSError:
+                mtime = None
+            if self._table is not None and mtime == self._mtime:
+                return self._table
+            try:
+                table = RouteTable.from_file(self.path) if mtime is not None else RouteTable.from_spec(DEFAULT_ROUTES)
+            except (OSError, ValueError) as e:
+                print(f"HTTP routes: failed to load {self.path}: {e}")
+                if self._table is not None:
+                    self._mtime = mtime     # לא לנסות שוב עד השינוי הבא
+                    return self._table
+                table = RouteTable.from_spec(DEFAULT_ROUTES)
+            self._table, self._mtime = table, mtime
+            self.reloads += 1
+            return table
+
+
+_caches: Dict[Path, RouteCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_table(path: Optional[Path] = None) -> RouteTable:
+    """הטבלה של קובץ ה-routes (ברירת מחדל HONEY_HTTP_ROUTES), משותפת לתהליך."""
+    key = Path(path) if path else ROUTES_FILE
+    cache = _caches.get(key)
+    if cache is None:
+        with _caches_lock:
+            cache = _caches.setdefault(key, RouteCache(key))
+    return cache.get()
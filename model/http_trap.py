@@ -1,31 +1,29 @@
 
 from __future__ import annotations
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from datetime import datetime, UTC
-from pathlib import Path
 import time
-from typing import Dict
+import re
+from typing import Optional
 from .trap import Trap
+from .logger import write_line
+from . import http_routes
+
+
+_METHOD = re.compile(r"^[A-Z][A-Z0-9_-]{0,23}$")
 
 
 @dataclass
 class HTTPTrap(Trap):
     """
-    מלכודת HTTP בסיסית המדמה GET/POST.
+    מלכודת HTTP: התשובות (status, headers, body) מגיעות מטבלת ה-routes
+    (model/http_routes, ברירת מחדל data/http_routes.json) ונטענות מחדש כשהקובץ משתנה.
     input_data דוגמה:
       {"method": "GET", "path": "/"}
       {"method": "POST", "path": "/login", "payload": "user=admin&pass=123456"}
     """
 
-    
-    _routes: Dict[str, Dict[str, str]] = field(default_factory=lambda: {
-        "/": {"GET": "<h1>Welcome</h1><p>Internal Admin Portal</p>"},
-        "/login": {
-            "GET": "<form method='POST'><input name='user'><input type='password' name='pass'><button>Sign in</button></form>",
-            "POST": "Invalid credentials"
-        },
-        "/api/health": {"GET": '{"status":"ok","version":"1.0.0"}'}
-    })
+    routes_file: Optional[str] = None
 
     def get_protocol(self) -> str:
         return "HTTP"
@@ -45,10 +43,11 @@ class HTTPTrap(Trap):
         # ניתוח הבקשה למרכיבים
         method, path, body = self._parse_request(raw)
 
-        # בדיקת התאמה לנתיבים שהוגדרו
-        matched = path in self._routes and method in self._routes[path]
-        status = 200 if matched else 404
-        response_body = self._routes.get(path, {}).get(method, "<h1>404</h1>")
+        # התאמה בטבלת ה-routes (trie, לפי ה-method האמיתי)
+        res = http_routes.get_table(self.routes_file).resolve(method, path, ip=ip, body=body)
+        status = res.status
+        response_body = res.body
+        content_type = res.content_type or ("application/json" if path.startswith("/api/") else "text/html")
 
         # כתיבת שורת לוג לקובץ
         self._append_log_line(self._format_log(method, path, status, ip, body))
@@ -64,7 +63,9 @@ class HTTPTrap(Trap):
             "data": {
                 "status": status,
                 "body": response_body,
-                "content_type": "application/json" if path.startswith("/api/") else "text/html"
+                "content_type": content_type,
+                "headers": res.headers,
+                "route": res.route,
             }
         }
 
@@ -79,11 +80,11 @@ class HTTPTrap(Trap):
         body = parts[1].strip() if len(parts) > 1 else ""
         tokens = start_line.split()
         method = tokens[0].upper() if tokens else "GET"
+        if not _METHOD.match(method):
+            method = "GET"
         path = tokens[1] if len(tokens) > 1 else "/"
         if not path.startswith("/"):
             path = "/" + path
-        if method not in ("GET", "POST"):
-            method = "GET"
         return method, path, body
 
     def _format_log(self, method: str, path: str, status: int, ip: str, body: str) -> str:
@@ -93,9 +94,6 @@ class HTTPTrap(Trap):
         return f'{ts},http,{ip},"{input_data}"\n'
 
     def _append_log_line(self, line: str) -> None:
-        logs_dir = Path(__file__).resolve().parents[1] / "logs"
-        logs_dir.mkdir(parents=True, exist_ok=True)
-        with (logs_dir / "http_honeypot.log").open("a", encoding="utf-8") as f:
-            f.write(line)
+        write_line("http_honeypot.log", line)
 
 
@@ -0,0 +1,175 @@
+
+from __future__ import annotations
+import os
+import time
+import uuid
+import queue
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+
+# מצב ביצוע: inline (ברירת מחדל - run_trap על thread הבקשה) או queued
+INGEST_MODE = os.getenv("HONEY_INGEST_MODE", "inline").strip().lower()
+INGEST_WORKERS = int(os.getenv("HONEY_INGEST_WORKERS", "4"))
+INGEST_QUEUE_SIZE = int(os.getenv("HONEY_INGEST_QUEUE_SIZE", "1000"))
+
+
+class QueueFull(Exception):
+    """התור מלא - ה-HTTP layer מחזיר 429 עם Retry-After."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("ingest queue is full")
+        self.retry_after = retry_after
+
+
+class IngestQueue:
+    """
+    תור ביצוע חסום בין ה-HTTP לבין TrapManager.run_trap:
+    - submit() מכניס עבודה ומחזיר event_id מיד (או QueueFull)
+    - מאגר workers מרוקן את התור ומריץ את המלכודות
+    - metrics(): עומק התור, lag (זמן המתנה בתור), מונים
+    - status(event_id): תוצאה של עבודות אחרונות (עד results_size)
+    """
+
+    def __init__(self, manager: Any, workers: int = INGEST_WORKERS,
+                 maxsize: int = INGEST_QUEUE_SIZE, results_size: int = 10000):
+        self.manager = manager
+        self.workers = max(1, int(workers))
+        self.maxsize = max(1, int(maxsize))
+        self._queue: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=self.maxsize)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._results: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._results_size = results_size
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._lag_ewma = 0.0
+        self._last_lag = 0.0
+        self._rate_ewma = 0.0       # עבודות לשנייה (להערכת Retry-After)
+        self._last_done = None
+
+    #  API
+
+    def submit(self, trap_type: str, input_data: Any, ip: str) -> str:
+        self.start()
+        event_id = uuid.uuid4().hex
+        with self._lock:
+            # נרשם לפני put כדי שה-worker לא יקדים את הסטטוס "queued"
+            self._remember(event_id, {"status": "queued"})
+        try:
+            self._queue.put_nowait((event_id, trap_type, input_data, ip, time.monotonic()))
+        except queue.Full:
+            with self._lock:
+                self._results.pop(event_id, None)
+                self.rejected += 1
+            raise QueueFull(self.retry_after())
+        with self._lock:
+            self.submitted += 1
+        return event_id
+
+    def status(self, event_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            res = self._results.get(event_id)
+            return dict(res) if res is not None else None
+
+    def retry_after(self) -> int:
+        depth = self._queue.qsize()
+        rate = self._rate_ewma
+        if rate <= 0:
+            return 1
+        return max(1, int(round(depth / rate)))
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            oldest = None
+            with self._queue.mutex:
+                if self._queue.queue:
+                    oldest = time.monotonic() - self._queue.queue[0][4]
+            return {
+                "mode": INGEST_MODE,
+                "depth": self._queue.qsize(),
+                "capacity": self.maxsize,
+                "workers": self.workers,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "oldest_wait_seconds": round(oldest, 4) if oldest is not None else 0.0,
+                "last_lag_seconds": round(self._last_lag, 4),
+                "avg_lag_seconds": round(self._lag_ewma, 4),
+            }
+
+    def start(self) -> None:
+        if self._threads:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._work, name=f"honeypot-ingest-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+
+    def stop(self, timeout: Optional[float] = 5.0) -> None:
+        """מסיים את מה שכבר בתור ועוצר את ה-workers."""
+        threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        for t in threads:
+            t.join(timeout)
+
+    def join(self) -> None:
+        """ממתין עד שכל העבודות שבתור הסתיימו (לטסטים ולכיבוי)."""
+        self._queue.join()
+
+    #  פנימי
+
+    def _work(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                event_id, trap_type, input_data, ip, enqueued = item
+                lag = time.monotonic() - enqueued
+                try:
+                    self.manager.run_trap(trap_type, input_data, ip)
+                    outcome = {"status": "done"}
+                    ok = True
+                except Exception as e:
+                    outcome = {"status": "error", "error": str(e)}
+                    ok = False
+                self._record(event_id, outcome, ok, lag)
+            finally:
+                self._queue.task_done()
+
+    def _record(self, event_id: str, outcome: Dict[str, Any], ok: bool, lag: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if ok:
+                self.completed += 1
+            else:
+                self.failed += 1
+            self._last_lag = lag
+            self._lag_ewma = lag if self._lag_ewma == 0 else 0.9 * self._lag_ewma + 0.1 * lag
+            if self._last_done is not None:
+                rate = 1.0 / max(now - self._last_done, 1e-6)
+                self._rate_ewma = rate if self._rate_ewma == 0 else 0.9 * self._rate_ewma + 0.1 * rate
+            self._last_done = now
+            self._remember(event_id, outcome)
+
+    def _remember(self, event_id: str, outcome: Dict[str, Any]) -> None:
+        self._results[event_id] = outcome
+        self._results.move_to_end(event_id)
+        while len(self._results) > self._results_size:
+            self._results.popitem(last=False)
+
+
+def wants_queued(headers: Any) -> bool:
+    """queued אם זה מצב ברירת המחדל, או אם הלקוח ביקש Prefer: respond-async."""
+    if INGEST_MODE == "queued":
+        return True
+    return "respond-async" in (headers.get("Prefer") or "").lower()
@@ -2,10 +2,10 @@
 from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime, UTC
-from pathlib import Path
 import time
 from typing import Dict
 from .trap import Trap
+from .logger import write_line
 
 
 @dataclass
@@ -60,6 +60,4 @@ class IoTRouterTrap(Trap):
         return f'{ts}, IoT Router, {ip}, {input_data}\n'
 
     def _append_log_line(self, line: str) -> None:
-        logs_dir = Path(__file__).resolve().parents[1] / "logs"
-        logs_dir.mkdir(parents=True, exist_ok=True)
-        (logs_dir / "iot_router_honeypot.log").open("a", encoding="utf-8").write(line)
+        write_line("iot_router_honeypot.log", line)
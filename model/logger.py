@@ -1,10 +1,26 @@
 
 from __future__ import annotations
+import io
 import os
+import re
+import gzip
 import json
+import time
+import queue
+import atexit
+import shutil
+import logging
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Dict, List, Optional, TextIO, Tuple, Union
+
+try:
+    import zstandard   # אופציונלי: דחיסת ארכיונים ב-zstd
+except Exception:
+    zstandard = None
+
+from . import metrics
 
 
 BASE_DIR = Path(__file__).resolve().parents[1]
@@ -15,6 +31,499 @@ LOG_DIR.mkdir(parents=True, exist_ok=True)
 
 LOG_FILE = LOG_DIR / "honeypot.log"
 
+# מדיניות fsync אפשרית:
+#   never    - רק flush לבאפר של מערכת ההפעלה
+#   interval - fsync בכל flush מחזורי (לפי flush_interval)
+#   always   - flush + fsync אחרי כל אצווה שנכתבה
+FSYNC_POLICIES = ("never", "interval", "always")
+COMPRESSIONS = ("gzip", "zstd", "none")
+
+# ארכיון של קובץ לוג: <name>.<start>-<end>[.gz|.zst] (זמני UTC) - טווח הזמן בשם
+# מאפשר לקורא לדלג על ארכיונים בלי לפתוח אותם
+ARCHIVE_RE = re.compile(r"^(?P<base>.+)\.(?P<start>\d{8}T\d{6}Z)-(?P<end>\d{8}T\d{6}Z)(?P<ext>\.gz|\.zst)?$")
+_STAMP = "%Y%m%dT%H%M%SZ"
+
+# מדדים של ה-sink (לפי שם הקובץ; מספר הקבצים חסום)
+_WRITE_SECONDS = metrics.histogram("honeypot_log_write_seconds", "Log batch append latency", ("file",))
+_WRITE_LINES = metrics.counter("honeypot_log_lines_total", "Log lines appended", ("file",))
+_WRITE_BYTES = metrics.counter("honeypot_log_bytes_total", "Log bytes appended", ("file",))
+_ROTATIONS = metrics.counter("honeypot_log_rotations_total", "Log files rotated into archives", ("file",))
+
+
+class LogSink:
+    """
+    כותב לוגים משותף לכל המלכודות:
+    - מחזיק handle פתוח לכל קובץ (בלי open/close לכל שורה)
+    - שורות נכנסות לתור חסום ונכתבות באצוות ע"י thread רקע
+    - flush מחזורי לפי flush_interval ו-fsync לפי fsync_policy
+    - אם הקובץ נמחק/הוחלף מבחוץ (rotate, טסטים) - נפתח מחדש
+    - rotation לפי גודל (max_bytes) וזמן (max_age שניות); הקובץ הסגור נדחס
+      ב-thread נפרד ונשמר תקציב ארכיונים (retention_bytes / retention_days). 0 מכבה.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 1.0,
+        fsync_policy: str = "never",
+        queue_size: int = 10000,
+        batch_size: int = 512,
+        max_bytes: int = 0,
+        max_age: float = 0,
+        compression: str = "gzip",
+        retention_bytes: int = 0,
+        retention_days: float = 0,
+    ):
+        if fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"fsync_policy must be one of {FSYNC_POLICIES}")
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"compression must be one of {COMPRESSIONS}")
+        if compression == "zstd" and zstandard is None:
+            print("zstandard is not installed - compressing log archives with gzip")
+            compression = "gzip"
+        self.max_bytes = max(0, int(max_bytes))
+        self.max_age = max(0.0, float(max_age))
+        self.compression = compression
+        self.retention_bytes = max(0, int(retention_bytes))
+        self.retention_days = max(0.0, float(retention_days))
+        # לכל קובץ פעיל: (מתי להתחיל לספור max_age, תחילת טווח הזמן לשם הארכיון)
+        self._born: Dict[Path, Tuple[float, float]] = {}
+        self._archive_queue: "queue.Queue[Optional[Path]]" = queue.Queue()
+        self._archiver: Optional[threading.Thread] = None
+        self.flush_interval = max(0.0, float(flush_interval))
+        self.fsync_policy = fsync_policy
+        self.batch_size = max(1, int(batch_size))
+        self._queue: "queue.Queue[Tuple[Any, Any]]" = queue.Queue(maxsize=max(1, int(queue_size)))
+        self._handles: Dict[Path, TextIO] = {}
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    #  API ציבורי
+
+    def write(self, path: Union[str, Path], line: str) -> None:
+        """מכניס שורה לתור הכתיבה. נתיב יחסי נפתר מול LOG_DIR."""
+        if self._closed:
+            raise RuntimeError("LogSink is closed")
+        if not line.endswith("\n"):
+            line += "\n"
+        self._ensure_thread()
+        self._queue.put((_resolve(path), line))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """ממתין שכל מה שנכנס לתור עד עכשיו ייכתב לדיסק."""
+        if self._thread is None or not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = 5.0) -> None:
+        """מרוקן את התור, סוגר את כל ה-handles ועוצר את ה-thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put((_STOP, None))
+            thread.join(timeout)
+        self._close_handles()
+        archiver = self._archiver
+        if archiver is not None and archiver.is_alive():
+            self._archive_queue.put(None)
+            archiver.join(timeout)
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    #  פנימי
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="honeypot-log-sink", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            timeout = None
+            if self._dirty:
+                timeout = max(0.0, self.flush_interval - (time.monotonic() - self._last_flush))
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._flush_handles(fsync=self.fsync_policy != "never")
+                continue
+
+            batch: Dict[Path, list] = {}
+            waiters = []
+            stop = False
+            count = 0
+            while True:
+                key, value = item
+                if key is _FLUSH:
+                    waiters.append(value)
+                elif key is _STOP:
+                    stop = True
+                else:
+                    batch.setdefault(key, []).append(value)
+                    count += 1
+                if stop or count >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+            for path, lines in batch.items():
+                self._write_lines(path, lines)
+
+            if self.fsync_policy == "always" and batch:
+                self._flush_handles(fsync=True)
+            elif waiters or stop or time.monotonic() - self._last_flush >= self.flush_interval:
+                self._flush_handles(fsync=self.fsync_policy != "never")
+
+            for ev in waiters:
+                ev.set()
+            if stop:
+                return
+
+    def _write_lines(self, path: Path, lines: list) -> None:
+        data = "".join(lines)
+        try:
+            with _WRITE_SECONDS.labels(path.name).time():
+                fh = self._handle_for(path)
+                if self._should_rotate(path, fh, len(data)):
+                    _ROTATIONS.labels(path.name).inc()
+                    self._rotate(path)
+                    fh = self._handle_for(path)
+                fh.write(data)
+            self._dirty = True
+            _WRITE_LINES.labels(path.name).inc(len(lines))
+            _WRITE_BYTES.labels(path.name).inc(len(data))
+        except OSError as e:
+            print(f"Failed to write log lines to {path}: {e}")
+
+    def _handle_for(self, path: Path) -> TextIO:
+        fh = self._handles.get(path)
+        if fh is not None and not _same_file(path, fh):
+            # הקובץ נמחק או הוחלף מאז שנפתח
+            try:
+                fh.close()
+            except OSError:
+                pass
+            fh = None
+        if fh is None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fh = path.open("a", encoding="utf-8")
+            self._handles[path] = fh
+            now = time.time()
+            if os.fstat(fh.fileno()).st_size == 0:
+                self._born[path] = (now, now)
+            else:
+                # קובץ קיים: תחילת הטווח = סוף הארכיון האחרון שלו (או "לא ידוע")
+                prev = list_archives(path)
+                self._born[path] = (now, prev[-1][1] if prev else 0.0)
+        return fh
+
+    def _should_rotate(self, path: Path, fh: TextIO, incoming: int) -> bool:
+        if self.max_bytes:
+            size = os.fstat(fh.fileno()).st_size
+            if size and size + incoming > self.max_bytes:
+                return True
+        if self.max_age:
+            started = self._born.get(path, (time.time(), 0.0))[0]
+            if time.time() - started >= self.max_age:
+                return True
+        return False
+
+    def _rotate(self, path: Path) -> None:
+        """סוגר את הקובץ הפעיל, משנה את שמו לארכיון ומעביר אותו לדחיסה."""
+        fh = self._handles.pop(path)
+        try:
+            fh.flush()
+            fh.close()
+        except OSError:
+            pass
+        start = self._born.pop(path, (0.0, 0.0))[1]
+        end = time.time()
+        if end <= start:
+            end = start + 1
+        dest = archive_path(path, start, end)
+        # שני rotations באותה שנייה - לא לדרוס ארכיון קיים
+        while any(dest.with_name(dest.name + ext).exists() for ext in ("", ".gz", ".zst")):
+            end += 1
+            dest = archive_path(path, start, end)
+        try:
+            os.rename(path, dest)
+        except FileNotFoundError:
+            return      # תהליך אחר כבר סובב את הקובץ
+        except OSError as e:
+            print(f"Failed to rotate log file {path}: {e}")
+            return
+        # הקובץ החדש נוצר לפני הדחיסה: אחרת ה-inode של הארכיון (שנמחק אחרי הדחיסה)
+        # עלול להיות ממוחזר לקובץ הפעיל, וקורא אינקרמנטלי לא יזהה את ה-rotation
+        self._handle_for(path)
+        self._ensure_archiver()
+        self._archive_queue.put(dest)
+
+    def _ensure_archiver(self) -> None:
+        if self._archiver is None or not self._archiver.is_alive():
+            self._archiver = threading.Thread(target=self._archive_loop, name="honeypot-log-archiver", daemon=True)
+            self._archiver.start()
+
+    def _archive_loop(self) -> None:
+        while True:
+            path = self._archive_queue.get()
+            if path is None:
+                return
+            try:
+                compress_archive(path, self.compression)
+                enforce_retention(path.parent, self.retention_bytes, self.retention_days)
+            except OSError as e:
+                print(f"Failed to archive log file {path}: {e}")
+
+    def _flush_handles(self, fsync: bool = False) -> None:
+        for path, fh in list(self._handles.items()):
+            try:
+                fh.flush()
+                if fsync:
+                    os.fsync(fh.fileno())
+            except (OSError, ValueError) as e:
+                print(f"Failed to flush log file {path}: {e}")
+        self._dirty = False
+        self._last_flush = time.monotonic()
+
+    def _close_handles(self) -> None:
+        self._flush_handles(fsync=self.fsync_policy != "never")
+        for fh in self._handles.values():
+            try:
+                fh.close()
+            except OSError:
+                pass
+        self._handles.clear()
+
+
+_FLUSH = object()
+_STOP = object()
+
+
+def _resolve(path: Union[str, Path]) -> Path:
+    p = Path(path)
+    return p if p.is_absolute() else LOG_DIR / p
+
+
+def _stamp(t: float) -> str:
+    return datetime.fromtimestamp(t, timezone.utc).strftime(_STAMP)
+
+
+def _unstamp(s: str) -> float:
+    return datetime.strptime(s, _STAMP).replace(tzinfo=timezone.utc).timestamp()
+
+
+def archive_path(path: Path, start: float, end: float) -> Path:
+    return path.with_name(f"{path.name}.{_stamp(start)}-{_stamp(end)}")
+
+
+def parse_archive_name(name: str) -> Optional[Tuple[str, float, float, str]]:
+    """'ftp_logs.txt.<start>-<end>.gz' -> ('ftp_logs.txt', start, end, '.gz'); None אם זה לא ארכיון."""
+    m = ARCHIVE_RE.match(name)
+    if not m:
+        return None
+    return m["base"], _unstamp(m["start"]), _unstamp(m["end"]), m["ext"] or ""
+
+
+def list_archives(path: Union[str, Path]) -> List[Tuple[float, float, Path]]:
+    """הארכיונים של קובץ לוג, ממוינים לפי זמן: [(start, end, path)]. דחוס עדיף על לא-דחוס."""
+    path = Path(path)
+    found: Dict[Tuple[float, float], Path] = {}
+    try:
+        names = os.listdir(path.parent)
+    except FileNotFoundError:
+        return []
+    for name in names:
+        parsed = parse_archive_name(name)
+        if parsed is None or parsed[0] != path.name:
+            continue
+        key = (parsed[1], parsed[2])
+        if key not in found or parsed[3]:
+            found[key] = path.parent / name
+    return sorted((s, e, p) for (s, e), p in found.items())
+
+
+def open_archive(path: Union[str, Path], binary: bool = False) -> Any:
+    """פותח ארכיון (gz / zst / לא דחוס) לקריאה - טקסט, או בתים עם binary=True."""
+    path = str(path)
+    if path.endswith(".gz"):
+        if binary:
+            return gzip.open(path, "rb")
+        return gzip.open(path, "rt", encoding="utf-8", errors="replace")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("zstandard is required to read .zst log archives")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+        return reader if binary else io.TextIOWrapper(reader, encoding="utf-8", errors="replace")
+    if binary:
+        return open(path, "rb")
+    return open(path, "r", encoding="utf-8", errors="replace")
+
+
+def compress_archive(path: Path, compression: str = "gzip") -> Path:
+    """דוחס ארכיון לא-דחוס (part -> rename -> מחיקת המקור). מחזיר את הנתיב הסופי."""
+    if compression == "none":
+        return path
+    ext = ".zst" if compression == "zstd" else ".gz"
+    dest = path.with_name(path.name + ext)
+    part = path.with_name(dest.name + ".part")
+    with open(path, "rb") as src:
+        if ext == ".zst":
+            with open(part, "wb") as raw:
+                with zstandard.ZstdCompressor().stream_writer(raw) as dst:
+                    shutil.copyfileobj(src, dst)
+        else:
+            with gzip.open(part, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+    os.replace(part, dest)
+    os.unlink(path)
+    return dest
+
+
+def enforce_retention(logs_dir: Path, max_bytes: int = 0, max_days: float = 0) -> List[Path]:
+    """מוחק ארכיונים ישנים מעבר לתקציב (סה"כ בתים / גיל בימים). מחזיר את מה שנמחק."""
+    if not max_bytes and not max_days:
+        return []
+    archives = []
+    for name in os.listdir(logs_dir):
+        parsed = parse_archive_name(name)
+        if parsed is None:
+            continue
+        p = Path(logs_dir) / name
+        try:
+            archives.append((parsed[2], p, p.stat().st_size))
+        except FileNotFoundError:
+            continue
+    archives.sort()
+    removed = []
+    total = sum(size for _, _, size in archives)
+    cutoff = time.time() - max_days * 86400 if max_days else None
+    for end, p, size in archives:
+        if not ((max_bytes and total > max_bytes) or (cutoff is not None and end < cutoff)):
+            break
+        try:
+            p.unlink()
+            removed.append(p)
+        except FileNotFoundError:
+            pass
+        total -= size
+    return removed
+
+
+def _same_file(path: Path, fh: TextIO) -> bool:
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return False
+    fst = os.fstat(fh.fileno())
+    return (st.st_dev, st.st_ino) == (fst.st_dev, fst.st_ino)
+
+
+#  sink משותף לתהליך
+
+_sink: Optional[LogSink] = None
+_sink_lock = threading.Lock()
+
+
+def get_sink() -> LogSink:
+    """מחזיר את ה-sink המשותף (נוצר בפעם הראשונה לפי משתני סביבה)."""
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = LogSink(
+                    flush_interval=float(os.getenv("HONEY_LOG_FLUSH_INTERVAL", "1.0")),
+                    fsync_policy=os.getenv("HONEY_LOG_FSYNC", "never"),
+                    queue_size=int(os.getenv("HONEY_LOG_QUEUE_SIZE", "10000")),
+                    max_bytes=int(os.getenv("HONEY_LOG_MAX_BYTES", str(50 * 2**20))),
+                    max_age=float(os.getenv("HONEY_LOG_ROTATE_SECONDS", "86400")),
+                    compression=os.getenv("HONEY_LOG_COMPRESS", "gzip"),
+                    retention_bytes=int(os.getenv("HONEY_LOG_RETENTION_BYTES", str(2**30))),
+                    retention_days=float(os.getenv("HONEY_LOG_RETENTION_DAYS", "0")),
+                )
+    return _sink
+
+
+_generation = 0
+
+
+def configure(**kwargs: Any) -> LogSink:
+    """מחליף את ה-sink המשותף בהגדרות חדשות (הקודם נסגר בצורה מסודרת)."""
+    global _sink
+    with _sink_lock:
+        old, _sink = _sink, LogSink(**kwargs)
+    if old is not None:
+        old.close()
+    return _sink
+
+
+def write_line(path: Union[str, Path], line: str) -> None:
+    """כתיבת שורה לקובץ לוג דרך ה-sink המשותף."""
+    global _generation
+    get_sink().write(path, line)
+    _generation += 1
+
+
+def generation() -> int:
+    """מונה השורות שנכתבו בתהליך הזה; caches של דוחות נפסלים כשהוא משתנה."""
+    return _generation
+
+
+def flush(timeout: Optional[float] = None) -> bool:
+    if _sink is None:
+        return True
+    return _sink.flush(timeout)
+
+
+def close() -> None:
+    """סגירה מסודרת (נקרא גם ב-atexit). כתיבה נוספת תיצור sink חדש."""
+    global _sink
+    with _sink_lock:
+        old, _sink = _sink, None
+    if old is not None:
+        old.close()
+
+
+def _reset_after_fork() -> None:
+    # ב-child אחרי fork ה-thread לא קיים - מתחילים sink נקי
+    global _sink, _sink_lock
+    _sink = None
+    _sink_lock = threading.Lock()
+
+
+atexit.register(close)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+metrics.gauge("honeypot_log_queue_depth", "Log lines waiting in the sink queue").set_function(
+    lambda: _sink.pending() if _sink is not None else 0)
+
+
+class SinkHandler(logging.Handler):
+    """logging.Handler שכותב דרך ה-sink המשותף (ולכן עובר rotation ודחיסה)."""
+
+    def __init__(self, path: Union[str, Path], level: int = logging.NOTSET):
+        super().__init__(level)
+        self.path = path
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            write_line(self.path, self.format(record))
+        except Exception:
+            self.handleError(record)
+
 
 def _to_json_string(data: Any) -> str:
     """
@@ -34,7 +543,7 @@ def log_interaction(trap_type: str, ip: Optional[str], input_data: Any) -> None:
     רושם שורת לוג בפורמט CSV:
     <UTC ISO timestamp>, <trap_type>, <ip>, <input_json>
     """
-    
+
     timestamp = datetime.now(timezone.utc).isoformat(timespec="seconds").replace("+00:00", "Z")
 
     safe_ip = ip or "unknown"
@@ -42,11 +551,9 @@ def log_interaction(trap_type: str, ip: Optional[str], input_data: Any) -> None:
 
     log_line = f"{timestamp}, {trap_type}, {safe_ip}, {input_str}\n"
 
-    
-    with open(LOG_FILE, "a", encoding="utf-8") as f:
-        f.write(log_line)
+    write_line(LOG_FILE, log_line)
+
 
-    
     print(log_line.strip())
 
 
@@ -0,0 +1,376 @@
+
+from __future__ import annotations
+import os
+import time
+import threading
+from bisect import bisect_left
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+METRICS_ENABLED = os.getenv("HONEY_METRICS", "1").strip().lower() not in ("0", "false", "no", "off")
+
+# שניות; מכסה גם append ללוג (מיקרו-שניות) וגם ייצוא PDF
+DEFAULT_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Timer:
+    """מודד משך ורושם ל-histogram: context manager, או decorator (מדידה לכל קריאה)."""
+
+    __slots__ = ("_child", "_t0")
+
+    def __init__(self, child: "_HistogramChild"):
+        self._child = child
+        self._t0 = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._child.observe(time.perf_counter() - self._t0)
+
+    def __call__(self, fn: Callable) -> Callable:
+        child = self._child
+
+        @wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - t0)
+        return wrapper
+
+
+class _NullTimer:
+    """כשהמדדים כבויים: context manager ריק, ו-decorator שמחזיר את הפונקציה עצמה."""
+
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def __call__(self, fn: Callable) -> Callable:
+        return fn
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, n: float = 1) -> None:
+        with self._lock:
+            self.value += n
+
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ("fn",)
+
+    def __init__(self):
+        super().__init__()
+        self.fn: Optional[Callable[[], float]] = None
+
+    def set(self, v: float) -> None:
+        self.value = v
+
+    def dec(self, n: float = 1) -> None:
+        self.inc(-n)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        """ערך שנקרא רק בזמן scrape (עומק תור וכד')."""
+        self.fn = fn
+
+    def get(self) -> float:
+        if self.fn is not None:
+            try:
+                return float(self.fn())
+            except Exception:
+                return float("nan")
+        return self.value
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)   # האחרון = +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, v: float) -> None:
+        i = bisect_left(self.bounds, v)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += v
+            self.count += 1
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+
+class _Metric:
+    """
+    מדד עם labels: כל צירוף ערכים מקבל child משלו (נוצר בפעם הראשונה).
+    בלי labels - הקריאות (inc/set/observe/time) עוברות ל-child היחיד.
+    """
+
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), **opts: Any):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.opts = opts
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values: Any) -> Any:
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            with self._lock:
+                child = self._children.get(key)
+                if child is None:
+                    child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def __getattr__(self, attr: str) -> Any:
+        # metric.inc() / metric.observe() כשאין labels
+        if attr.startswith("_") or self.labelnames:
+            raise AttributeError(attr)
+        return getattr(self.labels(), attr)
+
+    def samples(self) -> List[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            children = list(self._children.items())
+        out = []
+        for key, child in sorted(children):
+            labels = dict(zip(self.labelnames, key))
+            out.extend(self._child_samples(labels, child))
+        return out
+
+    def _child_samples(self, labels: Dict[str, str], child: Any) -> List[Tuple[str, Dict[str, str], float]]:
+        return [(self.name, labels, child.value)]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def _child_samples(self, labels, child):
+        return [(self.name, labels, child.get())]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(tuple(sorted(self.opts.get("buckets") or DEFAULT_BUCKETS)))
+
+    def _child_samples(self, labels, child):
+        with child._lock:
+            counts, total, n = list(child.counts), child.sum, child.count
+        out = []
+        acc = 0
+        for bound, c in zip(child.bounds + (float("inf"),), counts):
+            acc += c
+            out.append((self.name + "_bucket", {**labels, "le": _fmt(bound)}, acc))
+        out.append((self.name + "_sum", labels, total))
+        out.append((self.name + "_count", labels, n))
+        return out
+
+
+class _NullMetric:
+    """מדד כבוי: כל הפעולות no-op, בלי נעילות ובלי הקצאות."""
+
+    __slots__ = ()
+
+    def labels(self, *values: Any) -> "_NullMetric":
+        return self
+
+    def inc(self, n: float = 1) -> None:
+        return None
+
+    dec = inc
+
+    def set(self, v: float) -> None:
+        return None
+
+    def observe(self, v: float) -> None:
+        return None
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        return None
+
+    def time(self) -> _NullTimer:
+        return _NULL_TIMER
+
+
+_NULL_METRIC = _NullMetric()
+
+
+class Registry:
+    """כל המדדים של התהליך; רישום חוזר של אותו שם מחזיר את אותו מדד."""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls: type, name: str, help: str, labelnames: Sequence[str], **opts: Any) -> Any:
+        if not self.enabled:
+            return _NULL_METRIC
+        with self._lock:
+            m = self._metrics.get(name)
+            if m is None:
+                m = self._metrics[name] = cls(name, help, labelnames, **opts)
+            elif not isinstance(m, cls) or m.labelnames != tuple(labelnames):
+                raise ValueError(f"metric {name} already registered with a different type or labels")
+            return m
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Any:
+        return self._get(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Any:
+        return self._get(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Optional[Sequence[float]] = None) -> Any:
+        return self._get(Histogram, name, help, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """text exposition format (מה ש-Prometheus סורק מ-/metrics)."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines: List[str] = []
+        for m in metrics:
+            lines.append(f"# HELP {m.name} {_escape_help(m.help)}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for name, labels, value in m.samples():
+                if labels:
+                    body = ",".join(f'{k}="{_escape_label(v)}"' for k, v in labels.items())
+                    lines.append(f"{name}{{{body}}} {_fmt(value)}")
+                else:
+                    lines.append(f"{name} {_fmt(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _reset_locks(self) -> None:
+        self._lock = threading.Lock()
+        for m in self._metrics.values():
+            m._lock = threading.Lock()
+            for child in m._children.values():
+                child._lock = threading.Lock()
+
+
+def _fmt(v: float) -> str:
+    if v != v:
+        return "NaN"
+    if v in (float("inf"), float("-inf")):
+        return "+Inf" if v > 0 else "-Inf"
+    if float(v).is_integer() and abs(v) < 1e15:
+        return str(int(v))
+    return repr(float(v))
+
+
+def _escape_help(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(s: str) -> str:
+    return s.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+#  registry משותף לתהליך
+
+REGISTRY = Registry(METRICS_ENABLED)
+
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Any:
+    return REGISTRY.counter(name, help, labelnames)
+
+
+def gauge(name: str, help: str, labelnames: Sequence[str] = ()) -> Any:
+    return REGISTRY.gauge(name, help, labelnames)
+
+
+def histogram(name: str, help: str, labelnames: Sequence[str] = (),
+              buckets: Optional[Sequence[float]] = None) -> Any:
+    return REGISTRY.histogram(name, help, labelnames, buckets)
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+def instrument_app(app: Any) -> None:
+    """
+    מדדי בקשות לאפליקציית Flask (לפי ה-rule ולא לפי ה-URL, כדי שה-labels יישארו חסומים)
+    ו-route של /metrics. כשהמדדים כבויים - לא נרשם כלום.
+    """
+    if not REGISTRY.enabled:
+        return
+    from flask import Response, g, request
+
+    requests_total = counter("honeypot_http_requests_total", "HTTP requests by endpoint, method and status",
+                             ("endpoint", "method", "status"))
+    seconds = histogram("honeypot_http_request_duration_seconds",
+                        "HTTP request latency until the response headers are ready", ("endpoint", "method"))
+    in_flight = gauge("honeypot_http_requests_in_flight", "HTTP requests being handled")
+
+    @app.before_request
+    def _metrics_start() -> None:
+        g._metrics_t0 = time.perf_counter()
+        in_flight.inc()
+
+    @app.after_request
+    def _metrics_end(resp: Any) -> Any:
+        t0 = g.get("_metrics_t0")
+        if t0 is not None:
+            rule = request.url_rule.rule if request.url_rule is not None else "unmatched"
+            seconds.labels(rule, request.method).observe(time.perf_counter() - t0)
+            requests_total.labels(rule, request.method, resp.status_code).inc()
+        return resp
+
+    @app.teardown_request
+    def _metrics_done(exc: Any) -> None:
+        # רץ גם כשהבקשה נכשלה לפני after_request
+        if g.pop("_metrics_t0", None) is not None:
+            in_flight.dec()
+
+    def metrics_endpoint() -> Any:
+        return Response(render(), mimetype=None, content_type=CONTENT_TYPE)
+
+    app.add_url_rule("/metrics", "metrics", metrics_endpoint, methods=["GET"])
+
+
+if hasattr(os, "register_at_fork"):
+    # נעילה שהוחזקה ע"י thread אחר בזמן ה-fork הייתה נשארת נעולה ב-child
+    os.register_at_fork(after_in_child=REGISTRY._reset_locks)
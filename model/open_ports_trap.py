@@ -1,12 +1,13 @@
 
 from __future__ import annotations
 from datetime import datetime, UTC
-from pathlib import Path
 import time
 import json
 import ast
 from typing import Any, Dict, Tuple
 from .trap import Trap
+from .logger import write_line
+from . import signatures
 
 
 BANNERS: Dict[int, str] = {
@@ -56,6 +57,10 @@ class OpenPortsTrap(Trap):
 
         
         pretty_input = f"Port: {port}" if port else (str(input_data).strip())
+        # חיבור אמיתי מ-controller/port_listener.py: הבייטים הראשונים שהלקוח שלח
+        payload = input_data.get("payload") if isinstance(input_data, dict) else None
+        if payload:
+            pretty_input += " | payload: " + payload.replace("\r", "\\r").replace("\n", "\\n").replace('"', "'")[:200]
         self._append_log_line(self._format_log(ip=ip, input_data=pretty_input, banner=banner))
 
         # תשובה ל-UI/בדיקות
@@ -138,9 +143,8 @@ class OpenPortsTrap(Trap):
 
     
     def _looks_like_nmap(self, raw: str) -> bool:
-        raw = (raw or "").lower()
-        indicators = ["nmap", "-sv", "--version", "-ss", "-p "]
-        return any(k in raw for k in indicators)
+        # חתימות עם tag "nmap" במנוע המשותף (model/signatures)
+        return any("nmap" in rule.tags for rule in signatures.get_engine().scan(raw or "", self.get_type()))
 
     
     def _format_log(self, ip: str, input_data: str, banner: str) -> str:
@@ -150,9 +154,7 @@ class OpenPortsTrap(Trap):
         return f'{ts},open_ports,{ip},"{input_data}"\n'
 
     def _append_log_line(self, line: str) -> None:
-        logs_dir = Path(__file__).resolve().parents[1] / "logs"
-        logs_dir.mkdir(parents=True, exist_ok=True)
-        (logs_dir / "open_ports_honeypot.log").open("a", encoding="utf-8").write(line)
+        write_line("open_ports_honeypot.log", line)
 
 
 if __name__ == "__main__":
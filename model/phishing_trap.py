@@ -1,10 +1,9 @@
 import datetime
-import os
 import json
 from model.trap import Trap
-from flask import request   
+from model.logger import LOG_DIR, write_line
 
-LOG_FILE = os.path.join(os.path.dirname(__file__), "..", "logs", "honeypot.log")
+LOG_FILE = str(LOG_DIR / "honeypot.log")
 
 class PhishingTrap(Trap):
     def __init__(self):
@@ -28,6 +27,7 @@ class PhishingTrap(Trap):
 
         
         if ip is None:
+            from flask import request   # רק בתוך בקשה; לא בזמן import של המודול
             ip = request.headers.get("X-Forwarded-For", request.remote_addr)
 
        
@@ -49,9 +49,6 @@ class PhishingTrap(Trap):
             return data
 
         # אחרת – נשמור ללוג בפורמט JSON קריא
-        log_path = os.path.abspath(LOG_FILE)
-        os.makedirs(os.path.dirname(log_path), exist_ok=True)
-        with open(log_path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(data, ensure_ascii=False) + "\n")
+        write_line(LOG_FILE, json.dumps(data, ensure_ascii=False) + "\n")
 
         return data
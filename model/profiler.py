@@ -0,0 +1,165 @@
+
+from __future__ import annotations
+import io
+import os
+import re
+import sys
+import time
+import pstats
+import cProfile
+import threading
+import uuid
+from collections import Counter
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .logger import BASE_DIR, LOG_DIR
+
+
+PROFILE_DIR = Path(os.getenv("HONEY_PROFILE_DIR", str(LOG_DIR / "profiles")))
+PROFILE_MAX_SECONDS = float(os.getenv("HONEY_PROFILE_MAX_SECONDS", "60"))
+PROFILE_INTERVAL = float(os.getenv("HONEY_PROFILE_INTERVAL", "0.005"))
+PROFILE_KEEP = int(os.getenv("HONEY_PROFILE_KEEP", "50"))
+
+# leaf של thread שרק ממתין (תור, select, join) - לא מעניין בפרופיל של CPU
+IDLE_LEAVES = {
+    ("threading.py", "wait"), ("threading.py", "_wait_for_tstate_lock"),
+    ("selectors.py", "select"), ("queue.py", "get"), ("socketserver.py", "serve_forever"),
+    ("socket.py", "readinto"), ("socket.py", "accept"),
+}
+
+_PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+_busy = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+def _label(code: Any) -> str:
+    path = Path(code.co_filename)
+    try:
+        name = str(path.relative_to(BASE_DIR))
+    except ValueError:
+        name = "/".join(path.parts[-2:])
+    return f"{code.co_name} ({name}:{code.co_firstlineno})".replace(";", ":")
+
+
+class StackSampler:
+    """
+    profiler דוגם: כל interval שניות לוקח את ה-stack של כל ה-threads
+    (sys._current_frames) וסופר stacks זהים. בלי hooks על כל קריאה, ולכן
+    ה-overhead תלוי רק בתדירות הדגימה ולא בעומס.
+    """
+
+    def __init__(self, interval: float = PROFILE_INTERVAL, idle: bool = False):
+        self.interval = max(0.001, interval)
+        self.idle = idle
+        self.samples = 0
+
+    def run(self, seconds: float) -> Counter:
+        """דוגם seconds שניות מה-thread הנוכחי (שלא נכלל בתוצאה)."""
+        counts: Counter = Counter()
+        me = threading.get_ident()
+        labels: Dict[Any, str] = {}
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                if not self.idle and (Path(frame.f_code.co_filename).name, frame.f_code.co_name) in IDLE_LEAVES:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    label = labels.get(code)
+                    if label is None:
+                        label = labels[code] = _label(code)
+                    stack.append(label)
+                    frame = frame.f_back
+                stack.append(f"thread:{names.get(ident, ident)}")
+                counts[";".join(reversed(stack))] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+        return counts
+
+
+def sample(seconds: float, interval: float = PROFILE_INTERVAL, idle: bool = False) -> Tuple[Counter, int]:
+    """פרופיל אחד בכל פעם בתהליך; מחזיר (stacks, מספר סבבי דגימה)."""
+    seconds = min(max(0.0, seconds), PROFILE_MAX_SECONDS)
+    if not _busy.acquire(blocking=False):
+        raise ProfilerBusy("a profile is already running")
+    try:
+        sampler = StackSampler(interval, idle)
+        return sampler.run(seconds), sampler.samples
+    finally:
+        _busy.release()
+
+
+def collapsed(counts: Counter) -> str:
+    """פורמט collapsed stacks (flamegraph.pl / speedscope): 'a;b;c <count>'."""
+    return "".join(f"{stack} {n}\n" for stack, n in counts.most_common())
+
+
+def summary(counts: Counter, limit: int = 40) -> str:
+    """טבלה בסגנון pstats: דגימות עצמיות ומצטברות לכל פונקציה."""
+    total = sum(counts.values()) or 1
+    own: Counter = Counter()
+    cum: Counter = Counter()
+    for stack, n in counts.items():
+        frames = stack.split(";")[1:]          # בלי ה-thread
+        if not frames:
+            continue
+        own[frames[-1]] += n
+        for f in set(frames):
+            cum[f] += n
+    out = io.StringIO()
+    out.write(f"{sum(counts.values())} samples\n\n")
+    out.write(f"{'self':>8} {'self%':>6} {'total':>8} {'total%':>6}  function\n")
+    for func, n in cum.most_common(limit):
+        out.write(f"{own[func]:>8} {100.0 * own[func] / total:>6.1f} {n:>8} {100.0 * n / total:>6.1f}  {func}\n")
+    return out.getvalue()
+
+
+#  cProfile לבקשה בודדת
+
+def profile_call(fn: Callable[[], Any]) -> Tuple[Any, str]:
+    """מריץ fn תחת cProfile ושומר את ה-stats ב-PROFILE_DIR. מחזיר (תוצאה, profile id)."""
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        result = fn()
+    finally:
+        prof.disable()
+    pid = uuid.uuid4().hex
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    prof.dump_stats(str(PROFILE_DIR / f"{pid}.prof"))
+    _prune()
+    return result, pid
+
+
+def profile_path(pid: str) -> Optional[Path]:
+    if not _PROFILE_ID.match(pid or ""):
+        return None
+    path = PROFILE_DIR / f"{pid}.prof"
+    return path if path.exists() else None
+
+
+def stats_text(pid: str, sort: str = "cumulative", limit: int = 40) -> Optional[str]:
+    path = profile_path(pid)
+    if path is None:
+        return None
+    out = io.StringIO()
+    stats = pstats.Stats(str(path), stream=out)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+def _prune() -> None:
+    files = sorted(PROFILE_DIR.glob("*.prof"), key=lambda p: p.stat().st_mtime)
+    for p in files[: max(0, len(files) - PROFILE_KEEP)]:
+        try:
+            p.unlink()
+        except OSError:
+            pass
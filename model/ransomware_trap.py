@@ -6,11 +6,12 @@ from pathlib import Path
 import time
 from typing import List, Dict
 from .trap import Trap
+from .logger import LOG_DIR, write_line
 
 
 BASE_DIR = Path(__file__).resolve().parents[1]
 BAIT_DIR = BASE_DIR / "bait_files"
-LOG_FILE = BASE_DIR / "logs" / "ransomware_honeypot.log"
+LOG_FILE = LOG_DIR / "ransomware_honeypot.log"
 
 @dataclass
 class RansomwareTrap(Trap):
@@ -100,8 +101,7 @@ class RansomwareTrap(Trap):
         return f'{ts} | protocol=FILE | type=ransomware | ip={ip} | action="{message}"\n'
 
     def _append_log_line(self, line: str) -> None:
-        LOG_FILE.parent.mkdir(parents=True, exist_ok=True)
-        LOG_FILE.open("a", encoding="utf-8").write(line)
+        write_line(LOG_FILE, line)
 
 
 if __name__ == "__main__":
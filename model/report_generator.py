@@ -1,51 +1,359 @@
 from io import StringIO, BytesIO
-from typing import List, Dict
+from typing import Any, BinaryIO, Iterator, List, Dict, Optional, Tuple
 import csv
 import os
 import json
 import glob
+import heapq
+import fnmatch
+import bisect
+import base64
+import threading
+from datetime import datetime, timezone
 from pathlib import Path
+from .logger import LOG_DIR, flush as flush_logs, generation as log_generation, list_archives, open_archive, parse_archive_name
+from . import event_store
+from . import rollups
+from . import metrics
 
-def _fetch_events():
-    logs_dir = Path(__file__).resolve().parents[1] / "logs"
-    events = []
-    log_files = glob.glob(str(logs_dir / "*.log")) + glob.glob(str(logs_dir / "*.txt"))
-    for file in log_files:
-        with open(file, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
+_REPORT_SECONDS = metrics.histogram("honeypot_report_seconds", "Report building latency by operation", ("op",))
+
+class _FileState:
+    __slots__ = ("dev", "ino", "offset", "entries")
+
+    def __init__(self, dev: int, ino: int):
+        self.dev = dev
+        self.ino = ino
+        self.offset = 0
+        self.entries: List[Tuple[str, int, Dict]] = []
+
+
+class EventIndex:
+    """
+    אינדקס אירועים אינקרמנטלי מעל תיקיית הלוגים:
+    - זוכר לכל קובץ את ה-inode וה-offset האחרון שנקרא
+    - בכל refresh קורא רק את הבייטים שנוספו מאז (שורות שלמות בלבד)
+    - קובץ שקוצר (truncate) או הוחלף (rotate / inode חדש) נקרא מחדש מההתחלה
+    - האירועים המנורמלים נשמרים בזיכרון כרשומות (time_key, seq, event):
+      _entries ממוינת לפי זמן (לטווחי זמן ו-cursor), _log לפי סדר קליטה (ל-delta)
+    """
+
+    def __init__(self, logs_dir: Path, patterns: Tuple[str, ...] = ("*.log", "*.txt")):
+        self.logs_dir = Path(logs_dir)
+        self.patterns = patterns
+        self._files: Dict[str, _FileState] = {}
+        self._entries: List[Tuple[str, int, Dict]] = []   # סדר עולה לפי (time_key, seq)
+        self._log: List[Tuple[str, int, Dict]] = []       # סדר עולה לפי seq
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def events(self) -> List[Dict]:
+        with self._lock:
+            self._refresh()
+            return [e for _, _, e in reversed(self._entries)]
+
+    def query(self, cursor: Optional[str] = None, after: Optional[int] = None, limit: int = 100,
+              since: Any = None, until: Any = None, trap_type: Optional[str] = None,
+              ip: Optional[str] = None, q: Optional[str] = None) -> Dict:
+        """
+        עמוד אירועים מסונן.
+        - בלי after: מהחדש לישן; cursor מהתשובה הקודמת ממשיך לעמוד הבא (next_cursor).
+        - עם after=<latest מתשובה קודמת>: רק אירועים שנקלטו מאז, לפי סדר קליטה.
+        """
+        limit = max(1, int(limit))
+        since_k = _cmp_time(since) if since else None
+        until_k = _cmp_time(until) if until else None
+        tt = _normalize_trap(trap_type)
+        ip = (ip or "").strip() or None
+        needle = (q or "").strip().lower() or None
+
+        def ok(event: Dict) -> bool:
+            if not _matches(event, since_k, until_k, tt, ip):
+                return False
+            if needle:
+                hay = " ".join(str(event.get(k) or "") for k in ("input", "src_ip", "trap_type", "username"))
+                return needle in hay.lower()
+            return True
+
+        with self._lock:
+            self._refresh()
+            out: List[Dict] = []
+            reset = after is not None and int(after) > self._seq
+            if reset:
+                after = None    # האינדקס נבנה מחדש (למשל אחרי restart) - מתחילים מהעמוד הראשון
+            if after is not None:
+                start = bisect.bisect_right(self._log, int(after), key=lambda en: en[1])
+                latest = self._seq
+                for en in self._log[start:]:
+                    if ok(en[2]):
+                        if len(out) == limit:
+                            break
+                        out.append(en[2])
+                    latest = en[1]
+                else:
+                    latest = self._seq
+                return {"events": out, "next_cursor": None, "latest": latest,
+                        "has_more": latest < self._seq, "reset": False}
+
+            lo = bisect.bisect_left(self._entries, (since_k,)) if since_k else 0
+            hi = bisect.bisect_left(self._entries, (until_k + "\uffff",)) if until_k else len(self._entries)
+            if cursor:
+                hi = min(hi, bisect.bisect_left(self._entries, _decode_cursor(cursor)))
+            last = None
+            more = False
+            for i in range(hi - 1, lo - 1, -1):
+                en = self._entries[i]
+                if not ok(en[2]):
                     continue
-                # JSON
-                try:
-                    obj = json.loads(line)
-                    event = {
-                        "time": obj.get("time") or obj.get("timestamp"),
-                        "trap_type": obj.get("trap") or obj.get("trap_type"),
-                        "src_ip": obj.get("ip") or obj.get("src_ip"),
-                        "input": obj.get("input") or obj.get("details") or obj.get("action") or "",
-                    }
-                    events.append(event)
+                if len(out) == limit:
+                    more = True
+                    break
+                out.append(en[2])
+                last = en
+            return {
+                "events": out,
+                "next_cursor": _encode_cursor(last) if more and last else None,
+                "latest": self._seq,
+                "has_more": more,
+                "reset": reset,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._files.clear()
+            self._entries = []
+            self._log = []
+
+    def _refresh(self) -> None:
+        seen = set()
+        added: List[Tuple[str, int, Dict]] = []
+        dropped = False
+        for file, archives in _log_sources(self.logs_dir, self.patterns):
+            retired = None
+            try:
+                st = os.stat(file)
+            except FileNotFoundError:
+                st = None
+            state = self._files.get(file)
+            if st is None:
+                # הקובץ הפעיל סובב ועוד לא נוצר מחדש
+                if state is not None:
+                    retired = self._files.pop(file)
+            else:
+                seen.add(file)
+                if state is None or (state.dev, state.ino) != (st.st_dev, st.st_ino) or st.st_size < state.offset:
+                    # קובץ חדש / rotate / truncate
+                    if state is not None and (state.dev, state.ino) != (st.st_dev, st.st_ino):
+                        retired = state
+                    elif state is not None and state.entries:
+                        dropped = True
+                    state = self._files[file] = _FileState(st.st_dev, st.st_ino)
+                if st.st_size > state.offset:
+                    new_entries = self._read_new(file, state)
+                    state.entries.extend(new_entries)
+                    added.extend(new_entries)
+
+            # ארכיונים לא משתנים: נקראים פעם אחת. הארכיון שנוצר מה-rotation של
+            # הקובץ הפעיל יורש את הרשומות שכבר נקראו ממנו וממשיך מאותו offset
+            for _, _, path in archives:
+                key = _archive_key(path)
+                seen.add(key)
+                if key in self._files:
                     continue
-                except Exception:
-                    pass
-                # CSV
-                try:
-                    if line.count(",") >= 3:
-                        reader = csv.reader([line])
-                        row = next(reader)
-                        event = {
-                            "time": row[0],
-                            "trap_type": row[1],
-                            "src_ip": row[2],
-                            "input": row[3] if len(row) > 3 else "",
-                        }
-                        events.append(event)
-                        continue
-                except Exception:
-                    pass
-    events.sort(key=lambda e: e.get("time") or "", reverse=True)
-    return events
+                if retired is not None:
+                    # הארכיון החדש הראשון (לפי זמן) הוא הקובץ שהיה פעיל ב-refresh הקודם
+                    state, retired = retired, None
+                else:
+                    state = _FileState(0, 0)
+                self._files[key] = state
+                new_entries = self._read_archive(path, state)
+                state.entries.extend(new_entries)
+                added.extend(new_entries)
+            if retired is not None and retired.entries:
+                dropped = True
+
+        for file in list(self._files):
+            if file not in seen:
+                if self._files.pop(file).entries:
+                    dropped = True
+
+        if dropped:
+            merged = [en for st in self._files.values() for en in st.entries]
+            merged.sort()
+            self._entries = merged
+            self._log = sorted(merged, key=lambda en: en[1])
+        elif added:
+            added.sort()
+            if not self._entries or added[0] >= self._entries[-1]:
+                self._entries.extend(added)
+            else:
+                self._entries = list(heapq.merge(self._entries, added))
+            self._log.extend(sorted(added, key=lambda en: en[1]))
+
+    def _read_new(self, file: str, state: _FileState) -> List[Tuple[str, int, Dict]]:
+        with open(file, "rb") as f:
+            f.seek(state.offset)
+            chunk = f.read()
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            return []   # שורה חלקית - נחכה להשלמתה
+        state.offset += end + 1
+        return self._parse_chunk(chunk[: end + 1])
+
+    def _read_archive(self, path: Path, state: _FileState) -> List[Tuple[str, int, Dict]]:
+        try:
+            with open_archive(path, binary=True) as f:
+                chunk = f.read()
+        except FileNotFoundError:
+            return []
+        chunk = chunk[state.offset:]
+        state.offset += len(chunk)
+        return self._parse_chunk(chunk)
+
+    def _parse_chunk(self, chunk: bytes) -> List[Tuple[str, int, Dict]]:
+        entries = []
+        for raw in chunk.decode("utf-8", errors="replace").splitlines():
+            event = _parse_line(raw)
+            if event is not None:
+                event = _normalize(event)
+                self._seq += 1
+                entries.append((_cmp_time(event.get("time")), self._seq, event))
+        return entries
+
+
+def _encode_cursor(entry: Tuple[str, int, Dict]) -> str:
+    return base64.urlsafe_b64encode(f"{entry[0]}|{entry[1]}".encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> Tuple[str, int]:
+    try:
+        key, seq = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").rsplit("|", 1)
+        return key, int(seq)
+    except Exception:
+        raise ValueError("invalid cursor")
+
+
+def _log_files(logs_dir: Path, patterns: Tuple[str, ...] = ("*.log", "*.txt")) -> List[str]:
+    files: List[str] = []
+    for pattern in patterns:
+        files.extend(glob.glob(str(Path(logs_dir) / pattern)))
+    return files
+
+
+def _log_sources(logs_dir: Path, patterns: Tuple[str, ...] = ("*.log", "*.txt")
+                 ) -> List[Tuple[str, List[Tuple[float, float, Path]]]]:
+    """
+    כל קובץ לוג עם הארכיונים שלו (ממוינים לפי זמן): [(active_path, [(start, end, path)])].
+    קובץ שכרגע יש לו רק ארכיונים (ממש אחרי rotation) מופיע גם הוא.
+    """
+    bases = set(_log_files(logs_dir, patterns))
+    try:
+        names = os.listdir(logs_dir)
+    except FileNotFoundError:
+        names = []
+    for name in names:
+        parsed = parse_archive_name(name)
+        if parsed and any(fnmatch.fnmatch(parsed[0], p) for p in patterns):
+            bases.add(str(Path(logs_dir) / parsed[0]))
+    return [(b, list_archives(b)) for b in sorted(bases)]
+
+
+def _archive_key(path: Path) -> str:
+    """מזהה ארכיון בלי סיומת הדחיסה (אותו ארכיון לפני ואחרי הדחיסה)."""
+    s = str(path)
+    for ext in (".gz", ".zst"):
+        if s.endswith(ext):
+            return s[: -len(ext)]
+    return s
+
+
+# שמות הארכיונים ב-UTC אבל חלק מהמלכודות כותבות זמן מקומי - מרווח ביטחון בסינון
+ARCHIVE_TIME_SLACK = 86400
+
+
+def _archive_overlaps(start: float, end: float, since_k: Optional[str], until_k: Optional[str]) -> bool:
+    if since_k and _cmp_time(str(int(end + ARCHIVE_TIME_SLACK))) < since_k:
+        return False
+    if until_k and _cmp_time(str(max(0, int(start - ARCHIVE_TIME_SLACK))))[:len(until_k)] > until_k:
+        return False
+    return True
+
+
+def _cmp_time(value: Any) -> str:
+    """
+    מפתח השוואה לזמנים בפורמטים השונים של הלוגים:
+    ISO עם T/Z, "YYYY-MM-DD HH:MM:SS", או epoch בשניות.
+    """
+    s = str(value or "").strip()
+    if s.isdigit():
+        s = datetime.fromtimestamp(int(s), timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+    key = s[:19].replace("T", " ")
+    if s[19:20] == ".":
+        key += "." + s[20:].split("Z")[0].split("+")[0]
+    return key
+
+
+def _parse_line(line: str) -> Optional[Dict]:
+    line = line.strip()
+    if not line:
+        return None
+    # JSON
+    try:
+        obj = json.loads(line)
+        return {
+            "time": obj.get("time") or obj.get("timestamp"),
+            "trap_type": obj.get("trap") or obj.get("trap_type"),
+            "src_ip": obj.get("ip") or obj.get("src_ip"),
+            "input": obj.get("input") or obj.get("details") or obj.get("action") or "",
+        }
+    except Exception:
+        pass
+    # CSV
+    try:
+        if line.count(",") >= 3:
+            reader = csv.reader([line])
+            row = next(reader)
+            return {
+                "time": row[0],
+                "trap_type": row[1],
+                "src_ip": row[2],
+                "input": row[3] if len(row) > 3 else "",
+            }
+    except Exception:
+        pass
+    return None
+
+
+_INDEX = EventIndex(LOG_DIR)
+
+
+@_REPORT_SECONDS.labels("fetch_events").time()
+def _fetch_events():
+    flush_logs()   # שורות שעדיין בתור של ה-sink בתהליך הזה
+    return _INDEX.events()
+
+
+def data_version(logs_dir: Optional[Path] = None) -> Tuple:
+    """
+    גרסת הנתונים של הדוח: מונה הכתיבות של התהליך + (שם, גודל, mtime) של קבצי הלוג,
+    כדי לזהות גם כתיבות של תהליכים אחרים (aws_listener, ftp_server) ו-rotation.
+    """
+    files = []
+    try:
+        with os.scandir(logs_dir or LOG_DIR) as it:
+            for e in it:
+                if e.is_file():
+                    st = e.stat()
+                    files.append((e.name, st.st_size, st.st_mtime_ns))
+    except FileNotFoundError:
+        pass
+    return (log_generation(), tuple(sorted(files)))
+
+
+def query_events(**kwargs: Any) -> Dict:
+    """עמוד מסונן מתוך האינדקס (ראו EventIndex.query)."""
+    flush_logs()
+    return _INDEX.query(**kwargs)
 
 # נירמול סוגי טראפים לשמות אחידים
 TRAP_ALIASES = {
@@ -89,22 +397,146 @@ TRAP_ALIASES = {
 
 
 
+def _normalize(r: Dict) -> Dict:
+    rr = {**r}
+    tt = (rr.get("trap_type") or "").lower()
+    rr["trap_type"] = TRAP_ALIASES.get(tt, tt)
+    rr.setdefault("username", "")
+    rr.setdefault("details", "")
+    return rr
+
+
+def _normalize_trap(trap_type: Optional[str]) -> Optional[str]:
+    if not trap_type:
+        return None
+    tt = trap_type.strip().lower()
+    return TRAP_ALIASES.get(tt, tt)
+
+
+def _matches(event: Dict, since: Optional[str], until: Optional[str],
+             trap_type: Optional[str], ip: Optional[str]) -> bool:
+    if trap_type and event.get("trap_type") != trap_type:
+        return False
+    if ip and (event.get("src_ip") or "").strip() != ip:
+        return False
+    if since or until:
+        t = _cmp_time(event.get("time"))
+        if since and t < since:
+            return False
+        # until כולל: "2025-01-02" מכסה את כל היום
+        if until and t[:len(until)] > until:
+            return False
+    return True
+
+
+# מקור לדוחות: logs (קבצי הטקסט, ברירת מחדל) או store (ה-segments העמודתיים)
+REPORT_SOURCE = os.getenv("HONEY_REPORT_SOURCE", "logs").strip().lower()
+
+
+def iter_events(since: Any = None, until: Any = None, trap_type: Optional[str] = None,
+                ip: Optional[str] = None, logs_dir: Optional[Path] = None,
+                source: Optional[str] = None) -> Iterator[Dict]:
+    """
+    קורא את קבצי הלוג שורה-שורה ומחיל את הסינונים תוך כדי קריאה (זיכרון קבוע).
+    הסדר הוא לפי קובץ ואז לפי סדר הכתיבה - לא ממוין גלובלית.
+    ארכיונים דחוסים של כל קובץ נקראים לפניו, ורק אם טווח הזמן שלהם חופף ל-since/until.
+    source="store" סורק את ה-event store במקום לפענח שורות.
+    """
+    if (source or REPORT_SOURCE) == "store":
+        yield from iter_store_events(since, until, trap_type, ip)
+        return
+    flush_logs()
+    since_k = _cmp_time(since) if since else None
+    until_k = _cmp_time(until) if until else None
+    tt = _normalize_trap(trap_type)
+    ip = (ip or "").strip() or None
+    for file, archives in _log_sources(logs_dir or LOG_DIR):
+        # ארכיונים (רק אלה שהטווח שלהם חופף לשאילתה) ואז הקובץ הפעיל
+        paths = [p for start, end, p in archives if _archive_overlaps(start, end, since_k, until_k)]
+        for path in paths + [file]:
+            try:
+                f = open_archive(path)
+            except FileNotFoundError:
+                continue
+            with f:
+                for line in f:
+                    # סינון זול לפני פענוח השורה
+                    if ip and ip not in line:
+                        continue
+                    event = _parse_line(line)
+                    if event is None:
+                        continue
+                    event = _normalize(event)
+                    if _matches(event, since_k, until_k, tt, ip):
+                        yield event
+
+
+def _bound_us(value: Any, upper: bool) -> Optional[int]:
+    """גבול זמן במיקרו-שניות; upper מרחיב לסוף היחידה ("2025-01-02" -> סוף היום)."""
+    if not value:
+        return None
+    key = _cmp_time(value)
+    try:
+        dt = datetime.fromisoformat(key)
+    except ValueError:
+        raise ValueError(f"invalid time: {value}")
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    us = int(dt.timestamp()) * 1_000_000 + dt.microsecond
+    if upper and "." not in key:
+        us += {10: 86_400, 13: 3_600, 16: 60}.get(len(key), 1) * 1_000_000 - 1
+    return us
+
+
+def iter_store_events(since: Any = None, until: Any = None, trap_type: Optional[str] = None,
+                      ip: Optional[str] = None, store_dir: Optional[Path] = None) -> Iterator[Dict]:
+    """אירועים מה-event store, באותה צורה כמו iter_events (בלי פענוח JSON/CSV)."""
+    event_store.flush()
+    tt = _normalize_trap(trap_type)
+    # ה-store שומר את trap_type כפי שהגיע - מסננים לפי כל הכינויים של אותו סוג
+    names = {a for a, n in TRAP_ALIASES.items() if n == tt} | {tt} if tt else None
+    reader = event_store.StoreReader(store_dir or event_store.STORE_DIR)
+    for row in reader.scan(_bound_us(since, False), _bound_us(until, True), names, (ip or "").strip() or None):
+        ts = datetime.fromtimestamp(row["ts_us"] / 1_000_000, timezone.utc)
+        yield _normalize({
+            "time": ts.isoformat(timespec="microseconds").replace("+00:00", "Z"),
+            "trap_type": row["trap_type"],
+            "src_ip": row["ip"],
+            "input": row["input"],
+        })
+
+
 def get_events_for_report() -> List[Dict]:
-    rows = _fetch_events()
-    out = []
-    for r in rows:
-        rr = {**r}
-        tt = (rr.get("trap_type") or "").lower()
-        rr["trap_type"] = TRAP_ALIASES.get(tt, tt)
-        rr.setdefault("username", "")
-        rr.setdefault("details", "")
-        out.append(rr)
-    return out
+    """אירועים מנורמלים, מהחדש לישן. הדיקטים משותפים לאינדקס - לא לשנות אותם."""
+    return _fetch_events()
+
+
+CSV_FIELDS = ["time", "src_ip", "trap_type", "action", "username", "details"]
+
+
+def iter_csv(chunk_rows: int = 500, **filters: Any) -> Iterator[str]:
+    """
+    ייצוא CSV בסטרימינג: מחזיר את הכותרת ואז חתיכות של עד chunk_rows שורות.
+    filters מועברים ל-iter_events (since/until/trap_type/ip).
+    """
+    buf = StringIO()
+    writer = csv.DictWriter(buf, fieldnames=CSV_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    n = 0
+    for r in iter_events(**filters):
+        writer.writerow(r)
+        n += 1
+        if n >= chunk_rows:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+            n = 0
+    yield buf.getvalue()
 
 
 def export_csv() -> str:
     rows = get_events_for_report()
-    fieldnames = ["time", "src_ip", "trap_type", "action", "username", "details"]
+    fieldnames = CSV_FIELDS
     buf = StringIO()
     writer = csv.DictWriter(buf, fieldnames=fieldnames, extrasaction="ignore")
     writer.writeheader()
@@ -113,52 +545,182 @@ def export_csv() -> str:
     return buf.getvalue()
 
 
-def export_pdf() -> bytes:
+# PDF: עמוד סיכום מהמונים המצטברים ואז פירוט חסום (max_rows) - זמן ייצור חסום גם בלוגים ענקיים
+PDF_MAX_ROWS = int(os.getenv("HONEY_PDF_MAX_ROWS", "2000"))
+PDF_ROWS_LIMIT = 50_000
+PDF_TIMELINE_BARS = 48
+
+
+def _ip_summary(since: Any, until: Any, trap_type: Optional[str], ip: str,
+                top: int) -> Tuple[List[Tuple[str, int]], List[Dict[str, Any]], List[Tuple[str, int]]]:
+    """ה-rollups לא מפולחים לפי IP: מעבר אחד על האירועים של ה-IP (iter_events מסנן לפני פענוח)."""
+    by_trap: Dict[str, int] = {}
+    hours: Dict[str, int] = {}
+    users: Dict[str, int] = {}
+    for e in iter_events(since, until, trap_type, ip):
+        by_trap[e["trap_type"]] = by_trap.get(e["trap_type"], 0) + 1
+        hour = _cmp_time(e.get("time"))[:13]
+        hours[hour] = hours.get(hour, 0) + 1
+        if e.get("username"):
+            users[e["username"]] = users.get(e["username"], 0) + 1
+    series = [{"time": h, "count": c} for h, c in sorted(hours.items())]
+    return (sorted(by_trap.items(), key=lambda kv: -kv[1]), series,
+            sorted(users.items(), key=lambda kv: -kv[1])[:top])
+
+
+def pdf_summary(since: Any = None, until: Any = None, trap_type: Optional[str] = None,
+                ip: Optional[str] = None, top: int = 10) -> Dict[str, Any]:
+    """
+    נתוני עמוד הסיכום מתוך rollups (O(buckets), בלי לעבור על האירועים).
+    עם ip - מהאירועים של אותו IP בלבד, כדי שהסיכום יתאים ל-Scope של הדוח.
+    """
+    ip = (ip or "").strip() or None
+    if ip:
+        traps, series, usernames = _ip_summary(since, until, trap_type, ip, top)
+        return _summary(traps, series, [(ip, sum(c for _, c in traps))] if traps else [], usernames)
+    r = rollups.current()
+    tt = _normalize_trap(trap_type)
+    if since or until or tt:
+        series = r.timeseries("hour", rollups.to_epoch(since), rollups.to_epoch(until), tt)
+        by_trap: Dict[str, int] = {}
+        for point in series:
+            for k, c in point["by_trap"].items():
+                by_trap[k] = by_trap.get(k, 0) + c
+        traps = sorted(by_trap.items(), key=lambda kv: -kv[1])
+    else:
+        series = r.timeseries("hour")
+        traps = [(t["key"], t["count"]) for t in r.top("trap", 100)]
+    return _summary(traps, series, [(t["key"], t["count"]) for t in r.top("ip", top)],
+                    [(t["key"], t["count"]) for t in r.top("username", top)])
+
+
+def _summary(traps: List[Tuple[str, int]], series: List[Dict[str, Any]],
+             top_ips: List[Tuple[str, int]], top_usernames: List[Tuple[str, int]]) -> Dict[str, Any]:
+    # יותר מדי נקודות - איחוד לפי יום
+    timeline = [(p["time"][:13].replace("T", " ") + "h", p["count"]) for p in series]
+    if len(timeline) > PDF_TIMELINE_BARS:
+        days: Dict[str, int] = {}
+        for p in series:
+            days[p["time"][:10]] = days.get(p["time"][:10], 0) + p["count"]
+        timeline = list(days.items())
+    return {
+        "total": sum(c for _, c in traps),
+        "by_trap": traps,
+        "top_ips": top_ips,
+        "top_usernames": top_usernames,
+        "timeline": timeline[-PDF_TIMELINE_BARS:],
+    }
+
+
+def _iter_report_rows(max_rows: int, **filters: Any) -> Iterator[Dict]:
+    """שורות הפירוט מהאינדקס, מהחדש לישן, בעמודים - עוצר אחרי max_rows."""
+    cursor = None
+    left = max_rows
+    while left > 0:
+        page = query_events(cursor=cursor, limit=min(500, left), **filters)
+        yield from page["events"]
+        left -= len(page["events"])
+        cursor = page["next_cursor"]
+        if not cursor:
+            return
+
+
+@_REPORT_SECONDS.labels("pdf").time()
+def write_pdf(out: BinaryIO, since: Any = None, until: Any = None, trap_type: Optional[str] = None,
+              ip: Optional[str] = None, max_rows: int = PDF_MAX_ROWS) -> int:
+    """
+    כותב את הדוח ל-out (קובץ / SpooledTemporaryFile). מחזיר כמה שורות פירוט נכתבו.
+    עמוד ראשון: סה"כ לפי מלכודת, IPs ושמות משתמש מובילים וציר זמן.
+    אחריו: עד max_rows אירועים אחרונים שעומדים בסינון.
+    """
     from reportlab.lib.pagesizes import A4
     from reportlab.pdfgen import canvas
     from reportlab.lib.units import cm
 
-    rows = get_events_for_report()
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
+    max_rows = max(0, min(int(max_rows), PDF_ROWS_LIMIT))
+    stats = pdf_summary(since, until, trap_type, ip)
+    c = canvas.Canvas(out, pagesize=A4, pageCompression=1)
     width, height = A4
+    scope = ", ".join(f"{k}={v}" for k, v in
+                      (("since", since), ("until", until), ("trap", trap_type), ("ip", ip)) if v) or "all events"
 
-    # כותרת
-    c.setFont("Helvetica-Bold", 14)
+    # עמוד סיכום
+    c.setFont("Helvetica-Bold", 16)
     c.drawString(2 * cm, height - 2 * cm, "Honeypot — Summary Report")
+    c.setFont("Helvetica", 9)
+    c.drawString(2 * cm, height - 2.6 * cm, f"Scope: {scope}"[:110])
+    c.drawString(2 * cm, height - 3.1 * cm,
+                 f"Generated {datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%SZ')}   Total events: {stats['total']}")
 
-    y = height - 3 * cm
-    headers = ["Time", "IP", "Trap", "Action", "User", "Details"]
-    xs = [1.5 * cm, 6 * cm, 9 * cm, 12 * cm, 15 * cm, 17 * cm]
+    def table(title: str, rows: List[Tuple[str, int]], x: float, y: float) -> None:
+        c.setFont("Helvetica-Bold", 11)
+        c.drawString(x, y, title)
+        c.setFont("Helvetica", 9)
+        for i, (k, n) in enumerate(rows[:10]):
+            c.drawString(x, y - (i + 1) * 0.5 * cm, str(k)[:32])
+            c.drawRightString(x + 7.5 * cm, y - (i + 1) * 0.5 * cm, str(n))
+        if not rows:
+            c.drawString(x, y - 0.5 * cm, "(none)")
 
-    # הדפסת כותרות הטבלה
-    c.setFont("Helvetica-Bold", 10)
-    for h, x in zip(headers, xs):
-        c.drawString(x, y, h)
+    top_y = height - 4.3 * cm
+    table("Events by trap", stats["by_trap"], 2 * cm, top_y)
+    # בלי ip הטבלאות האלה מהמונים הכוללים, לא מהסינון
+    scope_note = "" if ip else " (all time)"
+    table(f"Top source IPs{scope_note}", stats["top_ips"], 11 * cm, top_y)
+    table(f"Top usernames{scope_note}", stats["top_usernames"], 2 * cm, top_y - 6.5 * cm)
 
-    # הדפסת שורות
-    c.setFont("Helvetica", 9)
-    y -= 0.6 * cm
-    for r in rows:
-        values = [
-            r.get("time", ""),
-            r.get("src_ip", ""),
-            r.get("trap_type", ""),
-            r.get("action", ""),
-            r.get("username", ""),
-            (r.get("details", "") or "")[:60],
-        ]
-        for v, x in zip(values, xs):
-            c.drawString(x, y, str(v))
-        y -= 0.55 * cm
+    # ציר זמן - עמודות
+    timeline = stats["timeline"]
+    chart_x, chart_y, chart_w, chart_h = 2 * cm, 3 * cm, width - 4 * cm, 6 * cm
+    c.setFont("Helvetica-Bold", 11)
+    c.drawString(chart_x, chart_y + chart_h + 0.6 * cm, "Timeline")
+    c.line(chart_x, chart_y, chart_x + chart_w, chart_y)
+    if timeline:
+        peak = max(n for _, n in timeline) or 1
+        bar_w = chart_w / len(timeline)
+        c.setFont("Helvetica", 6)
+        for i, (label, n) in enumerate(timeline):
+            h = chart_h * n / peak
+            c.rect(chart_x + i * bar_w + 1, chart_y, max(1.0, bar_w - 2), h, stroke=0, fill=1)
+            if i == 0 or i == len(timeline) - 1 or i % max(1, len(timeline) // 6) == 0:
+                c.drawString(chart_x + i * bar_w, chart_y - 0.4 * cm, label)
+        c.drawString(chart_x, chart_y + chart_h + 0.1 * cm, f"peak {peak}")
+    c.showPage()
+
+    # פירוט
+    headers = ["Time", "IP", "Trap", "User", "Input"]
+    xs = [1.5 * cm, 5.8 * cm, 9 * cm, 11.6 * cm, 14.2 * cm]
+    limits = [26, 20, 16, 16, 40]
 
+    def header() -> float:
+        c.setFont("Helvetica-Bold", 10)
+        for h, x in zip(headers, xs):
+            c.drawString(x, height - 2 * cm, h)
+        c.setFont("Helvetica", 8)
+        return height - 2.6 * cm
+
+    y = header()
+    written = 0
+    for r in _iter_report_rows(max_rows, since=since, until=until, trap_type=trap_type, ip=ip):
+        values = [r.get("time"), r.get("src_ip"), r.get("trap_type"), r.get("username"),
+                  r.get("input") or r.get("details")]
+        for v, x, n in zip(values, xs, limits):
+            c.drawString(x, y, str(v or "").strip()[:n])
+        written += 1
+        y -= 0.45 * cm
         if y < 2 * cm:
             c.showPage()
-            y = height - 2 * cm
-            c.setFont("Helvetica", 9)
-
+            y = header()
+    c.setFont("Helvetica-Oblique", 8)
+    c.drawString(1.5 * cm, max(y, 1.2 * cm),
+                 f"{written} most recent matching events shown (cap {max_rows})." if written else "No matching events.")
     c.showPage()
     c.save()
-    pdf = buffer.getvalue()
-    buffer.close()
-    return pdf
+    return written
+
+
+def export_pdf(**filters: Any) -> bytes:
+    """הדוח כ-bytes (לשימוש בסקריפטים; ה-API כותב ל-spooled temp file)."""
+    buffer = BytesIO()
+    write_pdf(buffer, **filters)
+    return buffer.getvalue()
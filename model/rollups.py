@@ -0,0 +1,499 @@
+
+from __future__ import annotations
+import os
+import sys
+import json
+import time
+import atexit
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import fcntl       # lock על שם ה-snapshot; בלעדיו (Windows) אין איסוף של snapshots יתומים
+except ImportError:
+    fcntl = None
+
+from .logger import LOG_DIR
+
+
+ROLLUP_DIR = Path(os.getenv("HONEY_ROLLUP_DIR", str(LOG_DIR / "rollups")))
+# שם הבסיס של ה-snapshot (api_controller / aws_listener ...). התהליך שמחזיק את ה-lock של השם
+# כותב ל-<name>.json; תהליך נוסף באותו שם (reloader של Flask, worker אחרי fork) כותב ל-<name>-<pid>.json
+ROLLUP_NAME = os.getenv("HONEY_ROLLUP_NAME") or Path(sys.argv[0] or "honeypot").stem or "honeypot"
+ROLLUP_SNAPSHOT_SECONDS = float(os.getenv("HONEY_ROLLUP_SNAPSHOT_SECONDS", "60"))
+ROLLUP_ENABLED = os.getenv("HONEY_ROLLUPS", "1").strip().lower() not in ("0", "false", "no", "off")
+
+BUCKETS = {"minute": 60, "hour": 3600}
+DIMENSIONS = ("trap", "ip", "username")
+
+
+def _username(input_data: Any) -> str:
+    """שם משתמש מתוך input של מלכודת: dict עם username/user, או 'USER x' של FTP."""
+    if isinstance(input_data, dict):
+        return str(input_data.get("username") or input_data.get("user") or "")
+    s = str(input_data or "").strip()
+    if s[:5].upper() == "USER ":
+        return s[5:].strip()
+    if s.startswith("{"):
+        try:
+            return _username(json.loads(s))
+        except ValueError:
+            return ""
+    return ""
+
+
+class Rollups:
+    """
+    מונים מצטברים לדשבורד (במקום לספור את כל האירועים בכל בקשה):
+    - סה"כ לפי מלכודת / IP / שם משתמש
+    - buckets של דקה ושעה, בכל bucket ספירה לפי מלכודת
+    - buckets ישנים נזרקים (minute_retention / hour_retention, במספר buckets)
+    - מוני IP/username מוגבלים ל-max_keys; מעבר לזה נזרקים הקטנים ביותר
+    """
+
+    def __init__(self, minute_retention: int = 24 * 60, hour_retention: int = 24 * 30,
+                 max_keys: int = 100_000):
+        self.retention = {"minute": minute_retention, "hour": hour_retention}
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self.totals: Dict[str, Counter] = {d: Counter() for d in DIMENSIONS}
+        self.series: Dict[str, Dict[int, Counter]] = {b: {} for b in BUCKETS}
+        self.count = 0
+
+    #  עדכון
+
+    def record(self, trap_type: str, ip: Optional[str], username: str = "",
+               ts: Optional[float] = None) -> None:
+        ts = time.time() if ts is None else ts
+        trap_type = trap_type or "unknown"
+        with self._lock:
+            self.count += 1
+            self.totals["trap"][trap_type] += 1
+            self.totals["ip"][ip or "unknown"] += 1
+            if username:
+                self.totals["username"][username] += 1
+            for bucket, width in BUCKETS.items():
+                start = int(ts) - int(ts) % width
+                series = self.series[bucket]
+                counts = series.get(start)
+                if counts is None:
+                    counts = series[start] = Counter()
+                    self._expire(bucket, start)
+                counts[trap_type] += 1
+            for dim in ("ip", "username"):
+                if len(self.totals[dim]) > self.max_keys:
+                    self.totals[dim] = Counter(dict(self.totals[dim].most_common(self.max_keys // 2)))
+
+    def record_event(self, event: Dict[str, Any]) -> None:
+        """listener ל-event_bus (מעטפת של TrapManager)."""
+        self.record(
+            event.get("trap_type") or event.get("trap") or "",
+            event.get("ip"),
+            _username(event.get("input")),
+            event.get("timestamp"),
+        )
+
+    def backfill(self, events: Iterable[Dict[str, Any]]) -> int:
+        """בנייה ראשונית מאירועים מנורמלים של report_generator (time/trap_type/src_ip/input)."""
+        from .report_generator import _normalize_trap
+        n = 0
+        for e in events:
+            self.record(_normalize_trap(e.get("trap_type")) or "", (e.get("src_ip") or "").strip() or None,
+                        e.get("username") or _username(e.get("input")), to_epoch(e.get("time")))
+            n += 1
+        return n
+
+    def _expire(self, bucket: str, newest: int) -> None:
+        horizon = newest - self.retention[bucket] * BUCKETS[bucket]
+        series = self.series[bucket]
+        if len(series) > self.retention[bucket]:
+            for start in [s for s in series if s <= horizon]:
+                del series[start]
+
+    #  שאילתות
+
+    def timeseries(self, bucket: str = "minute", since: Optional[float] = None,
+                   until: Optional[float] = None, trap_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        if bucket not in BUCKETS:
+            raise ValueError(f"bucket must be one of {tuple(BUCKETS)}")
+        with self._lock:
+            items = sorted(self.series[bucket].items())
+        out = []
+        for start, counts in items:
+            if since is not None and start + BUCKETS[bucket] <= since:
+                continue
+            if until is not None and start > until:
+                continue
+            count = counts.get(trap_type, 0) if trap_type else sum(counts.values())
+            if not count:
+                continue
+            out.append({"time": _iso(start), "count": count,
+                        "by_trap": {trap_type: count} if trap_type else dict(counts)})
+        return out
+
+    def top(self, dimension: str = "trap", limit: int = 10) -> List[Dict[str, Any]]:
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"dimension must be one of {DIMENSIONS}")
+        with self._lock:
+            items = self.totals[dimension].most_common(limit)
+        return [{"key": k, "count": c} for k, c in items]
+
+    #  snapshots
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "version": 1,
+                "saved_at": int(time.time()),
+                "count": self.count,
+                "totals": {d: dict(c) for d, c in self.totals.items()},
+                "series": {b: {str(s): dict(c) for s, c in series.items()} for b, series in self.series.items()},
+            }
+
+    def restore(self, snap: Dict[str, Any]) -> None:
+        with self._lock:
+            self._merge_locked(snap)
+
+    def merged_with(self, other: "Rollups") -> "Rollups":
+        """עותק של המונים של התהליך + Rollups אחר (מבט ה-peers השמור)."""
+        out = Rollups(self.retention["minute"], self.retention["hour"], self.max_keys)
+        for src in (other, self):
+            with src._lock:
+                out.count += src.count
+                for dim, counts in src.totals.items():
+                    out.totals[dim].update(counts)
+                for bucket, series in src.series.items():
+                    for start, counts in series.items():
+                        out.series[bucket].setdefault(start, Counter()).update(counts)
+        return out
+
+    def unmerge(self, snap: Dict[str, Any]) -> None:
+        """מחסיר snapshot שמוזג קודם (snapshot של peer שהתעדכן או נמחק)."""
+        with self._lock:
+            self._merge_locked(snap, -1)
+
+    def merged(self, snaps: Iterable[Dict[str, Any]]) -> "Rollups":
+        """עותק שמאחד את המונים של התהליך הזה עם snapshots של תהליכים אחרים."""
+        out = Rollups(self.retention["minute"], self.retention["hour"], self.max_keys)
+        out.restore(self.snapshot())
+        for snap in snaps:
+            out.restore(snap)
+        return out
+
+    def save(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, separators=(",", ":"))
+        os.replace(tmp, path)
+
+    def _merge_locked(self, snap: Dict[str, Any], sign: int = 1) -> None:
+        self.count += sign * int(snap.get("count", 0))
+        for dim, counts in (snap.get("totals") or {}).items():
+            if dim in self.totals:
+                _apply(self.totals[dim], counts, sign)
+        for bucket, series in (snap.get("series") or {}).items():
+            if bucket not in self.series:
+                continue
+            for start, counts in series.items():
+                target = self.series[bucket].setdefault(int(start), Counter())
+                _apply(target, counts, sign)
+                if not target:
+                    del self.series[bucket][int(start)]
+
+
+def _apply(target: Counter, counts: Dict[str, int], sign: int) -> None:
+    if sign > 0:
+        target.update(counts)
+        return
+    target.subtract(counts)
+    for k in counts:
+        if target.get(k, 0) <= 0:
+            target.pop(k, None)
+
+
+def _iso(ts: int) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def to_epoch(value: Any) -> Optional[float]:
+    """זמן מהלוגים (ISO / 'YYYY-MM-DD HH:MM:SS' / epoch) לשניות; None אם לא מזוהה."""
+    s = str(value or "").strip()
+    if not s:
+        return None
+    if s.isdigit():
+        return float(s)
+    try:
+        dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+#  rollups משותפים לתהליך
+
+_rollups: Optional[Rollups] = None
+_rollups_lock = threading.Lock()
+_saver: Optional[threading.Thread] = None
+_name: Optional[str] = None
+_lock_file: Any = None
+_forked = False
+
+
+def _try_lock(name: str) -> Any:
+    """lock בלעדי על <name>.lock; מוחזק כל חיי התהליך. None - תהליך חי אחר מחזיק אותו."""
+    if fcntl is None:
+        return True
+    ROLLUP_DIR.mkdir(parents=True, exist_ok=True)
+    f = open(ROLLUP_DIR / f"{name}.lock", "a+")
+    try:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+def process_name() -> str:
+    """
+    שם ה-snapshot של התהליך: ROLLUP_NAME למי שמחזיק את ה-lock שלו, אחרת ROLLUP_NAME-<pid>.
+    child אחרי fork תמיד מקבל שם משלו ומתחיל ריק (לא משחזר snapshot של ההורה או של worker אחר).
+    """
+    global _name, _lock_file
+    if _name is None:
+        with _rollups_lock:
+            if _name is None:
+                lock = None if _forked else _try_lock(ROLLUP_NAME)
+                if lock is not None:
+                    _lock_file, _name = lock, ROLLUP_NAME
+                else:
+                    name = f"{ROLLUP_NAME}-{os.getpid()}"
+                    _lock_file, _name = _try_lock(name), name
+    return _name
+
+
+def _owner() -> bool:
+    return process_name() == ROLLUP_NAME and fcntl is not None
+
+
+def snapshot_path(name: Optional[str] = None) -> Path:
+    return ROLLUP_DIR / f"{name or process_name()}.json"
+
+
+def _load(path: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _orphans() -> List[Tuple[Path, Any]]:
+    """snapshots של <name>-<pid> שהתהליך שלהם מת (ה-lock שלהם פנוי), עם ה-lock שנתפס."""
+    out = []
+    for p in ROLLUP_DIR.glob(f"{ROLLUP_NAME}-*.json"):
+        lock = _try_lock(p.stem)
+        if lock is not None:
+            out.append((p, lock))
+    return out
+
+
+def _absorb_orphans(r: Rollups) -> List[Tuple[Path, Any]]:
+    orphans = _orphans()
+    for p, _ in orphans:
+        snap = _load(p)
+        if snap:
+            r.restore(snap)
+    return orphans
+
+
+def _drop(orphans: List[Tuple[Path, Any]]) -> None:
+    # רק אחרי שה-snapshot של הבעלים (שכולל אותם) נשמר
+    for p, lock in orphans:
+        for path in (p, p.with_suffix(".lock")):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+        lock.close()
+
+
+def get_rollups() -> Rollups:
+    """
+    המונים של התהליך. בעל השם משחזר את ה-snapshot שלו ואוסף snapshots של תהליכים מתים
+    באותו שם (workers, reloader); תהליך נוסף מתחיל ריק.
+    """
+    global _rollups
+    if _rollups is None:
+        owner = _owner()
+        orphans: List[Tuple[Path, Any]] = []
+        with _rollups_lock:
+            if _rollups is None:
+                r = Rollups()
+                if owner:
+                    snap = _load(snapshot_path())
+                    if snap:
+                        r.restore(snap)
+                    orphans = _absorb_orphans(r)
+                _rollups = r
+        if orphans:
+            save()
+            _drop(orphans)
+    return _rollups
+
+
+class _PeerView:
+    """
+    איחוד ה-snapshots של שאר התהליכים, נשמר בזיכרון לפי (path, mtime):
+    קובץ שלא השתנה לא נקרא שוב, וקובץ שהשתנה מוחסר וממוזג מחדש.
+    """
+
+    def __init__(self):
+        self.root: Optional[Path] = None
+        self.files: Dict[Path, Tuple[int, Dict[str, Any]]] = {}
+        self.view = Rollups()
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def refresh(self, own: Path) -> Tuple[Rollups, int]:
+        with self._lock:
+            if self.root != ROLLUP_DIR:
+                self.root, self.files, self.view = ROLLUP_DIR, {}, Rollups()
+                self.version += 1
+            seen = {}
+            for p in ROLLUP_DIR.glob("*.json"):
+                if p == own:
+                    continue
+                try:
+                    seen[p] = p.stat().st_mtime_ns
+                except OSError:
+                    continue
+            for p in [p for p in self.files if p not in seen]:
+                self.view.unmerge(self.files.pop(p)[1])
+                self.version += 1
+            for p, mtime in seen.items():
+                old = self.files.get(p)
+                if old is not None and old[0] == mtime:
+                    continue
+                snap = _load(p)
+                if snap is None:
+                    continue
+                if old is not None:
+                    self.view.unmerge(old[1])
+                self.view.restore(snap)
+                self.files[p] = (mtime, snap)
+                self.version += 1
+            return self.view, self.version
+
+
+_peers = _PeerView()
+_current: Optional[Tuple[Tuple[int, int, int], Rollups]] = None
+
+
+def peer_snapshots() -> List[Dict[str, Any]]:
+    """snapshots של תהליכים אחרים שכותבים לאותה תיקייה (למשל aws_listener)."""
+    _peers.refresh(snapshot_path())
+    return [snap for _, snap in _peers.files.values()]
+
+
+def current() -> Rollups:
+    """
+    מבט מאוחד: המונים החיים של התהליך + snapshots של השאר. המבט נבנה מחדש רק כשקובץ peer
+    השתנה או כשנוספו אירועים מקומיים.
+    """
+    global _current
+    live = get_rollups()
+    view, version = _peers.refresh(snapshot_path())
+    if not _peers.files:
+        return live
+    key = (id(live), version, live.count)
+    cached = _current
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    merged = live.merged_with(view)
+    _current = (key, merged)
+    return merged
+
+
+def backfill_if_empty(events: Callable[[], Iterable[Dict[str, Any]]]) -> int:
+    """בהפעלה הראשונה (אין snapshot לאף תהליך) - בנייה מהלוגים הקיימים."""
+    if not ROLLUP_ENABLED or any(ROLLUP_DIR.glob("*.json")):
+        return 0
+    r = get_rollups()
+    n = r.backfill(events())
+    save()
+    return n
+
+
+def save() -> None:
+    if _rollups is not None:
+        try:
+            _rollups.save(snapshot_path())
+        except OSError as e:
+            print(f"Failed to save rollup snapshot: {e}")
+
+
+def _collect_orphans() -> None:
+    # workers שמתו (prefork) - הבעלים לוקח את המונים שלהם ומוחק את הקבצים
+    if _rollups is not None and _owner():
+        orphans = _absorb_orphans(_rollups)
+        if orphans:
+            save()
+            _drop(orphans)
+
+
+def _save_loop() -> None:
+    while True:
+        time.sleep(ROLLUP_SNAPSHOT_SECONDS)
+        _collect_orphans()
+        save()
+
+
+def _on_event(event: Dict[str, Any]) -> None:
+    # נפתר בכל קריאה כדי שאחרי fork ה-child יספור למונים שלו
+    get_rollups().record_event(event)
+    _ensure_saver()
+
+
+def _ensure_saver() -> None:
+    global _saver
+    if _saver is not None and _saver.is_alive():
+        return
+    with _rollups_lock:
+        if _saver is None or not _saver.is_alive():
+            _saver = threading.Thread(target=_save_loop, name="honeypot-rollups", daemon=True)
+            _saver.start()
+
+
+def attach(bus: Any) -> bool:
+    """רושם את המונים כ-listener על ה-event_bus ומפעיל snapshots מחזוריים (פעם אחת)."""
+    if not ROLLUP_ENABLED:
+        return False
+    # תופסים את השם לפני fork אפשרי, כך ש-workers לא יתחרו עליו
+    process_name()
+    if _on_event not in getattr(bus, "_listeners", []):
+        bus.add_listener(_on_event)
+    _ensure_saver()
+    return True
+
+
+def _reset_after_fork() -> None:
+    global _rollups, _rollups_lock, _saver, _name, _lock_file, _forked, _peers, _current
+    _rollups = None
+    _rollups_lock = threading.Lock()
+    _saver = None
+    # ה-lock של ההורה נשאר שלו; ל-child שם ו-snapshot משלו
+    if _lock_file is not None and _lock_file is not True:
+        _lock_file.close()
+    _name, _lock_file, _forked = None, None, True
+    _peers, _current = _PeerView(), None
+
+
+atexit.register(save)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,286 @@
+
+from __future__ import annotations
+import os
+import json
+import time
+import heapq
+import atexit
+import threading
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from .logger import LOG_DIR, write_line
+from .sketches import extract
+
+
+SESSION_TIMEOUT = float(os.getenv("HONEY_SESSION_TIMEOUT", "1800"))
+SESSION_MAX_ACTIVE = int(os.getenv("HONEY_SESSION_MAX_ACTIVE", "100000"))
+SESSION_STORE = Path(os.getenv("HONEY_SESSION_STORE", str(LOG_DIR / "sessions" / "sessions.jsonl")))
+SESSION_ENABLED = os.getenv("HONEY_SESSIONS", "1").strip().lower() not in ("0", "false", "no", "off")
+
+MAX_USERNAMES = 20
+
+
+class Session:
+    """רצף אירועים של IP אחד עד שעובר timeout בלי פעילות."""
+
+    __slots__ = ("ip", "first_seen", "last_seen", "events", "traps", "trap_counts",
+                 "credential_attempts", "usernames", "ports")
+
+    def __init__(self, ip: str, ts: float):
+        self.ip = ip
+        self.first_seen = ts
+        self.last_seen = ts
+        self.events = 0
+        self.traps: List[str] = []            # לפי סדר הנגיעה הראשונה (kill chain)
+        self.trap_counts: Dict[str, int] = {}
+        self.credential_attempts = 0
+        self.usernames: List[str] = []
+        self.ports: List[int] = []
+
+    @property
+    def id(self) -> str:
+        return f"{self.ip}-{int(self.first_seen)}"
+
+    def add(self, trap_type: str, values: Dict[str, str], port: Optional[int], ts: float) -> None:
+        self.events += 1
+        self.last_seen = max(self.last_seen, ts)
+        if trap_type not in self.trap_counts:
+            self.traps.append(trap_type)
+            self.trap_counts[trap_type] = 0
+        self.trap_counts[trap_type] += 1
+        if values.get("username") or values.get("password"):
+            self.credential_attempts += 1
+            user = values.get("username")
+            if user and user not in self.usernames and len(self.usernames) < MAX_USERNAMES:
+                self.usernames.append(user)
+        if port is not None and port not in self.ports:
+            self.ports.append(port)
+
+    def record(self, state: str) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "ip": self.ip,
+            "state": state,
+            "first_seen": int(self.first_seen),
+            "last_seen": int(self.last_seen),
+            "duration": int(self.last_seen - self.first_seen),
+            "events": self.events,
+            "traps": list(self.traps),
+            "trap_counts": dict(self.trap_counts),
+            "credential_attempts": self.credential_attempts,
+            "usernames": list(self.usernames),
+            "ports": sorted(self.ports),
+        }
+
+
+class Sessionizer:
+    """
+    קיבוץ אירועים לפי IP עם inactivity timeout:
+    - sessions פעילים ב-dict לפי IP + heap של (last_seen, ip) לתפוגה (רשומות עצלות,
+      עד פי 4 ממספר ה-sessions הפעילים)
+    - session שנסגר נכתב כשורת JSON ל-store (דרך ה-log sink) ונשמר גם
+      בהיסטוריה קצרה בזיכרון לכל IP, כך שתצוגת kill chain היא lookup לפי מפתח
+    """
+
+    def __init__(self, timeout: float = SESSION_TIMEOUT, max_active: int = SESSION_MAX_ACTIVE,
+                 store: Optional[Path] = SESSION_STORE, history_ips: int = 50_000, history_per_ip: int = 10):
+        self.timeout = timeout
+        self.max_active = max_active
+        self.store = store
+        self.active: Dict[str, Session] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._history: "OrderedDict[str, Deque[Dict[str, Any]]]" = OrderedDict()
+        self._history_ips = history_ips
+        self._history_per_ip = history_per_ip
+        self._lock = threading.Lock()
+        self.closed = 0
+
+    def add_event(self, event: Dict[str, Any]) -> None:
+        """listener ל-event_bus (מעטפת של TrapManager)."""
+        ip = str(event.get("ip") or "").strip()
+        if not ip or ip == "unknown":
+            return
+        ts = float(event.get("timestamp") or time.time())
+        data = event.get("input")
+        port = None
+        if isinstance(data, dict) and str(data.get("port", "")).isdigit():
+            port = int(data["port"])
+        self.add(ip, event.get("trap_type") or "unknown", extract(event), port, ts)
+
+    def add(self, ip: str, trap_type: str, values: Dict[str, str], port: Optional[int], ts: float) -> None:
+        with self._lock:
+            self._expire_locked(ts)
+            s = self.active.get(ip)
+            if s is None:
+                s = self.active[ip] = Session(ip, ts)
+                prev = None
+            else:
+                prev = s.last_seen
+            s.add(trap_type, values, port, ts)
+            if s.last_seen != prev:
+                heapq.heappush(self._heap, (s.last_seen, ip))
+                # רשומות ישנות נשארות עד שהן בשלות; בסערת סריקות בונים מחדש (כמו SpaceSaving)
+                if len(self._heap) > 4 * len(self.active) + 64:
+                    self._heap = [(v.last_seen, k) for k, v in self.active.items()]
+                    heapq.heapify(self._heap)
+            while len(self.active) > self.max_active:
+                self._close_locked(self._pop_oldest())
+
+    def expire(self, now: Optional[float] = None) -> int:
+        """סוגר sessions שעבר עליהם timeout. מחזיר כמה נסגרו."""
+        with self._lock:
+            return self._expire_locked(time.time() if now is None else now)
+
+    def close_all(self) -> None:
+        with self._lock:
+            for ip in list(self.active):
+                self._close_locked(ip)
+            self._heap = []
+
+    def lookup(self, ip: str) -> Dict[str, Any]:
+        with self._lock:
+            s = self.active.get(ip)
+            return {
+                "ip": ip,
+                "active": s.record("active") if s else None,
+                "history": list(reversed(self._history.get(ip, ()))),
+            }
+
+    def list(self, limit: int = 100, state: Optional[str] = None) -> List[Dict[str, Any]]:
+        """sessions אחרונים (פעילים ו/או סגורים), מהחדש לישן לפי last_seen."""
+        with self._lock:
+            out: List[Dict[str, Any]] = []
+            if state in (None, "active"):
+                out.extend(s.record("active") for s in heapq.nlargest(
+                    limit, self.active.values(), key=lambda s: s.last_seen))
+            if state in (None, "closed"):
+                out.extend(rec for hist in self._history.values() for rec in hist)
+        out.sort(key=lambda r: r["last_seen"], reverse=True)
+        return out[:limit]
+
+    def load_history(self) -> int:
+        """טוען את ההיסטוריה הקצרה מה-store (בהפעלה)."""
+        if self.store is None or not self.store.exists():
+            return 0
+        n = 0
+        with open(self.store, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(rec, dict) and rec.get("ip"):
+                    with self._lock:
+                        self._remember_locked(rec)
+                    n += 1
+        return n
+
+    #  פנימי
+
+    def _expire_locked(self, now: float) -> int:
+        n = 0
+        while self._heap and self._heap[0][0] + self.timeout < now:
+            last_seen, ip = heapq.heappop(self._heap)
+            s = self.active.get(ip)
+            if s is not None and s.last_seen == last_seen:
+                self._close_locked(ip)
+                n += 1
+        return n
+
+    def _pop_oldest(self) -> str:
+        while True:
+            last_seen, ip = heapq.heappop(self._heap)
+            s = self.active.get(ip)
+            if s is not None and s.last_seen == last_seen:
+                return ip
+
+    def _close_locked(self, ip: str) -> None:
+        s = self.active.pop(ip, None)
+        if s is None:
+            return
+        rec = s.record("closed")
+        self.closed += 1
+        self._remember_locked(rec)
+        if self.store is not None:
+            write_line(self.store, json.dumps(rec, separators=(",", ":")))
+
+    def _remember_locked(self, rec: Dict[str, Any]) -> None:
+        ip = rec["ip"]
+        hist = self._history.get(ip)
+        if hist is None:
+            hist = self._history[ip] = deque(maxlen=self._history_per_ip)
+        hist.append(rec)
+        self._history.move_to_end(ip)
+        while len(self._history) > self._history_ips:
+            self._history.popitem(last=False)
+
+
+#  מופע משותף לתהליך
+
+_sessionizer: Optional[Sessionizer] = None
+_lock = threading.Lock()
+_sweeper: Optional[threading.Thread] = None
+
+
+def get_sessionizer() -> Sessionizer:
+    global _sessionizer
+    if _sessionizer is None:
+        with _lock:
+            if _sessionizer is None:
+                s = Sessionizer()
+                s.load_history()
+                _sessionizer = s
+    return _sessionizer
+
+
+def _on_event(event: Dict[str, Any]) -> None:
+    get_sessionizer().add_event(event)
+    _ensure_sweeper()
+
+
+def _sweep_loop() -> None:
+    # סגירת sessions גם כשאין תעבורה חדשה
+    while True:
+        time.sleep(max(1.0, min(60.0, SESSION_TIMEOUT / 4)))
+        if _sessionizer is not None:
+            _sessionizer.expire()
+
+
+def _ensure_sweeper() -> None:
+    global _sweeper
+    if _sweeper is not None and _sweeper.is_alive():
+        return
+    with _lock:
+        if _sweeper is None or not _sweeper.is_alive():
+            _sweeper = threading.Thread(target=_sweep_loop, name="honeypot-sessions", daemon=True)
+            _sweeper.start()
+
+
+def attach(bus: Any) -> bool:
+    """רושם את ה-sessionizer כ-listener על ה-event_bus (פעם אחת)."""
+    if not SESSION_ENABLED:
+        return False
+    if _on_event not in getattr(bus, "_listeners", []):
+        bus.add_listener(_on_event)
+    return True
+
+
+def close() -> None:
+    """בכיבוי: sessions פעילים נכתבים ל-store."""
+    if _sessionizer is not None:
+        _sessionizer.close_all()
+
+
+def _reset_after_fork() -> None:
+    global _sessionizer, _lock, _sweeper
+    _sessionizer = None
+    _lock = threading.Lock()
+    _sweeper = None
+
+
+# נרשם אחרי ה-atexit של logger, ולכן רץ לפניו (LIFO) - השורות עוד נכתבות
+atexit.register(close)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
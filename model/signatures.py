@@ -0,0 +1,327 @@
+from __future__ import annotations
+import os
+import re
+import json
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import unquote_plus
+
+try:
+    import ahocorasick   # אופציונלי: pip install pyahocorasick (מימוש ב-C)
+except Exception:
+    ahocorasick = None
+
+from .logger import BASE_DIR
+
+
+SIGNATURES_ENABLED = os.getenv("HONEY_SIGNATURES", "1").strip().lower() not in ("0", "false", "no", "off")
+SIGNATURES_FILE = Path(os.getenv("HONEY_SIGNATURES_FILE", str(BASE_DIR / "data" / "signatures.json")))
+# קלט ארוך יותר נחתך לפני הסריקה (payload של port_listener, body של HTTP)
+MAX_SCAN_CHARS = int(os.getenv("HONEY_SIGNATURES_MAX_CHARS", "8192"))
+
+SEVERITIES = ("info", "low", "medium", "high", "critical")
+_RANK = {s: i for i, s in enumerate(SEVERITIES)}
+# backreference מספרי/שמי לא שורד איחוד ל-regex אחד (מספרי הקבוצות זזים)
+_BACKREF = re.compile(r"\\[1-9]|\(\?P=")
+
+# כשאין קובץ חתימות: מה שהיה מובנה ב-OpenPortsTrap._looks_like_nmap
+DEFAULT_RULES: List[Dict[str, Any]] = [
+    {"id": f"scanner.nmap.{i}", "literal": lit, "severity": "low", "traps": ["open_ports"], "tags": ["nmap", "scanner"]}
+    for i, lit in enumerate(("nmap", "-sv", "--version", "-ss", "-p "), 1)
+]
+
+
+class SignatureError(ValueError):
+    pass
+
+
+@dataclass
+class Rule:
+    """
+    חתימה אחת. literal בלבד - התאמה ב-Aho-Corasick; regex בלבד - ב-regex המאוחד;
+    שניהם - ה-regex נבדק רק אם אחד ה-literals (prefilter) נמצא.
+    literal יכול להיות מחרוזת או רשימה (כל אחת מספיקה). כל ההתאמות case-insensitive.
+    """
+
+    id: str
+    severity: str = "medium"
+    literals: Tuple[str, ...] = ()
+    regex: Optional[str] = None
+    traps: Tuple[str, ...] = ()          # ריק = כל המלכודות
+    tags: Tuple[str, ...] = ()
+    description: str = ""
+    _compiled: Any = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def parse(cls, spec: Dict[str, Any]) -> "Rule":
+        if not isinstance(spec, dict) or not spec.get("id"):
+            raise SignatureError(f"rule without id: {spec!r}")
+        literal = spec.get("literal")
+        literals = tuple(str(x).lower() for x in (literal if isinstance(literal, list) else [literal]) if x)
+        regex = spec.get("regex")
+        if not literals and not regex:
+            raise SignatureError(f"rule {spec['id']} needs a literal or a regex")
+        severity = str(spec.get("severity", "medium")).lower()
+        if severity not in _RANK:
+            raise SignatureError(f"rule {spec['id']}: severity must be one of {SEVERITIES}")
+        rule = cls(
+            id=str(spec["id"]),
+            severity=severity,
+            literals=literals,
+            regex=str(regex) if regex else None,
+            traps=tuple(spec.get("traps") or ()),
+            tags=tuple(spec.get("tags") or ()),
+            description=str(spec.get("description", "")),
+        )
+        if rule.regex:
+            try:
+                rule._compiled = re.compile(rule.regex, re.IGNORECASE)
+            except re.error as e:
+                raise SignatureError(f"rule {rule.id}: bad regex: {e}") from None
+        return rule
+
+    def applies_to(self, trap_type: Optional[str]) -> bool:
+        return not self.traps or trap_type is None or trap_type in self.traps
+
+
+class _PyAutomaton:
+    """Aho-Corasick ב-Python טהור (כשאין pyahocorasick): goto/fail/output, סריקה אחת על הטקסט."""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+
+    def add(self, word: str, values: Sequence[int]) -> None:
+        state = 0
+        for ch in word:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+            state = nxt
+        self._out[state] = self._out[state] + tuple(values)
+
+    def build(self) -> None:
+        q = deque(self._goto[0].values())
+        while q:
+            state = q.popleft()
+            for ch, nxt in self._goto[state].items():
+                q.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                target = self._goto[f].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                # הפלט של ה-suffix הארוך ביותר מצורף מראש - בלי הליכה על fail בזמן סריקה
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def iter(self, text: str) -> Iterator[int]:
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                yield from out[state]
+
+    def __len__(self) -> int:
+        return len(self._goto)
+
+
+class _CAutomaton:
+    """אותו ממשק מעל pyahocorasick."""
+
+    def __init__(self):
+        self._a = ahocorasick.Automaton()
+        self._words = 0
+
+    def add(self, word: str, values: Sequence[int]) -> None:
+        self._a.add_word(word, tuple(values))
+        self._words += 1
+
+    def build(self) -> None:
+        if self._words:
+            self._a.make_automaton()
+
+    def iter(self, text: str) -> Iterator[int]:
+        if not self._words:
+            return
+        for _, values in self._a.iter(text):
+            yield from values
+
+    def __len__(self) -> int:
+        return len(self._a)
+
+
+@dataclass
+class Match:
+    rules: List[str]
+    severity: str
+    tags: List[str]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"rules": self.rules, "severity": self.severity, "tags": self.tags}
+
+
+class SignatureEngine:
+    """
+    מסווג קלטים לפי ruleset:
+    - כל ה-literals ב-automaton אחד (Aho-Corasick): סריקה אחת, בלי תלות במספר החתימות
+    - כל ה-regex בלי prefilter ב-regex מאוחד אחד; כל חלופה עטופה ב-lookahead,
+      כך שחתימות שמתחילות במקומות שונים בטקסט מדווחות כולן
+    - regex עם literal נבדק רק אחרי שה-literal נמצא
+    הטקסט נסרק גם אחרי URL-decoding (%2e%2e%2f), ו-traps מגביל חתימה לסוגי מלכודות.
+    """
+
+    def __init__(self, rules: Iterable[Dict[str, Any]] = (), native: Optional[bool] = None):
+        self.rules: List[Rule] = []
+        seen = set()
+        for spec in rules:
+            rule = Rule.parse(spec)
+            if rule.id in seen:
+                raise SignatureError(f"duplicate rule id {rule.id}")
+            seen.add(rule.id)
+            self.rules.append(rule)
+        use_native = (ahocorasick is not None) if native is None else (native and ahocorasick is not None)
+        self.native = use_native
+        self._automaton = _CAutomaton() if use_native else _PyAutomaton()
+        self._combined: Optional["re.Pattern[str]"] = None
+        self._group_rule: Dict[int, int] = {}
+        self._standalone: List[int] = []
+        self._build()
+
+    @classmethod
+    def from_file(cls, path: Path, native: Optional[bool] = None) -> "SignatureEngine":
+        with open(path, "r", encoding="utf-8") as f:
+            spec = json.load(f)
+        rules = spec.get("rules") if isinstance(spec, dict) else spec
+        if not isinstance(rules, list):
+            raise SignatureError("signature file must be a list or an object with a 'rules' list")
+        return cls(rules, native)
+
+    def _build(self) -> None:
+        by_word: Dict[str, List[int]] = {}
+        parts: List[str] = []
+        group = 1
+        for i, rule in enumerate(self.rules):
+            if rule.literals:
+                for word in rule.literals:
+                    by_word.setdefault(word, []).append(i)
+            elif _BACKREF.search(rule.regex) or not _combinable(rule.regex):
+                self._standalone.append(i)
+            else:
+                # (?=( ... )) - הקבוצה החיצונית נסגרת אחרונה, ולכן lastindex מזהה את החתימה
+                parts.append(f"(?=({rule.regex}))")
+                self._group_rule[group] = i
+                group += 1 + rule._compiled.groups
+        for word, idx in by_word.items():
+            self._automaton.add(word, idx)
+        self._automaton.build()
+        if parts:
+            self._combined = re.compile("|".join(parts), re.IGNORECASE)
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def scan(self, text: str, trap_type: Optional[str] = None) -> List[Rule]:
+        """כל החתימות שמתאימות לטקסט, בסדר הקובץ."""
+        if not text or not self.rules:
+            return []
+        text = text[:MAX_SCAN_CHARS]
+        texts = [text.lower()]
+        if "%" in text or "+" in text:
+            decoded = unquote_plus(text).lower()
+            if decoded != texts[0]:
+                texts.append(decoded)
+        hits = set()
+        for t in texts:
+            # כל regex עם prefilter רץ לכל היותר פעם אחת לטקסט, גם כשה-literal חוזר אלפי פעמים
+            checked = set()
+            for i in self._automaton.iter(t):
+                if i in checked:
+                    continue
+                checked.add(i)
+                if i in hits:
+                    continue
+                rule = self.rules[i]
+                if rule._compiled is None or rule._compiled.search(t):
+                    hits.add(i)
+            if self._combined is not None:
+                for m in self._combined.finditer(t):
+                    hits.add(self._group_rule[m.lastindex])
+            for i in self._standalone:
+                if self.rules[i]._compiled.search(t):
+                    hits.add(i)
+        return [self.rules[i] for i in sorted(hits) if self.rules[i].applies_to(trap_type)]
+
+    def classify(self, trap_type: Optional[str], input_data: Any) -> Optional[Match]:
+        """rule ids, החומרה הגבוהה ו-tags של הקלט, או None כשאין התאמה."""
+        found = self.scan(input_text(input_data), trap_type)
+        if not found:
+            return None
+        severity = max((r.severity for r in found), key=_RANK.__getitem__)
+        tags = sorted({t for r in found for t in r.tags})
+        return Match([r.id for r in found], severity, tags)
+
+
+def _combinable(regex: str) -> bool:
+    # למשל (?i) בתחילת התבנית תקין לבד אבל לא באמצע regex מאוחד
+    try:
+        re.compile(f"x|(?=({regex}))")
+        return True
+    except re.error:
+        return False
+
+
+def input_text(input_data: Any) -> str:
+    """הקלט של run_trap כטקסט אחד לסריקה (dict -> ערכים מופרדים ברווח)."""
+    if input_data is None:
+        return ""
+    if isinstance(input_data, str):
+        return input_data
+    if isinstance(input_data, dict):
+        return " ".join(f"{k}={v}" for k, v in input_data.items())
+    return str(input_data)
+
+
+_engine: Optional[SignatureEngine] = None
+_engine_lock = threading.Lock()
+
+
+def _load_engine(path: Path) -> SignatureEngine:
+    return SignatureEngine.from_file(path) if path.exists() else SignatureEngine(DEFAULT_RULES)
+
+
+def load(path: Optional[Path] = None) -> SignatureEngine:
+    """טוען (מחדש) את ה-ruleset המשותף. בלי קובץ - DEFAULT_RULES."""
+    global _engine
+    engine = _load_engine(Path(path) if path else SIGNATURES_FILE)
+    with _engine_lock:
+        _engine = engine
+    return engine
+
+
+def get_engine() -> SignatureEngine:
+    """מנוע משותף לתהליך (נטען בפעם הראשונה)."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = _load_engine(SIGNATURES_FILE)
+    return _engine
+
+
+def classify(trap_type: Optional[str], input_data: Any) -> Optional[Dict[str, Any]]:
+    """{"rules", "severity", "tags"} לקלט, או None. HONEY_SIGNATURES=0 מכבה."""
+    if not SIGNATURES_ENABLED:
+        return None
+    match = get_engine().classify(trap_type, input_data)
+    return match.to_dict() if match is not None else None
@@ -0,0 +1,245 @@
+
+from __future__ import annotations
+import os
+import heapq
+import hashlib
+import threading
+import time
+from array import array
+from math import log
+from typing import Any, Dict, List, Optional, Tuple
+
+from .rollups import _username
+
+
+SKETCH_HOURS = int(os.getenv("HONEY_SKETCH_HOURS", "24"))
+SKETCH_TOP_K = int(os.getenv("HONEY_SKETCH_TOP_K", "1000"))
+SKETCH_ENABLED = os.getenv("HONEY_SKETCHES", "1").strip().lower() not in ("0", "false", "no", "off")
+
+DIMENSIONS = ("ip", "username", "password", "path")
+
+
+def _hash64(key: str) -> int:
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8", errors="replace"), digest_size=8).digest(), "little")
+
+
+class SpaceSaving:
+    """
+    Top-K בזיכרון קבוע (Metwally et al.): עד k מונים; מפתח חדש כשהטבלה מלאה
+    מחליף את המונה הקטן ביותר ויורש את ערכו כשגיאה. count - error <= אמיתי <= count.
+    המינימום נשמר ב-heap עם רשומות "עצלות" שמנוקות בשליפה.
+    """
+
+    def __init__(self, k: int = SKETCH_TOP_K):
+        self.k = k
+        self.counts: Dict[str, List[int]] = {}     # key -> [count, error]
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, key: str, n: int = 1) -> None:
+        entry = self.counts.get(key)
+        if entry is None:
+            if len(self.counts) < self.k:
+                entry = self.counts[key] = [0, 0]
+            else:
+                floor, victim = self._pop_min()
+                del self.counts[victim]
+                entry = self.counts[key] = [floor, floor]
+        entry[0] += n
+        heapq.heappush(self._heap, (entry[0], key))
+        if len(self._heap) > 4 * self.k:
+            self._heap = [(c, k) for k, (c, _) in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> Tuple[int, str]:
+        while True:
+            count, key = heapq.heappop(self._heap)
+            entry = self.counts.get(key)
+            if entry is not None and entry[0] == count:
+                return count, key
+
+    def top(self, limit: int) -> List[Tuple[str, int, int]]:
+        items = heapq.nlargest(limit, self.counts.items(), key=lambda kv: kv[1][0])
+        return [(k, c, e) for k, (c, e) in items]
+
+    def merge(self, other: "SpaceSaving") -> None:
+        """איחוד (לחלונות זמן): מונים מתחברים ונשארים k הגדולים."""
+        merged: Dict[str, List[int]] = {k: list(v) for k, v in self.counts.items()}
+        for key, (c, e) in other.counts.items():
+            cur = merged.setdefault(key, [0, 0])
+            cur[0] += c
+            cur[1] += e
+        keep = heapq.nlargest(self.k, merged.items(), key=lambda kv: kv[1][0])
+        self.counts = {k: v for k, v in keep}
+        self._heap = [(v[0], k) for k, v in keep]
+        heapq.heapify(self._heap)
+
+
+class CountMinSketch:
+    """הערכת תדירות לכל מפתח (גם כאלה שלא ב-top-K); הערכה >= האמת."""
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.table = array("Q", bytes(8 * width * depth))
+
+    def add(self, h: int, n: int = 1) -> None:
+        h1, h2 = h & 0xFFFFFFFF, h >> 32
+        w = self.width
+        for i in range(self.depth):
+            self.table[i * w + (h1 + i * h2) % w] += n
+
+    def estimate(self, h: int) -> int:
+        h1, h2 = h & 0xFFFFFFFF, h >> 32
+        w = self.width
+        return min(self.table[i * w + (h1 + i * h2) % w] for i in range(self.depth))
+
+    def merge(self, other: "CountMinSketch") -> None:
+        for i, v in enumerate(other.table):
+            if v:
+                self.table[i] += v
+
+
+class HyperLogLog:
+    """ספירת ערכים שונים בזיכרון של 2^p בתים (שגיאה ~1.04/sqrt(2^p))."""
+
+    def __init__(self, p: int = 12):
+        self.p = p
+        self.m = 1 << p
+        self.registers = bytearray(self.m)
+
+    def add(self, h: int) -> None:
+        idx = h >> (64 - self.p)
+        rest = (h << self.p) & 0xFFFFFFFFFFFFFFFF
+        rank = 64 - self.p + 1 if rest == 0 else (64 - rest.bit_length()) + 1
+        if rank > self.registers[idx]:
+            self.registers[idx] = rank
+
+    def count(self) -> int:
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        est = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if est <= 2.5 * m and zeros:
+            est = m * log(m / zeros)
+        return int(round(est))
+
+    def merge(self, other: "HyperLogLog") -> None:
+        self.registers = bytearray(max(a, b) for a, b in zip(self.registers, other.registers))
+
+
+class _Slot:
+    """הסקיצות של שעה אחת לכל ממד."""
+
+    def __init__(self, hour: int, k: int):
+        self.hour = hour
+        self.total = {d: 0 for d in DIMENSIONS}
+        self.top = {d: SpaceSaving(k) for d in DIMENSIONS}
+        self.cms = {d: CountMinSketch() for d in DIMENSIONS}
+        self.hll = {d: HyperLogLog() for d in DIMENSIONS}
+
+
+class HeavyHitters:
+    """
+    מעקב top-K ו-distinct ב-ingest לכל ממד (ip / username / password / path):
+    טבעת של slots שעתיים (hours אחרונות), כך שהזיכרון קבוע בלי קשר לתעבורה.
+    שאילתת "N שעות אחרונות" מאחדת את ה-slots הרלוונטיים.
+    """
+
+    def __init__(self, hours: int = SKETCH_HOURS, k: int = SKETCH_TOP_K):
+        self.hours = max(1, hours)
+        self.k = k
+        self._slots: List[Optional[_Slot]] = [None] * self.hours
+        self._lock = threading.Lock()
+
+    def add(self, values: Dict[str, str], ts: Optional[float] = None) -> None:
+        hour = int(ts if ts is not None else time.time()) // 3600
+        hashed = {d: (v, _hash64(v)) for d, v in values.items() if v and d in DIMENSIONS}
+        if not hashed:
+            return
+        with self._lock:
+            i = hour % self.hours
+            slot = self._slots[i]
+            if slot is None or slot.hour != hour:
+                if slot is not None and slot.hour > hour:
+                    return      # אירוע ישן מחוץ לחלון
+                slot = self._slots[i] = _Slot(hour, self.k)
+            for d, (v, h) in hashed.items():
+                slot.total[d] += 1
+                slot.top[d].add(v)
+                slot.cms[d].add(h)
+                slot.hll[d].add(h)
+
+    def add_event(self, event: Dict[str, Any]) -> None:
+        """listener ל-event_bus (מעטפת של TrapManager)."""
+        self.add(extract(event), event.get("timestamp"))
+
+    def query(self, dimension: str, limit: int = 100, hours: Optional[int] = None,
+              now: Optional[float] = None) -> Dict[str, Any]:
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"dimension must be one of {DIMENSIONS}")
+        hours = min(self.hours, max(1, int(hours or self.hours)))
+        current = int(now if now is not None else time.time()) // 3600
+        with self._lock:
+            slots = [s for s in self._slots if s is not None and current - hours < s.hour <= current]
+            top = SpaceSaving(self.k)
+            hll = HyperLogLog()
+            total = 0
+            for s in slots:
+                top.merge(s.top[dimension])
+                hll.merge(s.hll[dimension])
+                total += s.total[dimension]
+            items = []
+            for key, count, error in top.top(limit):
+                # סכום הערכות ה-CMS של ה-slots חוסם מלמעלה גם את הערך של Space-Saving
+                h = _hash64(key)
+                count = min(count, sum(s.cms[dimension].estimate(h) for s in slots))
+                items.append({"key": key, "count": count, "error": min(error, count)})
+        items.sort(key=lambda it: -it["count"])
+        return {"dimension": dimension, "hours": hours, "total": total,
+                "distinct": hll.count() if total else 0, "items": items}
+
+
+def extract(event: Dict[str, Any]) -> Dict[str, str]:
+    """ip / username / password / path מתוך מעטפת של run_trap."""
+    data = event.get("input")
+    out = {"ip": str(event.get("ip") or "").strip(), "username": _username(data)}
+    if isinstance(data, dict):
+        out["password"] = str(data.get("password") or data.get("pass") or "")
+        out["path"] = str(data.get("path") or "")
+    else:
+        s = str(data or "").strip()
+        if s[:5].upper() == "PASS ":
+            out["password"] = s[5:].strip()
+        parts = s.split()
+        # "GET /login HTTP/1.1" -> /login
+        if len(parts) >= 2 and parts[0].isupper() and parts[1].startswith("/"):
+            out["path"] = parts[1].split("?", 1)[0]
+    return out
+
+
+#  מופע משותף לתהליך
+
+_tracker: Optional[HeavyHitters] = None
+_tracker_lock = threading.Lock()
+
+
+def get_tracker() -> HeavyHitters:
+    global _tracker
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = HeavyHitters()
+    return _tracker
+
+
+def _on_event(event: Dict[str, Any]) -> None:
+    get_tracker().add_event(event)
+
+
+def attach(bus: Any) -> bool:
+    """רושם את המעקב כ-listener על ה-event_bus (פעם אחת)."""
+    if not SKETCH_ENABLED:
+        return False
+    if _on_event not in getattr(bus, "_listeners", []):
+        bus.add_listener(_on_event)
+    return True
@@ -1,47 +1,86 @@
-from typing import Dict, Any
+from typing import Any, Iterable, Optional
 import time
-from .http_trap import HTTPTrap
-from .ftp_trap import FTPTrap
-from .ssh_trap import SshTrap
-from .admin_panel_trap import AdminPanelTrap
-from .phishing_trap import PhishingTrap 
-from .open_ports_trap import OpenPortsTrap   # <--- חדש
+from . import event_bus
+from . import event_store
+from . import rollups
+from . import sketches
+from . import sessions
+from . import metrics
+from . import signatures
+from .trap_registry import TrapRegistry
+
+_RUN_SECONDS = metrics.histogram("honeypot_trap_run_seconds",
+                                 "run_trap latency: simulate_interaction + publish", ("trap_type",))
+_INTERACTION_SECONDS = metrics.histogram("honeypot_trap_interaction_seconds",
+                                         "Trap simulate_interaction latency", ("trap_type",))
+_EVENTS = metrics.counter("honeypot_trap_events_total", "Events published by trap type", ("trap_type",))
+_SIGNATURE_HITS = metrics.counter("honeypot_signature_hits_total", "Events matching exploit signatures by severity",
+                                  ("trap_type", "severity"))
+_ERRORS = metrics.counter("honeypot_trap_errors_total", "Failed run_trap calls by trap type and error",
+                          ("trap_type", "error"))
 
 class TrapManager:
-    def __init__(self):
-        self._traps: Dict[str, object] = {}
-        # רישום מלכודות
-        self._traps["http"] = HTTPTrap()
-        self._traps["ftp"]  = FTPTrap()
-        self._traps["ssh"]  = SshTrap()
-        self._traps["admin_panel"] = AdminPanelTrap()
-        self._traps["phishing"] = PhishingTrap()
-        self._traps["open_ports"] = OpenPortsTrap()   # <--- חדש
+    def __init__(self, only: Optional[Iterable[str]] = None, registry: Optional[TrapRegistry] = None):
+        # רישום מלכודות: data/traps.json + entry points, import ובנייה רק בשימוש הראשון.
+        # only (או HONEY_TRAPS) מגביל את המלכודות של התהליך, למשל ["ftp"] בחיישן FTP
+        self._traps = registry if registry is not None else TrapRegistry(only=only)
+        # כל אירוע שמתפרסם נכתב גם ל-event store העמודתי (HONEY_EVENT_STORE=0 מכבה)
+        event_store.attach(event_bus.bus)
+        # מונים מצטברים לדשבורד (/api/stats/*)
+        rollups.attach(event_bus.bus)
+        # top-K / distinct בזיכרון קבוע (/api/stats/heavy)
+        sketches.attach(event_bus.bus)
+        # sessions לפי IP לאורך כל המלכודות (/api/sessions)
+        sessions.attach(event_bus.bus)
 
     def get_trap(self, name: str):
         return self._traps.get(name)
 
     def list_traps(self):
-        return list(self._traps.keys())
+        """שמות המלכודות הפעילות (בלי לטעון אותן)."""
+        return self._traps.names()
 
     def add_trap(self, trap_type: str, trap_obj):
         if not hasattr(trap_obj, "simulate_interaction"):
             raise TypeError("trap_obj must implement simulate_interaction")
-        self._traps[trap_type] = trap_obj
+        self._traps.add(trap_type, trap_obj)
 
     def run_trap(self, trap_type: str, input_data: Any, ip: str) -> dict:
         trap = self._traps.get(trap_type)
         if trap is None:
+            # לא trap_type כ-label: ערכים שרירותיים מהלקוח
+            _ERRORS.labels("unknown", "KeyError").inc()
             raise KeyError(f"Trap '{trap_type}' not found")
 
-        res = trap.simulate_interaction(input_data, ip)
+        try:
+            with _RUN_SECONDS.labels(trap_type).time():
+                with _INTERACTION_SECONDS.labels(trap_type).time():
+                    res = trap.simulate_interaction(input_data, ip)
+                return self.publish(trap_type, input_data, ip, res)
+        except Exception as e:
+            _ERRORS.labels(trap_type, type(e).__name__).inc()
+            raise
+
+    def publish(self, trap_type: str, input_data: Any, ip: str, res: Any) -> dict:
+        """
+        עוטף תוצאה של מלכודת למעטפת אחידה ומפרסם אותה ב-event_bus.
+        נקרא מ-run_trap, וגם מ-routes שמפעילים מלכודת ישירות.
+        """
+        # חתימות (rule ids + חומרה) על הקלט הגולמי, לפני שה-listeners רואים את האירוע
+        sig = signatures.classify(trap_type, input_data)
+        if sig is not None:
+            _SIGNATURE_HITS.labels(trap_type, sig["severity"]).inc()
 
-        
         if isinstance(res, dict) and {"trap_type", "protocol", "timestamp"}.issubset(res.keys()):
+            if sig is not None:
+                res["signatures"] = sig
+            _EVENTS.labels(res["trap_type"]).inc()
+            event_bus.publish(res)
             return res
 
+        trap = self._traps.get(trap_type)
         # עטיפה למעטפת אחידה
-        return {
+        envelope = {
             "protocol":  getattr(trap, "get_protocol", lambda: trap_type.upper())(),
             "trap_type": trap_type,
             "input":     input_data,
@@ -49,3 +88,8 @@ class TrapManager:
             "timestamp": int(time.time()),
             "result":    res if isinstance(res, dict) else {"value": res},
         }
+        if sig is not None:
+            envelope["signatures"] = sig
+        _EVENTS.labels(trap_type).inc()
+        event_bus.publish(envelope)
+        return envelope
@@ -0,0 +1,178 @@
+from __future__ import annotations
+import os
+import json
+import importlib
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from .logger import BASE_DIR
+
+
+TRAPS_FILE = Path(os.getenv("HONEY_TRAPS_FILE", str(BASE_DIR / "data" / "traps.json")))
+# רשימת מלכודות מופרדת בפסיקים (למשל "ftp" בקונטיינר של חיישן FTP); ריק = כל המלכודות הפעילות
+TRAPS_ONLY = os.getenv("HONEY_TRAPS", "")
+ENTRY_POINT_GROUP = "honeypot.traps"
+_OFF = ("0", "false", "no", "off")
+
+# כשאין קובץ traps: אותן מלכודות ש-TrapManager ו-api_controller רשמו
+DEFAULT_TRAPS: Dict[str, Dict[str, Any]] = {
+    "http": {"class": "model.http_trap:HTTPTrap"},
+    "ftp": {"class": "model.ftp_trap:FTPTrap"},
+    "ssh": {"class": "model.ssh_trap:SshTrap"},
+    "admin_panel": {"class": "model.admin_panel_trap:AdminPanelTrap"},
+    "phishing": {"class": "model.phishing_trap:PhishingTrap"},
+    "open_ports": {"class": "model.open_ports_trap:OpenPortsTrap"},
+    "ransomware": {"class": "model.ransomware_trap:RansomwareTrap"},
+    "iot_router": {"class": "model.iot_router_trap:IoTRouterTrap"},
+}
+
+
+class TrapConfigError(ValueError):
+    pass
+
+
+@dataclass
+class TrapSpec:
+    """מלכודת רשומה: 'module:Class' (או אובייקט entry point), kwargs לבנאי ו-enabled."""
+
+    name: str
+    target: Any
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    enabled: bool = True
+    source: str = "config"
+
+    @classmethod
+    def parse(cls, name: str, spec: Any, source: str = "config") -> "TrapSpec":
+        if isinstance(spec, str):
+            spec = {"class": spec}
+        if not isinstance(spec, dict) or not isinstance(spec.get("class"), str) or ":" not in spec["class"]:
+            raise TrapConfigError(f"trap {name}: 'class' must be 'module:Class'")
+        kwargs = spec.get("kwargs") or {}
+        if not isinstance(kwargs, dict):
+            raise TrapConfigError(f"trap {name}: 'kwargs' must be an object")
+        return cls(name, spec["class"], kwargs, _parse_enabled(name, spec.get("enabled", True)), source)
+
+    def load(self):
+        """import של המחלקה ובנייה - נקרא רק בשימוש הראשון."""
+        if isinstance(self.target, str):
+            module, _, attr = self.target.partition(":")
+            factory = importlib.import_module(module)
+            for part in attr.split("."):
+                factory = getattr(factory, part)
+        else:
+            factory = self.target.load()    # importlib.metadata.EntryPoint
+        trap = factory(**self.kwargs)
+        if not hasattr(trap, "simulate_interaction"):
+            raise TypeError(f"trap {self.name} ({self.target}) must implement simulate_interaction")
+        return trap
+
+
+def _parse_enabled(name: str, value: Any) -> bool:
+    """enabled בקונפיג: bool, 0/1 או מחרוזת - אותם ערכי כיבוי כמו HONEY_TRAP_<NAME>."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip():
+        return value.strip().lower() not in _OFF
+    raise TrapConfigError(f"trap {name}: 'enabled' must be a boolean")
+
+
+def _entry_points() -> List[Any]:
+    try:
+        from importlib.metadata import entry_points
+    except ImportError:
+        return []
+    eps = entry_points()
+    if hasattr(eps, "select"):
+        return list(eps.select(group=ENTRY_POINT_GROUP))
+    return list(eps.get(ENTRY_POINT_GROUP, ()))
+
+
+def _env_flag(name: str) -> Optional[bool]:
+    value = os.getenv(f"HONEY_TRAP_{name.upper()}")
+    if value is None or not value.strip():
+        return None
+    return value.strip().lower() not in _OFF
+
+
+def discover(path: Optional[Path] = None, entry_points: bool = True) -> Dict[str, TrapSpec]:
+    """
+    כל המלכודות הידועות, בלי לייבא אף אחת:
+    - entry points בקבוצה honeypot.traps (חבילות plugin מותקנות)
+    - קובץ ה-traps (ברירת מחדל HONEY_TRAPS_FILE, ובלעדיו DEFAULT_TRAPS) - גובר על entry point באותו שם
+    - HONEY_TRAP_<NAME>=0/1 גובר על enabled של הקובץ
+    """
+    specs: Dict[str, TrapSpec] = {}
+    if entry_points:
+        for ep in _entry_points():
+            specs[ep.name] = TrapSpec(ep.name, ep, source="entry_point")
+    path = Path(path) if path else TRAPS_FILE
+    if path.exists():
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        traps = config.get("traps") if isinstance(config, dict) else None
+        if not isinstance(traps, dict):
+            raise TrapConfigError(f"{path}: expected an object with a 'traps' object")
+    else:
+        traps = DEFAULT_TRAPS
+    for name, spec in traps.items():
+        specs[name] = TrapSpec.parse(name, spec)
+    for name, spec in specs.items():
+        flag = _env_flag(name)
+        if flag is not None:
+            spec.enabled = flag
+    return specs
+
+
+def parse_only(value: Optional[str]) -> Optional[List[str]]:
+    names = [s.strip() for s in (value or "").split(",") if s.strip()]
+    return names or None
+
+
+class TrapRegistry:
+    """
+    מלכודות לפי שם, נטענות בעצלות: import + בנייה רק ב-get הראשון של אותו שם
+    (תחת lock, כך שבין threads נבנה מופע אחד). only מגביל לקבוצת שמות;
+    מלכודת כבויה או לא מוכרת מחזירה None, בלי לייבא את המודול שלה.
+    """
+
+    def __init__(self, specs: Optional[Dict[str, TrapSpec]] = None, only: Optional[Iterable[str]] = None):
+        self._specs = dict(specs if specs is not None else discover())
+        only = list(only) if only is not None else parse_only(TRAPS_ONLY)
+        if only is not None:
+            unknown = sorted(set(only) - set(self._specs))
+            if unknown:
+                print(f"Traps: unknown names in HONEY_TRAPS ignored: {', '.join(unknown)}")
+        self._active = [n for n, s in self._specs.items() if s.enabled and (only is None or n in only)]
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def names(self) -> List[str]:
+        return list(self._active)
+
+    def loaded(self) -> List[str]:
+        return list(self._instances)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._instances or name in self._active
+
+    def get(self, name: str):
+        trap = self._instances.get(name)
+        if trap is not None or name not in self._active:
+            return trap
+        with self._lock:
+            trap = self._instances.get(name)
+            if trap is None:
+                trap = self._specs[name].load()
+                self._instances[name] = trap
+        return trap
+
+    def add(self, name: str, trap: Any) -> None:
+        """מופע מוכן (בדיקות, מלכודת עם הגדרות משלה) - פעיל גם אם הקונפיג כיבה את השם."""
+        with self._lock:
+            self._instances[name] = trap
+            if name not in self._active:
+                self._active.append(name)
@@ -1,6 +1,7 @@
 import sys, os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from model.admin_panel_trap import AdminPanelTrap
+from model import logger
 import os
 print("Test file started")
 def test_simulate_interaction_logs_success_and_failure():
@@ -22,6 +23,7 @@ def test_simulate_interaction_logs_success_and_failure():
     assert result_wrong["success"] is False
 
     # Check log file contents
+    logger.flush()
     with open(log_path, 'r', encoding='utf-8') as f:
         logs = f.read()
     assert "IP: 127.0.0.1" in logs
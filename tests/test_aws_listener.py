@@ -0,0 +1,87 @@
+import gzip
+import json
+import pytest
+from controller import aws_listener
+
+
+@pytest.fixture
+def client(monkeypatch):
+    calls = []
+
+    def fake_run_trap(trap_type, input_data, ip):
+        if input_data == "boom":
+            raise RuntimeError("boom")
+        calls.append((trap_type, input_data, ip))
+        return {}
+
+    monkeypatch.setattr(aws_listener.trap_manager, "run_trap", fake_run_trap)
+    aws_listener.app.config["TESTING"] = True
+    with aws_listener.app.test_client() as client:
+        client.calls = calls
+        yield client
+
+
+def test_batch_json_array_with_per_item_status(client):
+    resp = client.post("/ingest/batch", json=[
+        {"trap_type": "ssh", "input": "id", "ip": "1.1.1.1"},
+        {"trap_type": "nope", "input": "x"},
+        {"trap_type": "http"},
+        {"trap_type": "ftp", "input": "boom"},
+    ])
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["accepted"] == 1 and body["failed"] == 3
+    assert [r["status"] for r in body["results"]] == ["ok", "error", "error", "error"]
+    assert client.calls == [("ssh", "id", "1.1.1.1")]
+
+
+def test_batch_gzip_ndjson(client):
+    lines = "\n".join(json.dumps({"trap_type": "ftp", "input": f"USER u{i}"}) for i in range(3))
+    lines += "\nnot json\n"
+    resp = client.post(
+        "/ingest/batch",
+        data=gzip.compress(lines.encode("utf-8")),
+        headers={"Content-Encoding": "gzip", "Content-Type": "application/x-ndjson"},
+    )
+    body = resp.get_json()
+    assert body["accepted"] == 3
+    assert body["results"][3]["status"] == "error"
+
+
+def test_batch_limits(client, monkeypatch):
+    monkeypatch.setattr(aws_listener, "INGEST_MAX_ITEMS", 2)
+    resp = client.post("/ingest/batch", json=[{"trap_type": "ssh", "input": "id"}] * 3)
+    assert resp.status_code == 413
+
+    monkeypatch.setattr(aws_listener, "INGEST_MAX_BYTES", 64)
+    bomb = gzip.compress(b"[" + b" " * 10000 + b"]")
+    resp = client.post("/ingest/batch", data=bomb, headers={"Content-Encoding": "gzip"})
+    assert resp.status_code == 413
+    assert client.post("/ingest/batch", data="", content_type="application/json").status_code == 400
+
+
+def test_ingest_trap_set_is_pinned(client):
+    assert sorted(aws_listener.trap_manager.list_traps()) == sorted(aws_listener.INGEST_TRAPS)
+    resp = client.post("/ingest/batch", json=[{"trap_type": "ransomware", "input": "x", "ip": "1.2.3.4"}])
+    assert resp.get_json()["results"][0]["status"] == "error"
+
+
+def test_non_string_trap_type_is_a_per_item_error(client):
+    resp = client.post("/ingest/batch", json=[{"trap_type": ["x"], "input": "a"},
+                                              {"trap_type": {"a": 1}, "input": "a"},
+                                              {"trap_type": "ssh", "input": "ls", "ip": "1.2.3.4"}])
+    assert resp.status_code in (200, 207)
+    results = resp.get_json()["results"]
+    assert [r["status"] for r in results] == ["error", "error", "ok"]
+    assert results[0]["error"] == "trap_type must be a string"
+    assert client.post("/ingest", json={"trap_type": ["x"], "input": "a"}).status_code == 400
+
+
+def test_non_string_ip_is_a_per_item_error(client):
+    resp = client.post("/ingest/batch", json=[{"trap_type": "ssh", "input": "ls", "ip": {"a": 1}},
+                                              {"trap_type": "ssh", "input": "ls", "ip": ["1.2.3.4"]},
+                                              {"trap_type": "ssh", "input": "ls", "ip": "1.2.3.4"}])
+    results = resp.get_json()["results"]
+    assert [r["status"] for r in results] == ["error", "error", "ok"]
+    assert results[0]["error"] == "ip must be a string"
+    assert client.post("/ingest", json={"trap_type": "ssh", "input": "a", "ip": ["x"]}).status_code == 400
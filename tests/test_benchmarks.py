@@ -0,0 +1,26 @@
+from benchmarks.corpus import generate, FORMATS
+from benchmarks.compare import compare
+from benchmarks.run import bench_report, percentiles
+from model.report_generator import EventIndex
+
+
+def test_corpus_formats_are_parsed_by_report_index(tmp_path):
+    counts = generate(tmp_path, 500, seed=7)
+    assert sum(counts.values()) == 500 and set(counts) == set(FORMATS)
+    # שורות ה-pipe של ransomware לא נקלטות ע"י הפרסר של הדוח (אין בהן פסיקים)
+    assert len(EventIndex(tmp_path).events()) == 500 - counts["ransomware_honeypot.log"]
+
+
+def test_bench_report_smoke(tmp_path):
+    out = bench_report(tmp_path / "corpus", 300, trace_memory=False)
+    assert 0 < out["events"] <= 300
+    assert out["csv_stream"]["bytes"] > 0
+
+
+def test_percentiles_and_compare(capsys):
+    p = percentiles([0.001 * i for i in range(1, 101)])
+    assert p["p50_ms"] == 50.0 and p["p99_ms"] == 99.0
+    old = {"traps": {"http": {"ops_per_sec": 100.0}}, "report": {"index_cold": {"seconds": 1.0}}}
+    new = {"traps": {"http": {"ops_per_sec": 80.0}}, "report": {"index_cold": {"seconds": 1.05}}}
+    assert compare(old, new, threshold=10) == 1
+    assert "REGRESSION" in capsys.readouterr().out
@@ -0,0 +1,62 @@
+import json
+import threading
+import pytest
+from model.event_bus import EventBus
+from model import event_bus
+from model.trap_manager import TrapManager
+
+
+def test_fan_out_to_every_subscriber():
+    bus = EventBus()
+    a, b = bus.subscribe(), bus.subscribe()
+    bus.publish({"n": 1})
+    assert a.get(timeout=1) == {"n": 1}
+    assert b.get(timeout=1) == {"n": 1}
+    assert a.get(timeout=0.01) is None
+
+
+def test_slow_subscriber_drops_oldest():
+    bus = EventBus()
+    sub = bus.subscribe(maxsize=2)
+    for n in range(5):
+        bus.publish({"n": n})
+    assert sub.dropped == 3
+    assert [sub.get(timeout=1)["n"], sub.get(timeout=1)["n"]] == [3, 4]
+
+
+def test_close_wakes_blocked_reader_and_caps_subscribers():
+    bus = EventBus(max_subscribers=1)
+    sub = bus.subscribe()
+    with pytest.raises(RuntimeError):
+        bus.subscribe()
+    threading.Timer(0.05, sub.close).start()
+    assert sub.get(timeout=5) is None
+    assert sub.closed and bus.subscriber_count() == 0
+
+
+def test_run_trap_publishes_envelope(monkeypatch):
+    manager = TrapManager()
+    monkeypatch.setattr(manager.get_trap("http"), "_append_log_line", lambda *_: None)
+    seen = []
+    event_bus.bus.add_listener(seen.append)
+    try:
+        res = manager.run_trap("http", "GET /", "9.9.9.9")
+    finally:
+        event_bus.bus.remove_listener(seen.append)
+    assert seen == [res]
+
+
+def test_api_stream_sends_trap_frames():
+    from controller import api_controller as app_module
+    app_module.app.config["TESTING"] = True
+    with app_module.app.test_client() as client:
+        resp = client.get("/api/stream")
+        assert resp.mimetype == "text/event-stream"
+        frames = iter(resp.response)
+        assert next(frames).startswith(b"retry:")
+        event_bus.publish({"trap_type": "ssh", "ip": "1.2.3.4", "input": "id", "timestamp": 1})
+        frame = next(frames).decode("utf-8")
+        assert frame.startswith("id: 1\nevent: trap\n")
+        payload = json.loads(frame.split("data: ", 1)[1])
+        assert payload["ip"] == "1.2.3.4"
+        resp.close()
@@ -0,0 +1,138 @@
+import os
+import sys
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from model import event_store
+from model.event_bus import EventBus
+from model.event_store import EventStore, StoreReader, pack_ip, unpack_ip
+from model.report_generator import iter_store_events
+
+
+def test_ip_roundtrip():
+    assert unpack_ip(pack_ip("10.0.0.1")) == "10.0.0.1"
+    assert unpack_ip(pack_ip("2001:db8::1")) == "2001:db8::1"
+    assert unpack_ip(pack_ip("unknown")) == "unknown"
+
+
+def test_append_and_scan_columns(tmp_path):
+    store = EventStore(tmp_path, batch_rows=2)
+    store.append("ssh", "SSH", "10.0.0.1", "uname -a", ts_us=1_000_000)
+    store.append("http", "HTTP", "10.0.0.2", {"path": "/login"}, ts_us=2_000_000)
+    store.append("ssh", "SSH", "10.0.0.2", "ls", ts_us=3_000_000)
+    store.flush()
+
+    reader = StoreReader(tmp_path)
+    rows = list(reader.scan())
+    assert [r["input"] for r in rows] == ["uname -a", '{"path": "/login"}', "ls"]
+    assert rows[1]["protocol"] == "HTTP"
+
+    assert [r["input"] for r in reader.scan(trap_types={"ssh"})] == ["uname -a", "ls"]
+    assert [r["input"] for r in reader.scan(ip="10.0.0.2")] == ['{"path": "/login"}', "ls"]
+    assert [r["ts_us"] for r in reader.scan(since_us=2_000_000, until_us=2_500_000)] == [2_000_000]
+    assert reader.count_by_trap() == {"ssh": 2, "http": 1}
+    store.close()
+
+
+def test_segment_roll_keeps_own_dictionary(tmp_path):
+    store = EventStore(tmp_path, segment_rows=2, batch_rows=1)
+    for i, trap in enumerate(["ssh", "ftp", "http", "ssh"]):
+        store.append(trap, trap.upper(), "10.0.0.1", f"in{i}", ts_us=i)
+    store.close()
+    reader = StoreReader(tmp_path)
+    assert len(reader.segments()) == 2
+    assert [r["trap_type"] for r in reader.scan()] == ["ssh", "ftp", "http", "ssh"]
+
+
+def test_partial_write_is_ignored(tmp_path):
+    store = EventStore(tmp_path, batch_rows=1)
+    store.append("ssh", "SSH", "10.0.0.1", "whoami", ts_us=1)
+    store.close()
+    seg = StoreReader(tmp_path).segments()[0]
+    # עמודה אחת התקדמה בלי השאר (כתיבה שנקטעה)
+    with open(f"{seg}.ts", "ab") as f:
+        f.write((5).to_bytes(8, "little"))
+    assert [r["input"] for r in StoreReader(tmp_path).scan()] == ["whoami"]
+
+
+def test_dictionary_is_read_after_columns_are_mapped(tmp_path):
+    store = EventStore(tmp_path, batch_rows=1)
+    store.append("ssh", "SSH", "10.0.0.1", "id", ts_us=1)
+    seg = event_store._Segment(StoreReader(tmp_path).segments()[0])
+    # flush של הכותב בין בניית ה-reader למיפוי: מלכודת חדשה במילון ושורה שמשתמשת בה
+    store.append("ftp", "FTP", "10.0.0.2", "USER x", ts_us=2)
+    with seg:
+        assert [seg.traps[seg.trap[i]] for i in range(seg.rows)] == ["ssh", "ftp"]
+    store.close()
+
+
+class _FailingFile:
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, data):
+        raise OSError("disk full")
+
+    def __getattr__(self, name):
+        return getattr(self.f, name)
+
+
+def test_failed_write_keeps_columns_aligned(tmp_path):
+    store = EventStore(tmp_path, batch_rows=1)
+    store.append("ssh", "SSH", "10.0.0.1", "one", ts_us=1)
+    store._files["proto"] = _FailingFile(store._files["proto"])
+    store.append("ssh", "SSH", "10.0.0.1", "lost", ts_us=2)
+    store.append("http", "HTTP", "10.0.0.2", "two", ts_us=3)
+    store.close()
+    reader = StoreReader(tmp_path)
+    first = reader.segments()[0]
+    assert {os.path.getsize(f"{first}.{c}") for c in ("ts", "proto")} == {8, 2}
+    assert [(r["input"], r["protocol"]) for r in reader.scan()] == [("one", "SSH"), ("two", "HTTP")]
+
+
+def test_attach_writes_published_events(tmp_path, monkeypatch):
+    monkeypatch.setattr(event_store, "_store", EventStore(tmp_path))
+    monkeypatch.setattr(event_store, "STORE_ENABLED", True)
+    bus = EventBus()
+    assert event_store.attach(bus)
+    assert event_store.attach(bus)
+    bus.publish({"trap_type": "ftp", "protocol": "FTP", "ip": "10.1.1.1", "input": "USER root"})
+
+    events = list(iter_store_events(trap_type="FTPTrap", store_dir=tmp_path))
+    assert len(events) == 1
+    assert events[0]["trap_type"] == "ftp"
+    assert events[0]["src_ip"] == "10.1.1.1"
+    assert events[0]["input"] == "USER root"
+    assert events[0]["time"].endswith("Z")
+
+
+def test_iter_store_events_time_bounds(tmp_path):
+    store = EventStore(tmp_path)
+    day = 1_735_776_000_000_000   # 2025-01-02T00:00:00Z
+    store.append("ssh", "SSH", "10.0.0.1", "a", ts_us=day - 1)
+    store.append("ssh", "SSH", "10.0.0.1", "b", ts_us=day + 3_600_000_000)
+    store.append("ssh", "SSH", "10.0.0.1", "c", ts_us=day + 86_400_000_000)
+    store.flush()
+    got = [e["input"] for e in iter_store_events(since="2025-01-02", until="2025-01-02", store_dir=tmp_path)]
+    assert got == ["b"]
+    store.close()
+
+
+def test_scan_streams_rows_from_open_segment(tmp_path):
+    store = EventStore(tmp_path, batch_rows=1000)
+    for i in range(20_000):
+        store.append("ssh", "SSH", "10.0.0.1", "x" * 200, ts_us=i)
+    store.close()
+
+    tracemalloc.start()
+    try:
+        rows = StoreReader(tmp_path).scan()
+        first = next(rows)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert first["ts_us"] == 0
+    # שורה אחת מפוענחת, לא 20k dicts (~6MB)
+    assert peak < 1_000_000
+    rows.close()     # סוגר את ה-mmap באמצע ה-segment
@@ -0,0 +1,120 @@
+import os
+import io
+import ftplib
+import threading
+import pytest
+from controller import ftp_server
+from controller.ftp_server import EventLogging, build_server
+
+
+class _FakeManager:
+    def __init__(self):
+        self.calls = []
+
+    def run_trap(self, trap_type, input_data, ip):
+        self.calls.append((trap_type, input_data, ip))
+        return {}
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setattr(ftp_server, "FTP_AUTH_FAILED_DELAY", 0)
+    manager = _FakeManager()
+    events = EventLogging(manager, log_file=str(tmp_path / "ftp_logs.txt")).start()
+    srv, workers = build_server("async", "127.0.0.1", 0, str(tmp_path / "root"),
+                                max_cons=10, max_cons_per_ip=2, passive_ports="61000-61004")
+    stop = threading.Event()
+
+    def loop():
+        while not stop.is_set():
+            srv.ioloop.loop(timeout=0.05, blocking=False)
+        srv.close_all()
+
+    t = threading.Thread(target=loop, daemon=True)
+    t.start()
+    yield srv, srv.socket.getsockname()[1], manager, events
+    stop.set()
+    t.join(5)
+    events.stop()
+
+
+def test_logins_and_commands_become_ftp_trap_events(server):
+    srv, port, manager, events = server
+    assert list(srv.handler.passive_ports) == [61000, 61001, 61002, 61003, 61004]
+    ftp = ftplib.FTP()
+    ftp.connect("127.0.0.1", port, timeout=5)
+    with pytest.raises(ftplib.error_perm):
+        ftp.login("root", "toor")
+    ftp.login("user", "12345")
+    ftp.nlst()
+    with pytest.raises(ftplib.error_perm):
+        ftp.storbinary("STOR x.sh", io.BytesIO(b"#!/bin/sh"))     # אין הרשאת w
+    ftp.quit()
+    events.stop()                       # מרוקן את התור
+    inputs = [c[1] for c in manager.calls]
+    assert {"username": "root", "password": "toor"} in inputs
+    assert {"username": "user", "password": "12345"} in inputs
+    assert "NLST" in inputs and "STOR x.sh" in inputs
+    assert all(c[0] == "ftp" and c[2] == "127.0.0.1" for c in manager.calls)
+
+
+def test_per_ip_limit_rejects_extra_connections(server):
+    srv, port, manager, events = server
+    clients = [ftplib.FTP() for _ in range(2)]
+    for c in clients:
+        c.connect("127.0.0.1", port, timeout=5)
+    extra = ftplib.FTP()
+    with pytest.raises(ftplib.Error):
+        extra.connect("127.0.0.1", port, timeout=5)
+    for c in clients:
+        c.close()
+
+
+def test_full_queue_drops_instead_of_blocking(tmp_path):
+    events = EventLogging(_FakeManager(), queue_size=1, log_file=str(tmp_path / "ftp_logs.txt"))
+    # בלי listener אף אחד לא מרוקן את התור
+    for _ in range(3):
+        ftp_server.event_log.handle(ftp_server.event_log.makeRecord(
+            "honeypot.ftp", 20, __file__, 1, "x", (), None, extra={"trap_input": "NOOP", "trap_ip": "1.1.1.1"}))
+        events.handler.handle(ftp_server.event_log.makeRecord("honeypot.ftp", 20, __file__, 1, "x", (), None))
+    assert events.handler.dropped >= 2 and events.pending() == 1
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="prefork is posix only")
+def test_prefork_workers_keep_separate_rollups_that_sum(tmp_path, monkeypatch):
+    from controller import api_controller
+    from model import rollups
+    from model.trap_manager import TrapManager
+
+    monkeypatch.setattr(rollups, "ROLLUP_DIR", tmp_path / "rollups")
+    monkeypatch.setattr(rollups, "ROLLUP_NAME", "ftp_server")
+    for attr, value in (("_name", None), ("_lock_file", None), ("_forked", False), ("_rollups", None),
+                        ("_peers", rollups._PeerView()), ("_current", None)):
+        monkeypatch.setattr(rollups, attr, value)
+
+    # כמו run_ftp_server: ה-parent מקים את ה-logging (ותופס את שם ה-snapshot) לפני ה-fork
+    monkeypatch.setattr(ftp_server, "_events", None)
+    events = ftp_server.setup_logging(TrapManager(only=["ftp"]))
+    assert rollups.process_name() == "ftp_server"
+    pids = []
+    for n in (3, 4):
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                for i in range(n):
+                    ftp_server.event_log.info("ftp", extra={"trap_input": f"USER w{n}", "trap_ip": f"10.9.{n}.{i}"})
+                events.stop()
+                rollups.save()
+                code = 0 if rollups.get_rollups().count == n else 2
+            finally:
+                os._exit(code)
+        pids.append(pid)
+    assert [os.waitpid(pid, 0)[1] for pid in pids] == [0, 0]
+    events.stop()
+
+    names = sorted(p.name for p in (tmp_path / "rollups").glob("*.json"))
+    assert names == sorted(f"ftp_server-{pid}.json" for pid in pids)
+    with api_controller.app.test_client() as client:
+        data = client.get("/api/stats/top?dimension=trap").get_json()
+    assert data["total"] == 7 and data["items"] == [{"key": "ftp", "count": 7}]
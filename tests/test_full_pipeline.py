@@ -1,5 +1,6 @@
 import pytest
 from model.trap_manager import TrapManager
+from model import logger
 from model.report_generator import generate_report
 from pathlib import Path
 import re
@@ -31,6 +32,7 @@ def test_end_to_end_pipeline_multiple_traps():
     # Simulate all interactions
     for trap_type, input_data, ip, _ in interactions:
         manager.run_trap(trap_type, input_data=input_data, ip=ip)
+    logger.flush()
     # Verify all log entries
     for trap_type, input_data, ip, log_path in interactions:
         log_content = log_path.read_text()
@@ -0,0 +1,55 @@
+import pytest
+from model.geoip import GeoIPEngine
+from model import geoip
+
+
+@pytest.fixture
+def engine(tmp_path):
+    db = tmp_path / "geo.csv"
+    db.write_text(
+        "network,country,region,city,latitude,longitude,org\n"
+        "1.0.0.0/24,Australia,Queensland,Brisbane,-27.47,153.02,APNIC\n"
+        "8.8.8.0/24,United States,California,Mountain View,37.4,-122.07,Google\n"
+        "2001:4860::/32,United States,,,,,Google\n",
+        encoding="utf-8",
+    )
+    return GeoIPEngine(db, cache_size=16)
+
+
+def test_lookup_hits_range_by_binary_search(engine):
+    rec = engine.lookup("8.8.8.8")
+    assert rec["country"] == "United States"
+    assert rec["latitude"] == 37.4
+    assert engine.lookup("1.0.0.255")["city"] == "Brisbane"
+    assert engine.lookup("8.8.9.1") is None
+    assert engine.lookup("2001:4860:4860::8888")["org"] == "Google"
+    assert engine.lookup("not-an-ip") is None
+
+
+def test_lookup_is_cached_and_reload_clears_cache(engine):
+    engine.lookup("8.8.8.8")
+    engine.lookup("8.8.8.8")
+    assert engine.lookup.cache_info().hits == 1
+    engine.load()
+    assert engine.lookup.cache_info().currsize == 0
+
+
+def test_start_end_columns(tmp_path):
+    db = tmp_path / "ranges.csv"
+    db.write_text("start,end,country,asn\n16777216,16777471,Australia,AS13335\n", encoding="utf-8")
+    rec = GeoIPEngine(db).lookup("1.0.0.1")
+    assert rec["country"] == "Australia" and rec["org"] == "AS13335"
+
+
+def test_geoip_batch_endpoint(engine, monkeypatch):
+    from controller import api_controller as app_module
+    monkeypatch.setattr(geoip, "_engine", engine)
+    app_module.app.config["TESTING"] = True
+    with app_module.app.test_client() as client:
+        resp = client.post("/geoip/batch", json={"ips": ["8.8.8.8", "9.9.9.9"]})
+        assert resp.status_code == 200
+        results = resp.get_json()["results"]
+        assert results["8.8.8.8"]["city"] == "Mountain View"
+        assert results["9.9.9.9"] is None
+        assert client.get("/geoip?ip=9.9.9.9").status_code == 404
+        assert client.post("/geoip/batch", json={"ips": "8.8.8.8"}).status_code == 400
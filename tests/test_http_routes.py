@@ -0,0 +1,75 @@
+import json
+import os
+from model.http_routes import RouteCache, RouteTable, get_table
+from model.http_trap import HTTPTrap
+
+
+def _table(routes, **extra):
+    return RouteTable.from_spec({"routes": routes, **extra})
+
+
+def test_trie_prefers_literal_then_param_then_wildcard():
+    table = _table([
+        {"path": "/wp-admin/*", "*": {"status": 302, "headers": {"Location": "/wp-login.php?to=$rest"}}},
+        {"path": "/wp-admin/install.php", "GET": "installed"},
+        {"path": "/users/{id:[0-9]+}", "GET": "user $id"},
+        {"path": "/users/{name}", "GET": "name $name"},
+        {"path": ["/.env", "/{dir}/.env"], "GET": "SECRET=1 ($dir)"},
+    ])
+    assert table.resolve("GET", "/wp-admin/install.php").body == "installed"
+    r = table.resolve("POST", "/wp-admin/options.php?x=1")
+    assert r.status == 302 and r.headers == {"Location": "/wp-login.php?to=options.php"}
+    assert table.resolve("GET", "/wp-admin/").route == "/wp-admin/*"
+    assert table.resolve("GET", "/users/42").body == "user 42"
+    assert table.resolve("GET", "/users/bob").body == "name bob"
+    assert table.resolve("GET", "/laravel/.env").body == "SECRET=1 (laravel)"
+    assert table.resolve("GET", "/.env").body == "SECRET=1 ($dir)"
+    assert table.resolve("GET", "/users/1/2").status == 404
+
+
+def test_methods_are_preserved():
+    table = _table([{"path": "/login", "GET": "form", "POST": "Invalid credentials"},
+                    {"path": "/webdav/*", "PROPFIND": {"status": 207, "body": "<multistatus/>"}}])
+    assert table.resolve("HEAD", "/login").body == "" and table.resolve("HEAD", "/login").status == 200
+    r = table.resolve("DELETE", "/login")
+    assert r.status == 405 and r.headers["Allow"] == "GET, POST"
+    assert table.resolve("PROPFIND", "/webdav/a/b").status == 207
+
+    res = HTTPTrap().simulate_interaction("PUT /login\nx=1", "1.2.3.4")
+    assert res["data"]["status"] == 405
+    res = HTTPTrap().simulate_interaction({"method": "options", "path": "/"}, "1.2.3.4")
+    assert res["data"]["status"] == 405 and "GET" in res["data"]["headers"]["Allow"]
+
+
+def test_large_table_matches_by_path_length():
+    routes = [{"path": f"/app{i}/{{id}}/edit", "GET": f"app{i} $id"} for i in range(5000)]
+    table = _table(routes + [{"path": "/*", "GET": "catch-all"}])
+    assert table.size == 5001
+    assert table.resolve("GET", "/app4999/7/edit").body == "app4999 7"
+    assert table.resolve("GET", "/app4999/7/view").body == "catch-all"
+
+
+def test_route_file_is_cached_and_reloaded_on_change(tmp_path):
+    path = tmp_path / "routes.json"
+    path.write_text(json.dumps({"routes": [{"path": "/", "GET": "v1"}]}))
+    cache = RouteCache(path, check_seconds=0)
+    first = cache.get()
+    assert cache.get() is first and first.resolve("GET", "/").body == "v1"
+
+    path.write_text(json.dumps({"routes": [{"path": "/", "GET": "v2"}]}))
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert cache.get().resolve("GET", "/").body == "v2" and cache.reloads == 2
+
+    # קובץ שבור לא מחליף את הטבלה האחרונה שעבדה
+    path.write_text("{not json")
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 2_000_000))
+    assert cache.get().resolve("GET", "/").body == "v2"
+
+
+def test_default_route_file_keeps_existing_pages():
+    table = get_table()
+    assert "Welcome" in table.resolve("GET", "/").body
+    assert table.resolve("POST", "/login").body == "Invalid credentials"
+    assert table.resolve("GET", "/no_such_path").body == "<h1>404</h1>"
+    assert table.resolve("GET", "/phpmyadmin/index.php").status == 200
@@ -0,0 +1,71 @@
+import threading
+import time
+import pytest
+from model.ingest_queue import IngestQueue, QueueFull
+
+
+class _SlowManager:
+    def __init__(self):
+        self.gate = threading.Event()
+        self.calls = []
+
+    def run_trap(self, trap_type, input_data, ip):
+        self.gate.wait(5)
+        if input_data == "boom":
+            raise RuntimeError("boom")
+        self.calls.append((trap_type, input_data, ip))
+        return {}
+
+
+def test_submit_returns_id_and_workers_drain():
+    manager = _SlowManager()
+    q = IngestQueue(manager, workers=2, maxsize=10)
+    ok_id = q.submit("ssh", "id", "1.1.1.1")
+    bad_id = q.submit("ssh", "boom", "1.1.1.1")
+    assert q.status(ok_id)["status"] in ("queued", "done")
+    manager.gate.set()
+    q.join()
+    assert q.status(ok_id) == {"status": "done"}
+    assert q.status(bad_id)["status"] == "error"
+    m = q.metrics()
+    assert m["completed"] == 1 and m["failed"] == 1 and m["depth"] == 0
+    q.stop()
+
+
+def test_full_queue_raises_with_retry_after():
+    manager = _SlowManager()
+    q = IngestQueue(manager, workers=1, maxsize=1)
+    q.submit("ssh", "a", "1.1.1.1")      # נלקח ע"י ה-worker (חסום על gate)
+    while q.metrics()["depth"]:
+        time.sleep(0.01)
+    q.submit("ssh", "b", "1.1.1.1")
+    with pytest.raises(QueueFull) as exc:
+        q.submit("ssh", "c", "1.1.1.1")
+    assert exc.value.retry_after >= 1
+    assert q.metrics()["rejected"] == 1
+    manager.gate.set()
+    q.join()
+    q.stop()
+
+
+def test_simulate_prefer_async_returns_202_and_429(monkeypatch):
+    from controller import api_controller as app_module
+    manager = _SlowManager()
+    q = IngestQueue(manager, workers=1, maxsize=1)
+    monkeypatch.setattr(app_module, "ingest_queue", q)
+    app_module.app.config["TESTING"] = True
+    headers = {"Prefer": "respond-async"}
+    body = {"trap_type": "ssh", "input": "id", "ip": "1.1.1.1"}
+    with app_module.app.test_client() as client:
+        resp = client.post("/simulate", json=body, headers=headers)
+        assert resp.status_code == 202 and resp.get_json()["event_id"]
+        while q.metrics()["depth"]:     # ה-worker לוקח את הראשון ונחסם
+            time.sleep(0.01)
+        assert client.post("/simulate", json=body, headers=headers).status_code == 202
+        limited = client.post("/simulate", json=body, headers=headers)
+        assert limited.status_code == 429 and int(limited.headers["Retry-After"]) >= 1
+        assert client.post("/simulate", json={**body, "trap_type": "nope"}, headers=headers).status_code == 404
+        assert client.get("/queue/metrics").get_json()["rejected"] >= 1
+    manager.gate.set()
+    q.join()
+    q.stop()
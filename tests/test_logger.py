@@ -1,7 +1,89 @@
-from model.logger import log_interaction
+import os
+from model import logger
+from model.logger import log_interaction, LogSink
 
 def test_logger():
     log_interaction("Fake SSH Login", "192.168.0.42", "whoami")
 
+
+def test_sink_batches_lines_and_flushes(tmp_path):
+    sink = LogSink(flush_interval=60)
+    path = tmp_path / "a.log"
+    for i in range(100):
+        sink.write(path, f"line {i}")
+    assert sink.flush(timeout=5)
+    lines = path.read_text(encoding="utf-8").splitlines()
+    assert lines == [f"line {i}" for i in range(100)]
+    sink.close()
+
+
+def test_sink_reopens_deleted_file(tmp_path):
+    sink = LogSink(flush_interval=0)
+    path = tmp_path / "b.log"
+    sink.write(path, "first\n")
+    sink.flush(timeout=5)
+    os.remove(path)
+    sink.write(path, "second\n")
+    sink.flush(timeout=5)
+    assert path.read_text(encoding="utf-8") == "second\n"
+    sink.close()
+
+
+def test_sink_close_drains_queue(tmp_path):
+    sink = LogSink(flush_interval=60, fsync_policy="always")
+    path = tmp_path / "c.log"
+    sink.write(path, "x\n")
+    sink.close()
+    assert path.read_text(encoding="utf-8") == "x\n"
+
+
+def test_write_line_resolves_relative_to_log_dir():
+    logger.write_line("honeypot.log", "2025-01-01T00:00:00Z, test, 127.0.0.1, sink\n")
+    assert logger.flush(timeout=5)
+    assert "sink" in logger.LOG_FILE.read_text(encoding="utf-8")
+
 if __name__ == "__main__":
     test_logger()
+
+
+def test_sink_rotates_by_size_and_compresses(tmp_path):
+    sink = LogSink(flush_interval=0, max_bytes=100)
+    path = tmp_path / "r.log"
+    for i in range(10):
+        sink.write(path, f"{i:02d} " + "x" * 30)
+        sink.flush(timeout=5)
+    sink.close()
+
+    archives = logger.list_archives(path)
+    assert archives and all(p.suffix == ".gz" for _, _, p in archives)
+    lines = []
+    for _, _, p in archives:
+        with logger.open_archive(p) as f:
+            lines.extend(f.read().splitlines())
+    lines.extend(path.read_text(encoding="utf-8").splitlines())
+    assert [l[:2] for l in lines] == [f"{i:02d}" for i in range(10)]
+    assert os.path.getsize(path) <= 100
+
+
+def test_retention_removes_oldest_archives(tmp_path):
+    for day in (1, 2, 3):
+        p = logger.archive_path(tmp_path / "x.log", 86400 * day, 86400 * day + 60)
+        p.write_text("y" * 100, encoding="utf-8")
+        logger.compress_archive(p)
+    removed = logger.enforce_retention(tmp_path, max_bytes=1)
+    assert len(removed) == 3
+    for day in (1, 2, 3):
+        logger.archive_path(tmp_path / "x.log", 86400 * day, 86400 * day + 60).write_text("y", encoding="utf-8")
+    removed = logger.enforce_retention(tmp_path, max_days=1)
+    assert len(removed) == 3 and not logger.list_archives(tmp_path / "x.log")
+
+
+def test_sink_handler_writes_through_sink(tmp_path):
+    import logging
+    log = logging.getLogger("test_sink_handler")
+    handler = logger.SinkHandler(tmp_path / "ftp_logs.txt")
+    log.addHandler(handler)
+    log.warning("Failed login: root")
+    log.removeHandler(handler)
+    logger.flush()
+    assert (tmp_path / "ftp_logs.txt").read_text(encoding="utf-8") == "Failed login: root\n"
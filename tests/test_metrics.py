@@ -0,0 +1,99 @@
+import pytest
+from controller import api_controller as app_module
+from model import metrics
+from model.metrics import Registry
+from model.trap_manager import TrapManager
+
+
+def _sample(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_registry_renders_text_exposition_format():
+    reg = Registry()
+    c = reg.counter("demo_total", "Demo counter", ("trap_type",))
+    c.labels("ssh").inc()
+    c.labels("ssh").inc(2)
+    reg.gauge("demo_depth", "Depth").set(7)
+    h = reg.histogram("demo_seconds", "Demo latency", ("op",), buckets=(0.1, 1.0))
+    h.labels("a").observe(0.05)
+    h.labels("a").observe(0.5)
+    h.labels("a").observe(5)
+    text = reg.render()
+    assert "# TYPE demo_total counter" in text
+    assert _sample(text, 'demo_total{trap_type="ssh"}') == 3
+    assert _sample(text, "demo_depth") == 7
+    assert _sample(text, 'demo_seconds_bucket{op="a",le="0.1"}') == 1
+    assert _sample(text, 'demo_seconds_bucket{op="a",le="1"}') == 2
+    assert _sample(text, 'demo_seconds_bucket{op="a",le="+Inf"}') == 3
+    assert _sample(text, 'demo_seconds_count{op="a"}') == 3
+    # אותו שם מחזיר את אותו מדד; סוג אחר הוא שגיאה
+    assert reg.counter("demo_total", "Demo counter", ("trap_type",)) is c
+    with pytest.raises(ValueError):
+        reg.gauge("demo_total", "x")
+
+
+def test_timer_works_as_context_manager_and_decorator():
+    reg = Registry()
+    h = reg.histogram("t_seconds", "t", ("op",))
+
+    @h.labels("deco").time()
+    def work(x):
+        return x * 2
+
+    assert work(2) == 4 and work(3) == 6
+    with h.labels("ctx").time():
+        pass
+    assert h.labels("deco").count == 2 and h.labels("ctx").count == 1
+
+
+def test_disabled_registry_is_a_no_op():
+    reg = Registry(enabled=False)
+    h = reg.histogram("x_seconds", "x", ("op",))
+
+    def fn():
+        return 1
+
+    # decorator כבוי מחזיר את הפונקציה המקורית - אפס overhead בקריאה
+    assert h.labels("a").time()(fn) is fn
+    reg.counter("x_total", "x").inc()
+    assert reg.render() == "\n"
+
+
+def test_run_trap_records_latency_events_and_errors(monkeypatch):
+    manager = TrapManager()
+    before = metrics.REGISTRY.render()
+    manager.run_trap("ssh", "ls", "10.0.0.1")
+
+    def boom(input_data, ip):
+        raise RuntimeError("x")
+
+    monkeypatch.setattr(manager.get_trap("ftp"), "simulate_interaction", boom)
+    with pytest.raises(RuntimeError):
+        manager.run_trap("ftp", "LIST", "10.0.0.1")
+    text = metrics.REGISTRY.render()
+
+    def delta(key):
+        return (_sample(text, key) or 0) - (_sample(before, key) or 0)
+
+    assert delta('honeypot_trap_events_total{trap_type="ssh"}') == 1
+    assert delta('honeypot_trap_run_seconds_count{trap_type="ssh"}') == 1
+    assert delta('honeypot_trap_interaction_seconds_count{trap_type="ssh"}') == 1
+    assert delta('honeypot_trap_errors_total{trap_type="ftp",error="RuntimeError"}') == 1
+
+
+def test_metrics_endpoint_counts_requests_by_route():
+    client = app_module.app.test_client()
+    client.get("/health")
+    client.get("/api/sessions/1.2.3.4")
+    resp = client.get("/metrics")
+    assert resp.status_code == 200
+    assert resp.content_type.startswith("text/plain; version=0.0.4")
+    text = resp.get_data(as_text=True)
+    # label לפי ה-rule, לא לפי ה-URL (cardinality חסומה)
+    assert _sample(text, 'honeypot_http_requests_total{endpoint="/api/sessions/<ip>",method="GET",status="200"}') >= 1
+    assert 'honeypot_http_requests_total{endpoint="/health",method="GET",status="200"}' in text
+    assert "honeypot_ingest_queue_depth" in text
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+from controller.port_listener import PortListener, parse_ports
+
+
+class _FakeManager:
+    def __init__(self):
+        self.calls = []
+
+    def run_trap(self, trap_type, input_data, ip):
+        self.calls.append((trap_type, input_data, ip))
+        return {}
+
+
+def test_parse_ports_ranges():
+    assert parse_ports("22, 80,8000-8002,22") == [22, 80, 8000, 8001, 8002]
+
+
+def test_listener_sends_banner_and_records_first_bytes():
+    manager = _FakeManager()
+
+    async def scenario():
+        listener = PortListener([0], manager=manager, host="127.0.0.1", timeout=2)
+        port = (await listener.start())[0]
+        listener.banners = {port: "SSH-2.0-OpenSSH_8.2p1"}
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        banner = await reader.readline()
+        writer.write(b"GET / HTTP/1.0\r\nUser-Agent: Nmap Scripting Engine\r\n\r\n")
+        await writer.drain()
+        await reader.read()     # השרת סוגר אחרי הקריאה הראשונה
+        writer.close()
+        await listener.stop()
+        return port, banner
+
+    port, banner = asyncio.run(scenario())
+    assert banner == b"SSH-2.0-OpenSSH_8.2p1\r\n"
+    assert len(manager.calls) == 1
+    trap_type, input_data, ip = manager.calls[0]
+    assert trap_type == "open_ports" and ip == "127.0.0.1"
+    assert input_data["port"] == port
+    assert "Nmap" in input_data["payload"]
+
+
+def test_listener_drops_connections_over_cap():
+    manager = _FakeManager()
+
+    async def scenario():
+        listener = PortListener([0], manager=manager, host="127.0.0.1", timeout=2, max_connections=0)
+        port = (await listener.start())[0]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        data = await reader.read()
+        writer.close()
+        await listener.stop()
+        return listener, data
+
+    listener, data = asyncio.run(scenario())
+    assert data == b"" and listener.rejected == 1 and manager.calls == []
+
+
+def test_slow_trap_does_not_block_the_event_loop():
+    release = threading.Event()
+
+    class SlowManager(_FakeManager):
+        def run_trap(self, trap_type, input_data, ip):
+            release.wait(5)
+            return super().run_trap(trap_type, input_data, ip)
+
+    manager = SlowManager()
+
+    async def scenario():
+        listener = PortListener([0], manager=manager, host="127.0.0.1", timeout=2, workers=2)
+        port = (await listener.start())[0]
+        listener.banners = {port: "220 ready"}
+        banners = []
+        for _ in range(2):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            banners.append(await asyncio.wait_for(reader.readline(), 1))
+            writer.write(b"x")
+            await writer.drain()
+            await reader.read()
+            writer.close()
+        # שני הרישומים תקועים ב-pool, וה-loop עדיין עונה
+        busy = listener.active
+        release.set()
+        await listener.stop()
+        return banners, busy
+
+    banners, busy = asyncio.run(scenario())
+    assert banners == [b"220 ready\r\n"] * 2 and busy == 2
+    assert len(manager.calls) == 2
+
+
+def test_open_ports_trap_logs_payload_and_detects_nmap(monkeypatch):
+    from model.open_ports_trap import OpenPortsTrap
+    lines = []
+    monkeypatch.setattr(OpenPortsTrap, "_append_log_line", lambda self, line: lines.append(line))
+    out = OpenPortsTrap().simulate_interaction({"port": 80, "payload": "GET / HTTP/1.0\r\nUser-Agent: Nmap\r\n"}, "1.2.3.4")
+    assert out["data"]["nmap_detected"] is True
+    assert "payload: GET / HTTP/1.0\\r\\n" in out["input"]
+    assert len(lines) == 2
@@ -0,0 +1,77 @@
+import threading
+import time
+from collections import Counter
+import pytest
+from controller import api_controller as app_module
+from model import profiler
+
+
+def _spin(stop):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_collects_stacks_of_other_threads():
+    stop = threading.Event()
+    t = threading.Thread(target=_spin, args=(stop,), name="spinner", daemon=True)
+    t.start()
+    try:
+        counts, rounds = profiler.sample(0.2, interval=0.002)
+    finally:
+        stop.set()
+        t.join()
+    assert rounds > 10
+    spinner = [s for s in counts if s.startswith("thread:spinner;")]
+    assert spinner and any("_spin (tests/test_profiler.py:" in s for s in spinner)
+    text = profiler.collapsed(counts)
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in text.splitlines())
+
+
+def test_summary_counts_self_and_total_samples():
+    counts = Counter({"thread:a;main (x.py:1);work (x.py:5)": 3, "thread:a;main (x.py:1)": 1})
+    lines = profiler.summary(counts).splitlines()
+    assert lines[0] == "4 samples"
+    main = next(l for l in lines if l.endswith("main (x.py:1)"))
+    work = next(l for l in lines if l.endswith("work (x.py:5)"))
+    assert main.split()[:4] == ["1", "25.0", "4", "100.0"]
+    assert work.split()[:4] == ["3", "75.0", "3", "75.0"]
+
+
+def test_only_one_profile_runs_at_a_time():
+    with profiler._busy:
+        with pytest.raises(profiler.ProfilerBusy):
+            profiler.sample(0.01)
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiler, "PROFILE_DIR", tmp_path)
+    return app_module.app.test_client()
+
+
+def test_debug_profile_is_admin_only(client, monkeypatch):
+    assert client.get("/debug/profile?seconds=0").status_code == 401
+    monkeypatch.setattr(app_module, "DEBUG_TOKEN", "s3cret")
+    assert client.get("/debug/profile?seconds=0", headers={"X-Debug-Token": "nope"}).status_code == 401
+    resp = client.get("/debug/profile?seconds=0.05&format=pstats", headers={"X-Debug-Token": "s3cret"})
+    assert resp.status_code == 200 and "samples" in resp.get_data(as_text=True)
+    with client.session_transaction() as sess:
+        sess["user"] = "admin"
+    assert client.get("/debug/profile?seconds=0.05").status_code == 200
+    assert client.get("/debug/profile?format=svg").status_code == 400
+
+
+def test_profile_header_on_simulate(client):
+    payload = {"trap_type": "ssh", "input": "ls", "ip": "10.1.1.1"}
+    # לא אדמין - הכותרת מתעלמת
+    resp = client.post("/simulate", json=payload, headers={"X-Profile": "1"})
+    assert resp.status_code == 200 and "X-Profile-Id" not in resp.headers
+    with client.session_transaction() as sess:
+        sess["user"] = "admin"
+    resp = client.post("/simulate", json=payload, headers={"X-Profile": "1"})
+    assert resp.status_code == 200 and resp.get_json()["trap_type"] == "ssh"
+    pid = resp.headers["X-Profile-Id"]
+    text = client.get(f"/debug/profile/{pid}?sort=tottime").get_data(as_text=True)
+    assert "function calls" in text and "run_trap" in text
+    assert client.get(f"/debug/profile/{pid}?raw=1").status_code == 200
+    assert client.get("/debug/profile/../../etc").status_code == 404
@@ -1,6 +1,7 @@
 
 from pathlib import Path
 from model.ransomware_trap import RansomwareTrap, BAIT_DIR, LOG_FILE
+from model import logger
 
 def test_ransomware_encrypts_and_writes_log():
     """
@@ -63,6 +64,7 @@ def test_ransomware_encrypts_and_writes_log():
         assert any(k in readme_content for k in keywords)
 
         # בדיקת לוג 
+        logger.flush()
         assert log_file.exists()
         log_text_after = log_file.read_text(encoding="utf-8")
         assert len(log_text_after) > len(log_text_before)
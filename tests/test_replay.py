@@ -0,0 +1,75 @@
+import gzip
+import json
+import threading
+import time
+from werkzeug.serving import make_server
+from benchmarks.replay import HttpTarget, load_events, parse_line, replay
+from controller import aws_listener
+
+
+def test_parse_line_handles_existing_log_formats():
+    assert parse_line('2025-08-29T13:11:54Z,http,1.2.3.4,"GET /"')[1:] == ("http", "GET /", "1.2.3.4")
+    assert parse_line('2025-08-29T13:11:54Z,open_ports,6.6.6.6,"Port: 22"')[2] == {"port": 22}
+    ev = parse_line("2025-08-21T11:29:35Z, IoT Router, 127.0.0.1, {'ssid': 'Net', 'password': 'x'}")
+    assert ev[1:] == ("iot_router", {"ssid": "Net", "password": "x"}, "127.0.0.1")
+    ev = parse_line("[AdminPanelTrap] 2025-08-27T21:18:05 | IP: 10.0.0.1 | User: admin | Success: False")
+    assert ev[1:] == ("admin_panel", {"username": "admin", "password": ""}, "10.0.0.1")
+    ev = parse_line(json.dumps({"trap": "phishing", "username": "bob", "password": "1234",
+                                "ip": "5.5.5.5", "time": "2025-09-11 13:28:59"}))
+    assert ev[1:] == ("phishing", {"username": "bob", "password": "1234"}, "5.5.5.5")
+    ev = parse_line('2025-08-19T16:11:25Z | protocol=FILE | type=ransomware | ip=10.0.0.9 | action="lock:a"')
+    assert ev[1:] == ("ransomware", "lock:a", "10.0.0.9")
+    assert parse_line("2025-08-09 19:24:26,570 INFO concurrency model: async") is None
+
+
+def test_load_events_merges_archives_and_files_by_time(tmp_path):
+    with gzip.open(tmp_path / "http_honeypot.log.20250101T000000Z-20250101T010000Z.gz", "wt") as f:
+        f.write('2025-01-01T00:00:01Z,http,1.1.1.1,"GET /old"\n')
+    (tmp_path / "http_honeypot.log").write_text('2025-01-01T00:00:05Z,http,1.1.1.1,"GET /new"\n')
+    (tmp_path / "ssh_honeypot.log").write_text('2025-01-01T00:00:03Z,ssh,2.2.2.2,"id"\n')
+    (tmp_path / "ransomware_honeypot.log").write_text(
+        '2025-01-01T00:00:02Z | protocol=FILE | type=ransomware | ip=3.3.3.3 | action="x"\n')
+    (tmp_path / "recorded.jsonl").write_text(
+        json.dumps({"trap_type": "ftp", "input": "USER root", "ip": "4.4.4.4", "timestamp": 1735689604}) + "\n"
+        + json.dumps({"request_id": "not-an-event"}) + "\n")
+    stats = {}
+    events = list(load_events([tmp_path], stats=stats))
+    assert [e[2] for e in events] == ["GET /old", "id", "USER root", "GET /new"]
+    # ransomware מדולג כברירת מחדל, וגם השורה שאינה אירוע
+    assert stats["skipped"] == 2
+
+
+def test_replay_paces_by_speed_and_counts_errors():
+    events = [(100.0, "ssh", "id", "1.1.1.1"), (101.0, "ssh", "boom", "1.1.1.1"), (102.0, "http", "GET /", "2.2.2.2")]
+    seen = []
+
+    def send(trap_type, input_data, ip):
+        if input_data == "boom":
+            raise KeyError(input_data)
+        seen.append(trap_type)
+
+    t0 = time.perf_counter()
+    out = replay(events, send, speed=10, concurrency=2)
+    assert time.perf_counter() - t0 >= 0.19
+    assert out["sent"] == 3 and out["errors"] == 1 and out["by_error"] == {"KeyError": 1}
+    assert out["error_rate"] == round(1 / 3, 4) and sorted(seen) == ["http", "ssh"]
+    # max_gap חוסם פערים ארוכים, speed=0 לא ממתין בכלל
+    t0 = time.perf_counter()
+    replay([(0.0, "ssh", "id", "ip"), (86400.0, "ssh", "id", "ip")], send, speed=1, max_gap=0.05)
+    assert time.perf_counter() - t0 < 1
+    assert replay(events, send, speed=0, limit=2)["sent"] == 2
+
+
+def test_http_target_replays_into_ingest(monkeypatch):
+    calls = []
+    monkeypatch.setattr(aws_listener.trap_manager, "run_trap", lambda t, d, ip: calls.append((t, d, ip)) or {})
+    server = make_server("127.0.0.1", 0, aws_listener.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        target = HttpTarget(f"http://127.0.0.1:{server.server_port}", "/ingest")
+        out = replay([(None, "ssh", "id", "9.9.9.9"), (None, "open_ports", {"port": 22}, "9.9.9.8")],
+                     target, speed=0, concurrency=2)
+    finally:
+        server.shutdown()
+    assert out["ok"] == 2 and out["errors"] == 0
+    assert sorted(calls) == [("open_ports", {"port": 22}, "9.9.9.8"), ("ssh", "id", "9.9.9.9")]
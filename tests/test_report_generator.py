@@ -0,0 +1,141 @@
+import os
+from model.report_generator import EventIndex, iter_events, iter_csv
+
+
+def _append(path, text):
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(text)
+
+
+def test_index_reads_only_appended_lines(tmp_path):
+    log = tmp_path / "http_honeypot.log"
+    _append(log, '2025-01-01T00:00:00Z,http,1.1.1.1,"GET /"\n')
+    index = EventIndex(tmp_path)
+    first = index.events()
+    assert [e["src_ip"] for e in first] == ["1.1.1.1"]
+
+    _append(log, '2025-01-01T00:00:05Z,http,2.2.2.2,"GET /login"\n')
+    _append(tmp_path / "honeypot.log", '{"trap": "phishing", "ip": "3.3.3.3", "time": "2025-01-01T00:00:03Z"}\n')
+    events = index.events()
+    assert [e["src_ip"] for e in events] == ["2.2.2.2", "3.3.3.3", "1.1.1.1"]
+    # אותם אובייקטים - השורה הראשונה לא נפרסה שוב
+    assert events[-1] is first[0]
+
+
+def test_index_waits_for_partial_line(tmp_path):
+    log = tmp_path / "ssh_honeypot.log"
+    _append(log, '2025-01-01T00:00:00Z,ssh,1.1.1.1,"ls')
+    index = EventIndex(tmp_path)
+    assert index.events() == []
+    _append(log, ' -la"\n')
+    events = index.events()
+    assert len(events) == 1 and events[0]["input"] == "ls -la"
+
+
+def test_index_handles_truncate_and_rotation(tmp_path):
+    log = tmp_path / "ftp_honeypot.log"
+    _append(log, '2025-01-01T00:00:00Z,ftp,1.1.1.1,"USER a"\n2025-01-01T00:00:01Z,ftp,1.1.1.1,"PASS b"\n')
+    index = EventIndex(tmp_path)
+    assert len(index.events()) == 2
+
+    log.write_text('2025-01-02T00:00:00Z,ftp,9.9.9.9,"LIST"\n', encoding="utf-8")
+    assert [e["src_ip"] for e in index.events()] == ["9.9.9.9"]
+
+    os.rename(log, tmp_path / "ftp_honeypot.log.1")
+    _append(log, '2025-01-03T00:00:00Z,ftp,8.8.8.8,"LIST"\n')
+    assert [e["src_ip"] for e in index.events()] == ["8.8.8.8"]
+
+
+def test_index_normalizes_trap_aliases(tmp_path):
+    _append(tmp_path / "iot.log", "2025-01-01T00:00:00Z,IoT Router,1.1.1.1,ssid=x\n")
+    event = EventIndex(tmp_path).events()[0]
+    assert event["trap_type"] == "iot_router"
+    assert event["username"] == "" and event["details"] == ""
+
+
+def test_iter_events_applies_filters_while_reading(tmp_path):
+    _append(tmp_path / "http_honeypot.log",
+            '2025-01-01T00:00:00Z,http,1.1.1.1,"GET /"\n'
+            '2025-01-02T00:00:00Z,http,2.2.2.2,"GET /admin"\n')
+    _append(tmp_path / "honeypot.log",
+            '{"trap": "phishing", "ip": "2.2.2.2", "time": "2025-01-03 10:00:00"}\n')
+
+    by_ip = list(iter_events(ip="2.2.2.2", logs_dir=tmp_path))
+    assert {e["trap_type"] for e in by_ip} == {"http", "phishing"}
+
+    by_type = list(iter_events(trap_type="HTTPTrap", logs_dir=tmp_path))
+    assert len(by_type) == 2
+
+    window = list(iter_events(since="2025-01-02", until="2025-01-02T23:59:59Z", logs_dir=tmp_path))
+    assert [e["src_ip"] for e in window] == ["2.2.2.2"]
+    assert window[0]["trap_type"] == "http"
+
+
+def test_iter_csv_streams_in_chunks(tmp_path):
+    _append(tmp_path / "ssh_honeypot.log",
+            "".join(f'2025-01-01T00:00:{i:02d}Z,ssh,1.1.1.1,"cmd {i}"\n' for i in range(5)))
+    chunks = list(iter_csv(chunk_rows=2, logs_dir=tmp_path))
+    assert chunks[0].startswith("time,src_ip,trap_type")
+    assert len(chunks) == 3
+    assert "".join(chunks).count("\n") == 6
+
+
+def _archive(tmp_path, name, start, end, text):
+    from model import logger
+    p = logger.archive_path(tmp_path / name, start, end)
+    p.write_text(text, encoding="utf-8")
+    return logger.compress_archive(p)
+
+
+def test_iter_events_skips_archives_outside_range(tmp_path, monkeypatch):
+    from model import logger
+    jan1, jan10 = 1735689600, 1736467200
+    _archive(tmp_path, "ssh_honeypot.log", jan1, jan1 + 3600, '2025-01-01T00:10:00Z,ssh,1.1.1.1,"ls"\n')
+    _archive(tmp_path, "ssh_honeypot.log", jan10, jan10 + 3600, '2025-01-10T00:10:00Z,ssh,2.2.2.2,"id"\n')
+    _append(tmp_path / "ssh_honeypot.log", '2025-01-20T00:00:00Z,ssh,3.3.3.3,"w"\n')
+
+    assert [e["src_ip"] for e in iter_events(logs_dir=tmp_path)] == ["1.1.1.1", "2.2.2.2", "3.3.3.3"]
+
+    opened = []
+    real_open = logger.open_archive
+    monkeypatch.setattr("model.report_generator.open_archive", lambda p, **kw: opened.append(str(p)) or real_open(p, **kw))
+    got = [e["src_ip"] for e in iter_events(since="2025-01-09", until="2025-01-10", logs_dir=tmp_path)]
+    assert got == ["2.2.2.2"]
+    assert not any("20250101" in p for p in opened)
+
+
+def test_index_keeps_events_across_sink_rotation(tmp_path):
+    from model.logger import LogSink
+    sink = LogSink(flush_interval=0, max_bytes=60)
+    log = tmp_path / "ftp_honeypot.log"
+    index = EventIndex(tmp_path)
+    sink.write(log, '2025-01-01T00:00:00Z,ftp,1.1.1.1,"USER a"')
+    sink.flush(timeout=5)
+    first = index.query(limit=10)
+    assert len(first["events"]) == 1
+
+    sink.write(log, '2025-01-01T00:00:01Z,ftp,2.2.2.2,"USER b"')
+    sink.write(log, '2025-01-01T00:00:02Z,ftp,3.3.3.3,"USER c"')
+    sink.close()
+    page = index.query(limit=10)
+    assert [e["src_ip"] for e in page["events"]] == ["3.3.3.3", "2.2.2.2", "1.1.1.1"]
+    # ה-delta מחזיר רק את מה שנוסף - בלי כפילות של השורה שעברה לארכיון
+    delta = index.query(after=first["latest"])
+    assert sorted(e["src_ip"] for e in delta["events"]) == ["2.2.2.2", "3.3.3.3"]
+
+
+def test_index_handles_several_rotations_between_refreshes(tmp_path):
+    from model.logger import LogSink
+    sink = LogSink(flush_interval=0, max_bytes=60)
+    log = tmp_path / "ftp_honeypot.log"
+    index = EventIndex(tmp_path)
+    sink.write(log, '2025-01-01T00:00:00Z,ftp,1.1.1.1,"USER a"')
+    sink.flush(timeout=5)
+    first = index.query(limit=10)
+    for i in (2, 3, 4):
+        sink.write(log, f'2025-01-01T00:00:0{i}Z,ftp,{i}.{i}.{i}.{i},"USER x"')
+        sink.flush(timeout=5)
+    sink.close()
+    assert [e["src_ip"] for e in index.query(limit=10)["events"]] == ["4.4.4.4", "3.3.3.3", "2.2.2.2", "1.1.1.1"]
+    delta = index.query(after=first["latest"])
+    assert sorted(e["src_ip"] for e in delta["events"]) == ["2.2.2.2", "3.3.3.3", "4.4.4.4"]
@@ -0,0 +1,122 @@
+import gzip
+import os
+import pytest
+from controller import api_controller as app_module
+from model import report_generator
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(report_generator, "LOG_DIR", tmp_path)
+    monkeypatch.setattr(report_generator, "_INDEX", report_generator.EventIndex(tmp_path))
+    (tmp_path / "http_honeypot.log").write_text(
+        '2025-01-01T00:00:00Z,http,1.1.1.1,"GET /"\n'
+        '2025-01-02T00:00:00Z,http,2.2.2.2,"GET /admin"\n',
+        encoding="utf-8",
+    )
+    app_module.app.config["TESTING"] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+
+def test_reports_csv_streams_filtered_rows(client):
+    resp = client.get("/reports.csv?ip=2.2.2.2")
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/csv"
+    body = resp.get_data(as_text=True)
+    assert "2.2.2.2" in body and "1.1.1.1" not in body
+
+
+def test_reports_csv_gzip(client):
+    resp = client.get("/reports.csv", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    body = gzip.decompress(resp.get_data()).decode("utf-8")
+    assert body.startswith("time,src_ip,trap_type")
+    assert "1.1.1.1" in body and "2.2.2.2" in body
+
+
+def test_api_events_cursor_pagination(client):
+    resp = client.get("/api/events?limit=1")
+    page = resp.get_json()
+    assert [e["src_ip"] for e in page["events"]] == ["2.2.2.2"]
+    assert page["has_more"] and page["next_cursor"]
+
+    page2 = client.get(f"/api/events?limit=1&cursor={page['next_cursor']}").get_json()
+    assert [e["src_ip"] for e in page2["events"]] == ["1.1.1.1"]
+    assert page2["next_cursor"] is None
+
+
+def test_api_events_filters_and_delta(client, tmp_path):
+    first = client.get("/api/events?q=admin").get_json()
+    assert [e["src_ip"] for e in first["events"]] == ["2.2.2.2"]
+
+    with open(tmp_path / "ssh_honeypot.log", "a", encoding="utf-8") as f:
+        f.write('2024-12-31T00:00:00Z,ssh,3.3.3.3,"uname -a"\n')
+    delta = client.get(f"/api/events?after={first['latest']}").get_json()
+    assert [e["src_ip"] for e in delta["events"]] == ["3.3.3.3"]
+    assert delta["latest"] > first["latest"]
+
+    assert client.get("/api/events?cursor=@@").status_code == 400
+
+
+def test_reports_pdf_summary_first_with_row_cap(client, monkeypatch):
+    from model.rollups import Rollups
+    r = Rollups()
+    r.record("http", "1.1.1.1", ts=1735689600)
+    r.record("http", "2.2.2.2", ts=1735776000)
+    monkeypatch.setattr(report_generator.rollups, "current", lambda: r)
+    stats = report_generator.pdf_summary()
+    assert stats["total"] == 2 and stats["by_trap"] == [("http", 2)]
+    assert report_generator.pdf_summary(since="2025-01-02")["total"] == 1
+    # סינון לפי IP: הסיכום מהאירועים של ה-IP, לא מה-rollups הכוללים
+    real_iter = report_generator.iter_events
+    events = [{"time": "2025-01-01T00:10:00Z", "src_ip": "1.1.1.1", "trap_type": "ssh", "username": "root"},
+              {"time": "2025-01-01T00:20:00Z", "src_ip": "1.1.1.1", "trap_type": "ssh", "username": ""}]
+    monkeypatch.setattr(report_generator, "iter_events",
+                        lambda since=None, until=None, trap_type=None, ip=None: iter(e for e in events if e["src_ip"] == ip))
+    stats = report_generator.pdf_summary(ip="1.1.1.1")
+    assert stats["total"] == 2 and stats["by_trap"] == [("ssh", 2)] and stats["top_ips"] == [("1.1.1.1", 2)]
+    assert stats["top_usernames"] == [("root", 1)] and stats["timeline"] == [("2025-01-01 00h", 2)]
+    assert report_generator.pdf_summary(ip="2.2.2.2")["total"] == 0
+    monkeypatch.setattr(report_generator, "iter_events", real_iter)
+
+    written = []
+    real = report_generator.write_pdf
+    monkeypatch.setattr(report_generator, "write_pdf", lambda out, **kw: written.append(real(out, **kw)) or written[-1])
+    resp = client.get("/reports.pdf?max_rows=1")
+    assert resp.status_code == 200 and resp.mimetype == "application/pdf"
+    assert resp.data.startswith(b"%PDF") and int(resp.headers["Content-Length"]) == len(resp.data)
+    assert written == [1]
+    client.get("/reports.pdf?ip=9.9.9.9")
+    assert written[-1] == 0
+    assert client.get("/reports.pdf?max_rows=x").status_code == 400
+
+
+def test_report_html_cache_etag_and_invalidation(client, tmp_path, monkeypatch):
+    template = tmp_path / "summary.html"
+    template.write_text("{% for e in events %}{{ e.src_ip }};{% endfor %}", encoding="utf-8")
+    monkeypatch.setattr(app_module, "REPORT_TEMPLATE", template)
+    monkeypatch.setattr(app_module, "_report_cache", app_module.OrderedDict())
+    calls = []
+    real = report_generator.get_events_for_report
+    monkeypatch.setattr(report_generator, "get_events_for_report", lambda: calls.append(1) or real())
+
+    first = client.get("/report")
+    assert first.status_code == 200 and "2.2.2.2;1.1.1.1;" in first.get_data(as_text=True)
+    etag = first.headers["ETag"]
+    # אותה גרסת נתונים: 304 בלי רינדור, או body מה-cache
+    assert client.get("/report", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/report").get_data() == first.get_data()
+    assert len(calls) == 1
+
+    # שורה חדשה בלוג (גם מתהליך אחר) פוסלת
+    with open(tmp_path / "http_honeypot.log", "a", encoding="utf-8") as f:
+        f.write('2025-01-03T00:00:00Z,http,3.3.3.3,"GET /x"\n')
+    resp = client.get("/report", headers={"If-None-Match": etag})
+    assert resp.status_code == 200 and resp.get_data(as_text=True).startswith("3.3.3.3;")
+    assert len(calls) == 2
+
+    # שינוי בתבנית נטען לפי mtime
+    template.write_text("count={{ events|length }}", encoding="utf-8")
+    os.utime(template, ns=(0, template.stat().st_mtime_ns + 10**9))
+    assert client.get("/report").get_data(as_text=True) == "count=3"
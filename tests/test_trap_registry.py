@@ -0,0 +1,74 @@
+import json
+import pytest
+from model import trap_registry
+from model.trap_registry import TrapConfigError, TrapRegistry, TrapSpec, discover
+from model.trap_manager import TrapManager
+
+BUILT = []
+
+
+class CountingTrap:
+    def __init__(self, banner="hi"):
+        BUILT.append(banner)
+        self.banner = banner
+
+    def simulate_interaction(self, input_data, ip):
+        return {"banner": self.banner, "input": input_data}
+
+
+class FakeEntryPoint:
+    name = "plugin"
+
+    def load(self):
+        return CountingTrap
+
+
+def _config(tmp_path, traps):
+    path = tmp_path / "traps.json"
+    path.write_text(json.dumps({"traps": traps}), encoding="utf-8")
+    return path
+
+
+def test_traps_are_built_lazily_once(tmp_path):
+    BUILT.clear()
+    path = _config(tmp_path, {
+        "counting": {"class": "tests.test_trap_registry:CountingTrap", "kwargs": {"banner": "SSH-2.0"}},
+        "off": {"class": "no.such.module:Trap", "enabled": False},
+    })
+    registry = TrapRegistry(discover(path, entry_points=False))
+    assert registry.names() == ["counting"] and BUILT == []
+    assert registry.get("off") is None and registry.get("missing") is None
+    trap = registry.get("counting")
+    assert registry.get("counting") is trap and BUILT == ["SSH-2.0"] and registry.loaded() == ["counting"]
+
+    manager = TrapManager(registry=registry)
+    assert manager.run_trap("counting", "x", "1.2.3.4")["result"]["banner"] == "SSH-2.0"
+    with pytest.raises(KeyError):
+        manager.run_trap("off", "x", "1.2.3.4")
+
+
+def test_enable_flags_and_entry_points(tmp_path, monkeypatch):
+    monkeypatch.setattr(trap_registry, "_entry_points", lambda: [FakeEntryPoint()])
+    path = _config(tmp_path, {"http": "model.http_trap:HTTPTrap", "ftp": "model.ftp_trap:FTPTrap"})
+    monkeypatch.setenv("HONEY_TRAP_FTP", "0")
+    specs = discover(path)
+    assert specs["plugin"].source == "entry_point" and not specs["ftp"].enabled
+    assert TrapRegistry(specs).names() == ["plugin", "http"]
+    assert TrapRegistry(specs, only=["http", "ftp"]).names() == ["http"]
+    assert isinstance(TrapRegistry(specs).get("plugin"), CountingTrap)
+
+    with pytest.raises(TrapConfigError):
+        TrapSpec.parse("bad", {"class": "no_colon"})
+    # enabled כמחרוזת בקונפיג מפורש כמו דגל הסביבה
+    assert not TrapSpec.parse("x", {"class": "m:C", "enabled": "false"}).enabled
+    assert not TrapSpec.parse("x", {"class": "m:C", "enabled": "0"}).enabled
+    assert not TrapSpec.parse("x", {"class": "m:C", "enabled": 0}).enabled
+    assert TrapSpec.parse("x", {"class": "m:C", "enabled": "yes"}).enabled
+    with pytest.raises(TrapConfigError):
+        TrapSpec.parse("x", {"class": "m:C", "enabled": [False]})
+
+
+def test_default_manager_lists_all_builtin_traps():
+    manager = TrapManager()
+    assert set(trap_registry.DEFAULT_TRAPS) <= set(manager.list_traps())
+    assert TrapManager(only=["ftp"]).list_traps() == ["ftp"]
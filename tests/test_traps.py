@@ -5,6 +5,7 @@ from model.phishing_trap import PhishingTrap
 from pathlib import Path
 from model.trap_manager import TrapManager
 from model.open_ports_trap import OpenPortsTrap
+from model import logger
 
 
 @pytest.fixture
@@ -167,6 +168,7 @@ def test_phishing_trap_saves_credentials():
     clear_log()
     trap = PhishingTrap()
     trap.simulate_interaction("giladb", "1234", "127.0.0.1")
+    logger.flush()
 
     content = LOG_PATH.read_text()
     assert "giladb" in content
@@ -177,6 +179,7 @@ def test_phishing_trap_missing_data():
     clear_log()
     trap = PhishingTrap()
     trap.simulate_interaction("", "", "127.0.0.1")
+    logger.flush()
 
     content = LOG_PATH.read_text()
     assert "username': ''" not in content